@@ -12,17 +12,35 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 RECORDINGS_DIR = BASE_DIR / "data/recordings"
 EXPORTS_DIR = BASE_DIR / "data/exports"
 DB_PATH = BASE_DIR / "data/db/meetings.db"
+AUDIO_CACHE_DIR = BASE_DIR / "data/cache/audio"
+UPLOADS_DIR = BASE_DIR / "data/uploads"
+STAGE_CACHE_DIR = BASE_DIR / "data/cache/stages"
+EMBEDDINGS_DIR = BASE_DIR / "data/embeddings"
+VOICEPRINTS_DIR = BASE_DIR / "data/voiceprints"
 
 # Ensure directories exist
 RECORDINGS_DIR.mkdir(exist_ok=True, parents=True)
 EXPORTS_DIR.mkdir(exist_ok=True, parents=True)
 DB_PATH.parent.mkdir(exist_ok=True, parents=True)
 
+# Stage output cache (transcripts, speaker embeddings and labels per recording)
+STAGE_CACHE_MAX_MB = 2048          # least recently used outputs are evicted beyond this size
+STAGE_CACHE_MAX_AGE_DAYS = 90      # outputs unused for this long are evicted
+
+# Database Configuration (connections are pooled per process, in WAL mode)
+DB_POOL_SIZE = 8               # idle connections kept open per process
+DB_BUSY_TIMEOUT = 30           # seconds a write waits for another process's write to finish
+DB_CACHE_SIZE_MB = 64          # page cache per connection
+DB_MMAP_SIZE_MB = 256          # database file memory-mapped for reads
+DB_STATEMENT_CACHE_SIZE = 256  # prepared statements kept per connection
+
 # Audio Configuration
-SAMPLE_RATE = 44100
+SAMPLE_RATE = 44100        # capture rate of the input device
+RECORDING_FORMAT = "flac"  # stored as 16 kHz mono; Options: flac (lossless, smaller), wav
 CHANNELS = 1
 WHISPER_MODEL = "medium"  # Options: tiny, base, small, medium, large
 COMPUTE_TYPE = "int8"     # Options: int8, float16, float32
+AUDIO_MMAP_THRESHOLD = 600  # seconds; longer recordings are decoded into a memory-mapped scratch file
 
 # Audio Input Configuration
 DEFAULT_INPUT_DEVICE = None  # None means system default
@@ -32,16 +50,145 @@ INPUT_DEVICE_SETTINGS = {
     'blocksize': 1024     # Buffer size for audio blocks
 }
 
+# Streaming Capture Configuration
+CAPTURE_FORMAT = 'wav'           # Options: wav, flac
+CAPTURE_RING_SECONDS = 30        # ring buffer between the audio callback and the writer thread
+CAPTURE_CHECKPOINT_INTERVAL = 10 # seconds between on-disk checkpoints of the capture file
+
+# Live Transcription Configuration
+LIVE_TRANSCRIPTION = True        # transcribe device recordings while they are captured
+LIVE_CHUNK_SECONDS = 30          # target chunk length handed to Whisper
+LIVE_CHUNK_OVERLAP = 1.0         # seconds of context shared between neighbouring chunks
+LIVE_SILENCE_SEARCH = 5.0        # seconds before the target searched for the quietest cut point
+
 # Speaker Diarization Configuration
-MAX_SPEAKERS = 3
+MAX_SPEAKERS = 3   # upper bound for the estimated speaker count
+MIN_SPEAKERS = 1
 SEGMENT_LENGTH = 3  # seconds
 SPEAKER_CLUSTERING_METRIC = 'cosine'
 SPEAKER_CLUSTERING_LINKAGE = 'average'
+SPEAKER_COUNT_METHOD = 'eigengap'    # Options: eigengap, threshold
+SPEAKER_DISTANCE_THRESHOLD = 0.7     # cosine distance, used by the threshold method
+SPEAKER_MAX_CENTROIDS = 256          # first-pass centroids before agglomerative clustering
+VOICEPRINT_MIN_SIMILARITY = 0.75     # cosine similarity needed to name a speaker from the voiceprint index
+
+# Speaker Embedding Configuration
+EMBEDDING_BATCH_SIZE = 64  # windows per encode_batch call
+EMBEDDING_WORKERS = 0      # 0 runs in-process, >0 spreads batches over pinned worker processes
+
+# Pipeline Parallelism
+# Diarization (torch) and transcription (CTranslate2) run concurrently; split the
+# available cores between them so the two branches don't oversubscribe the CPU.
+PARALLEL_PIPELINE = True
+PIPELINE_CPU_THREADS = os.cpu_count() or 4
+WHISPER_THREAD_SHARE = 0.5  # fraction of PIPELINE_CPU_THREADS given to Whisper
+
+# Batched Transcription
+# With a batch size > 0, speech regions found by VAD are padded into batches and
+# decoded together (faster-whisper BatchedInferencePipeline); 0 decodes one
+# 30-second window at a time
+WHISPER_BATCH_SIZE = 8
+WHISPER_NUM_WORKERS = 1  # concurrent transcribe() calls a loaded model can serve
+
+# Sharded Transcription
+# Long recordings are split at silences into similar-sized shards transcribed by a
+# pool of processes, each holding its own Whisper model
+SHARDED_TRANSCRIPTION = True
+SHARD_MIN_SECONDS = 600      # a recording gets one shard per this many seconds
+SHARD_WORKERS = 0            # 0 sizes the pool from the Whisper thread budget
+SHARD_THREADS_PER_WORKER = 2 # used when sizing the pool automatically
+SHARD_OVERLAP = 1.0          # seconds of context decoded on either side of a cut
+SHARD_SILENCE_SEARCH = 10.0  # seconds around each even split searched for silence
+
+# Performance Profiles
+# Each profile sets the transcription and diarization parameters together and can
+# be chosen per upload/job; keys left out fall back to the settings above.
+PERFORMANCE_PROFILES = {
+    'fast': {
+        'whisper_model': 'small',
+        'compute_type': 'int8',
+        'beam_size': 1,
+        'vad_filter': True,
+        'batch_size': 16,
+        'segment_length': 4,
+        'speaker_count_method': 'threshold',
+        'max_centroids': 128
+    },
+    'balanced': {
+        'whisper_model': WHISPER_MODEL,
+        'compute_type': COMPUTE_TYPE,
+        'beam_size': 5,
+        'vad_filter': False,
+        'batch_size': WHISPER_BATCH_SIZE,
+        'segment_length': SEGMENT_LENGTH
+    },
+    'accurate': {
+        'whisper_model': 'large-v3',
+        'compute_type': 'int8',
+        'beam_size': 5,
+        'vad_filter': True,
+        'batch_size': 0,
+        'segment_length': 2,
+        'speaker_count_method': 'eigengap',
+        'max_centroids': 512
+    }
+}
+DEFAULT_PROFILE = 'balanced'
+
+# Process Role
+# all:    web server plus background job workers (default)
+# web:    browse/search/export/tag endpoints only; never imports the ML stack,
+#         queued uploads are processed by a separate worker process
+# worker: job workers only (python -m src.core.jobs)
+PROCESS_ROLE = os.environ.get('MEETING_RECORDER_ROLE', 'all')
+WARM_UP_MODELS = os.environ.get('WARM_UP_MODELS', '0') == '1'  # load models when a worker starts
+
+# Background Job Configuration
+JOB_WORKERS = 1          # worker processes draining the upload queue (each loads its own models)
+JOB_POLL_INTERVAL = 1.0  # seconds between queue polls when idle
+JOB_HEARTBEAT_INTERVAL = 15  # seconds between a worker's "still running" updates on its job
+JOB_STALE_AFTER = 120        # a running job without a heartbeat for this long is requeued
+
+# Shared Inference Server (python -m src.core.inference)
+# Socket path or loopback host:port; when set, workers send audio to one process that
+# holds the models instead of loading their own copy
+INFERENCE_SERVER_ADDRESS = os.environ.get('INFERENCE_SERVER_ADDRESS', '')
+# Shared secret for the server's connections (which carry pickles); required, no default
+INFERENCE_AUTHKEY = os.environ.get('INFERENCE_AUTHKEY', '').encode()
+INFERENCE_BATCH_WINDOW = 0.05  # seconds to wait for concurrent requests to batch together
+INFERENCE_MAX_BATCHES = 2     # batches processed at once; later requests batch up while all are busy
 
 # LLM Configuration
-LLM_API_URL = "http://localhost:11434/api/generate"
-LLM_MODEL = "llama3:latest"
+LLM_API_URL = os.environ.get('LLM_API_URL', "http://localhost:11434/api/generate")
+LLM_MODEL = os.environ.get('LLM_MODEL', "llama3:latest")
 LLM_TIMEOUT = 30  # seconds
+LLM_KEEP_ALIVE = "30m"     # how long Ollama keeps the model loaded after the last request
+LLM_RETRIES = 2            # extra attempts after a connection error, timeout or 429/5xx response
+LLM_RETRY_BACKOFF = 1.0    # seconds before the first retry, doubled after each attempt
+LLM_POOL_SIZE = 4          # pooled HTTP connections per process (at least SUMMARY_MAP_WORKERS)
+LLM_WARM_UP_IDLE = 600     # seconds without a request after which a new job reloads the model (below LLM_KEEP_ALIVE)
+# Ollama instances summaries are spread over (comma separated generate URLs); requests go to the
+# least-loaded healthy backend. Entries may also be (url, concurrency) tuples.
+LLM_BACKENDS = [url.strip() for url in os.environ.get('LLM_BACKENDS', LLM_API_URL).split(',') if url.strip()]
+LLM_BACKEND_CONCURRENCY = 2     # concurrent requests per backend from each process
+LLM_HEALTH_CHECK_INTERVAL = 15  # seconds between backend health checks
+LLM_TIMEOUT_PER_1K_TOKENS = 15  # extra seconds of timeout per 1000 prompt tokens
+
+# Long transcripts are summarized in chunks (map) whose summaries are then combined (reduce)
+SUMMARY_CHUNK_TOKENS = 3000  # transcript tokens per chunk; shorter transcripts use a single prompt
+SUMMARY_MAP_WORKERS = 3      # concurrent chunk requests (match OLLAMA_NUM_PARALLEL)
+SUMMARY_CHUNK_RETRIES = 2    # extra attempts for a failed chunk request
+SUMMARY_REDUCE_MAX_ROUNDS = 8  # give up when the partial summaries still don't fit after this many reduce rounds
+SUMMARY_FLUSH_INTERVAL = 0.25  # seconds between writes of a streaming summary to the database
+SUMMARY_STREAM_IDLE_TIMEOUT = 300  # close a summary event stream after this many seconds without progress
+SUMMARY_CACHE_MAX_ENTRIES = 2000   # cached summaries kept in the database (least recently used are evicted)
+SUMMARY_JOB_ATTEMPTS = 4           # summary jobs are retried until this many attempts have failed
+SUMMARY_RETRY_DELAY = 30           # seconds before the first retry, doubled after each attempt
+
+# Transcript compaction before summarization (fewer prompt tokens for the LLM to process)
+SUMMARY_COMPACTION = True
+SUMMARY_MIN_CONFIDENCE = -1.0      # drop segments whose Whisper avg_logprob is below this
+SUMMARY_FILLER_WORDS = ['um', 'uh', 'uhm', 'erm', 'er', 'hmm', 'mhm', 'mm']
 
 # Email Configuration
 EMAIL_CONFIG = {
@@ -95,6 +242,23 @@ Keep the summary concise and focus on the introductory nature of the discussion
 Meeting Transcript:
 {transcript}"""
 
+SUMMARY_CHUNK_PROMPT_TEMPLATE = """You are summarizing part {part} of {parts} of a long meeting transcript.
+List the topics discussed, any decisions made and any action items, naming the speakers involved.
+Be concise and only use information from this part.
+
+Transcript Part:
+{transcript}"""
+
+SUMMARY_REDUCE_PROMPT_TEMPLATE = """As an AI meeting assistant, combine these summaries of consecutive parts of one meeting into a single summary that provides:
+1. Key Topics: Main subjects that were introduced or discussed
+2. Context: Any background information or setup provided
+3. Next Steps: Suggested follow-ups based on the topics mentioned
+
+Merge repeated topics and keep the summary concise.
+
+Part Summaries:
+{summaries}"""
+
 # Error Messages
 ERROR_MESSAGES = {
     'recording_in_progress': 'A recording is already in progress',
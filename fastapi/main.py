@@ -4,6 +4,9 @@ from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
+import asyncio
+import json
+import time
 import sys
 from pathlib import Path
 
@@ -11,8 +14,12 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from src.core import MeetingRecorder
-from src.core.audio import TranscriptSegment
-from config.config import BASE_DIR, EXPORT_FORMATS, ERROR_MESSAGES
+from src.core.jobs import JobQueue
+from src.core.llm_client import AsyncOllamaClient
+from src.core.transcript import TranscriptSegment
+from src.core.ingest import audio_mime_type
+from src.core.profiles import get_profile, profile_names
+from config.config import BASE_DIR, EXPORT_FORMATS, ERROR_MESSAGES, LLM_WARM_UP_IDLE
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -46,8 +53,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize recorder
+# Initialize recorder and background job queue
 recorder = MeetingRecorder()
+job_queue = JobQueue(recorder.db)
+# Loads the summary model when work is queued, without tying up a request thread
+llm_client = AsyncOllamaClient(recorder.llm_processor.client)
+
+@app.on_event("startup")
+async def start_job_workers():
+    if recorder.role == 'all':
+        job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    job_queue.stop()
+    await llm_client.aclose()
 
 # Pydantic models
 class Meeting(BaseModel):
@@ -60,6 +80,9 @@ class Meeting(BaseModel):
     summary: Optional[str] = None
     tags: Optional[List[str]] = None
     notes: Optional[str] = None
+    original_sample_rate: Optional[int] = None
+    profile: Optional[str] = None
+    summary_status: Optional[str] = None
 
     class Config:
         arbitrary_types_allowed = True
@@ -74,6 +97,46 @@ class RecordingStatus(BaseModel):
     progress: Optional[str] = None
     meeting_id: Optional[str] = None
 
+class JobStatus(BaseModel):
+    id: str
+    status: str
+    stage: Optional[str] = None
+    progress: float
+    eta_seconds: Optional[float] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    task: str = 'process'
+    profile: Optional[str] = None
+    meeting_id: Optional[str] = None
+    error: Optional[str] = None
+
+class SummaryCacheStats(BaseModel):
+    entries: int
+    hits: int
+    misses: int
+    hit_rate: float
+    llm_seconds_saved: float
+
+class LLMBackendStats(BaseModel):
+    url: str
+    healthy: bool
+    concurrency: int
+    in_flight: int
+    queued: int
+    requests: int
+    errors: int
+    latency_seconds: Optional[float] = None
+    processes: int
+
+class ReclusterRequest(BaseModel):
+    num_speakers: Optional[int] = None
+    distance_threshold: Optional[float] = None
+
+class SpeakerConfirmation(BaseModel):
+    speaker: str
+    name: str
+
 class TagOperation(BaseModel):
     tag: str
 
@@ -85,7 +148,7 @@ class NotesUpdate(BaseModel):
 async def list_devices():
     """Get list of available input devices"""
     try:
-        devices = recorder.audio_processor.list_input_devices()
+        devices = recorder.list_input_devices()
         return [
             DeviceInfo(
                 id=str(device['id']),
@@ -138,37 +201,66 @@ async def recording_status():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/meetings/upload")
+@app.post("/api/meetings/upload", status_code=202)
 async def upload_recording(
     background_tasks: BackgroundTasks,
     audio: UploadFile = File(...),
     title: Optional[str] = None,
     duration: float = 0,
-    notes: Optional[str] = None
+    notes: Optional[str] = None,
+    profile: Optional[str] = None
 ):
-    """Handle uploaded recording"""
+    """Persist an uploaded recording and queue it for processing with a performance profile"""
     try:
-        # Read audio data
-        audio_data = await audio.read()
-        
-        # Process in background
-        meeting = await recorder.record_meeting(
-            duration=duration,
-            title=title,
-            audio_data=audio_data
-        )
-        
-        # Add notes if provided
-        if notes:
-            recorder.db.update_meeting_notes(meeting.id, notes)
-        
+        profile = get_profile(profile).name
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        job = job_queue.submit(audio.file, {
+            'title': title or '',
+            'duration': duration,
+            'notes': notes or '',
+            'tags': [],
+            'profile': profile
+        }, filename=audio.filename)
+        # The model loads while the audio is transcribed
+        background_tasks.add_task(llm_client.warm_up, LLM_WARM_UP_IDLE)
         return {
-            "message": "Recording uploaded for processing",
-            "meeting_id": meeting.id
+            "message": "Recording queued for processing",
+            "job_id": job.id
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/summary-cache/stats", response_model=SummaryCacheStats)
+async def summary_cache_stats():
+    """Summary cache size, hit rate and LLM time saved"""
+    return recorder.db.get_summary_cache_stats()
+
+@app.get("/api/llm/backends", response_model=List[LLMBackendStats])
+async def llm_backend_stats():
+    """Health, load and latency of each LLM backend, summed over the worker processes"""
+    from config.config import LLM_HEALTH_CHECK_INTERVAL
+    return recorder.db.get_llm_backend_stats(max_age=3 * LLM_HEALTH_CHECK_INTERVAL)
+
+@app.get("/api/profiles", response_model=List[str])
+async def list_profiles():
+    """Names of the configured performance profiles"""
+    return profile_names()
+
+@app.get("/api/jobs", response_model=List[JobStatus])
+async def list_jobs(status: Optional[str] = None):
+    """List recent processing jobs"""
+    return [job.to_dict() for job in job_queue.list(status)]
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Get stage, progress and ETA of a processing job"""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
 @app.get("/api/meetings", response_model=List[Meeting])
 async def list_meetings(
     tags: Optional[List[str]] = None,
@@ -194,6 +286,46 @@ async def get_meeting(meeting_id: str):
         raise HTTPException(status_code=404, detail="Meeting not found")
     return meeting
 
+@app.post("/api/meetings/{meeting_id}/summary", status_code=202)
+async def regenerate_summary(meeting_id: str, background_tasks: BackgroundTasks):
+    """Queue (re)generation of a meeting's summary"""
+    if recorder.db.get_meeting_summary(meeting_id) is None:
+        raise HTTPException(status_code=404, detail=ERROR_MESSAGES['meeting_not_found'])
+    job = recorder.queue_summary(meeting_id)
+    background_tasks.add_task(llm_client.warm_up, LLM_WARM_UP_IDLE)
+    return {"message": "Summary queued", "job_id": job.id}
+
+@app.get("/api/meetings/{meeting_id}/summary/stream")
+async def stream_summary(meeting_id: str):
+    """Server-sent events carrying the summary text until it is complete or has failed"""
+    from config.config import SUMMARY_FLUSH_INTERVAL, SUMMARY_STREAM_IDLE_TIMEOUT
+    if recorder.db.get_meeting_summary(meeting_id) is None:
+        raise HTTPException(status_code=404, detail=ERROR_MESSAGES['meeting_not_found'])
+
+    async def events():
+        sent, last_change = None, time.monotonic()
+        while True:
+            row = recorder.db.get_meeting_summary(meeting_id)
+            if row is None:
+                return
+            summary, status = row
+            payload = json.dumps({'summary': summary or '', 'status': status})
+            if status not in ('pending', 'streaming'):
+                yield f"event: done\ndata: {payload}\n\n"
+                return
+            if summary != sent:
+                yield f"data: {payload}\n\n"
+                sent, last_change = summary, time.monotonic()
+            elif time.monotonic() - last_change > SUMMARY_STREAM_IDLE_TIMEOUT:
+                return
+            await asyncio.sleep(SUMMARY_FLUSH_INTERVAL)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/meetings/{meeting_id}/audio")
 async def get_audio(meeting_id: str):
     """Stream meeting audio file"""
@@ -203,8 +335,8 @@ async def get_audio(meeting_id: str):
     
     return FileResponse(
         meeting.audio_path,
-        media_type="audio/wav",
-        filename=f"meeting_{meeting_id}.wav"
+        media_type=audio_mime_type(meeting.audio_path),
+        filename=f"meeting_{meeting_id}{Path(meeting.audio_path).suffix}"
     )
 
 @app.get("/api/meetings/{meeting_id}/export")
@@ -230,7 +362,7 @@ async def cleanup_orphaned_recordings():
         
         # Check recordings directory
         recordings_dir = BASE_DIR / "data/recordings"
-        for recording_file in recordings_dir.glob("meeting_*.wav"):
+        for recording_file in recordings_dir.glob("meeting_*.*"):
             if str(recording_file) not in valid_audio_paths:
                 try:
                     recording_file.unlink()
@@ -239,6 +371,24 @@ async def cleanup_orphaned_recordings():
     except Exception as e:
         print(f"Error during orphaned recordings cleanup: {e}")
 
+@app.post("/api/meetings/{meeting_id}/recluster", response_model=List[TranscriptSegment])
+async def recluster_meeting(meeting_id: str, params: ReclusterRequest):
+    """Re-cluster stored speaker embeddings with a new speaker count or threshold"""
+    try:
+        meeting = recorder.recluster_meeting(meeting_id, params.num_speakers, params.distance_threshold)
+    except ValueError as e:
+        raise HTTPException(status_code=404 if 'not found' in str(e) else 409, detail=str(e))
+    return meeting.transcript
+
+@app.post("/api/meetings/{meeting_id}/speakers", response_model=List[TranscriptSegment])
+async def confirm_speaker(meeting_id: str, params: SpeakerConfirmation):
+    """Name a meeting's speaker and remember their voice for future meetings"""
+    try:
+        meeting = recorder.confirm_speaker(meeting_id, params.speaker, params.name)
+    except ValueError as e:
+        raise HTTPException(status_code=404 if 'not found' in str(e) else 409, detail=str(e))
+    return meeting.transcript
+
 @app.delete("/api/meetings/{meeting_id}")
 async def delete_meeting(meeting_id: str):
     """Delete a meeting and its associated files"""
@@ -251,6 +401,8 @@ async def delete_meeting(meeting_id: str):
         audio_path = Path(meeting.audio_path)
         if audio_path.exists():
             audio_path.unlink()
+        if meeting.embeddings_path:
+            Path(meeting.embeddings_path).unlink(missing_ok=True)
         
         # Delete any exports
         export_pattern = f"meeting_*_{meeting_id[:8]}.*"
@@ -1,8 +1,5 @@
-from flask import Flask, render_template, jsonify, request, send_file, session, current_app, redirect
-import wave
-import io
+from flask import Flask, render_template, jsonify, request, send_file, session, current_app, redirect, Response, stream_with_context
 import json
-import numpy as np
 from markupsafe import Markup
 import markdown
 import socket
@@ -10,6 +7,7 @@ from pathlib import Path
 from datetime import datetime
 import os
 import threading
+import time
 import logging
 
 # Configure logging
@@ -22,6 +20,9 @@ setup_python_path()
 
 from config.config import FlaskConfig, ERROR_MESSAGES, EXPORT_FORMATS, BASE_DIR
 from src.core import MeetingRecorder
+from src.core.jobs import JobQueue
+from src.core.ingest import audio_mime_type
+from src.core.profiles import get_profile, profile_names
 
 app = Flask(__name__, 
            static_url_path='/static',
@@ -29,8 +30,9 @@ app = Flask(__name__,
            static_folder=str(BASE_DIR / 'web/static'))
 app.config.from_object(FlaskConfig)
 
-# Initialize recorder and state management
+# Initialize recorder, job queue and state management
 recorder = MeetingRecorder()
+job_queue = JobQueue(recorder.db)
 recording_state = {
     'thread': None,
     'current_meeting': None,
@@ -44,6 +46,9 @@ recording_state = {
 def utility_processor():
     return {
         'now': datetime.now(),
+        'audio_mime_type': audio_mime_type,
+        'performance_profiles': profile_names(),
+        'default_profile': get_profile().name,
         'recorder': recorder  # Make recorder instance available in templates
     }
 
@@ -60,7 +65,7 @@ def status_callback(message):
 
 @app.route('/upload_recording', methods=['POST'])
 def upload_recording():
-    """Handle uploaded recording from client"""
+    """Persist an uploaded recording and queue it for background processing"""
     try:
         if 'audio' not in request.files:
             return jsonify({'error': 'No audio file provided'}), 400
@@ -70,6 +75,10 @@ def upload_recording():
         duration = float(request.form.get('duration', 0))
         email = request.form.get('email', '')
         notes = request.form.get('notes', '')
+        try:
+            profile = get_profile(request.form.get('profile') or None).name
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Clean up strings
         email = email.strip() if email else ''
@@ -84,55 +93,56 @@ def upload_recording():
             print(f"Raw tags data: {request.form.get('tags')}")
             tags = []
         
-        # Convert audio data to format expected by core.py
-        audio_data = io.BytesIO(audio_file.read())
-        with wave.open(audio_data, 'rb') as wf:
-            audio_array = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
-            sample_rate = wf.getframerate()
-        
-        try:
-            # Process the recording
-            meeting = recorder.record_meeting(
-                duration=duration,
-                title=title,
-                audio_data=(audio_array, sample_rate)
-            )
-
-            # Add tags and notes
-            if tags:
-                for tag in tags:
-                    recorder.db.add_meeting_tag(meeting.id, tag)
-            
-            # Always update notes
-            recorder.db.update_meeting_notes(meeting.id, notes)
-        except Exception as e:
-            print(f"Error processing meeting: {e}")
-            raise
-
-        # Send email if provided and email service is available
-        if email:
-            try:
-                if recorder.email_service:
-                    recorder.send_meeting_email(meeting.id, email)
-                else:
-                    print("Email service not available. Skipping email notification.")
-            except Exception as e:
-                print(f"Error sending email: {e}")
-                # Continue even if email fails
+        job = job_queue.submit(audio_file.stream, {
+            'title': title,
+            'duration': duration,
+            'email': email,
+            'notes': notes,
+            'tags': tags,
+            'profile': profile
+        }, filename=audio_file.filename)
         
         return jsonify({
-            'message': 'Recording uploaded successfully',
-            'meeting_id': meeting.id
-        })
+            'message': 'Recording queued for processing',
+            'job_id': job.id
+        }), 202
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/jobs')
+def list_jobs():
+    """List recent processing jobs"""
+    try:
+        jobs = job_queue.list(request.args.get('status'))
+        return jsonify({'jobs': [job.to_dict() for job in jobs]})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Get stage, progress and ETA of a processing job"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/summary-cache/stats')
+def summary_cache_stats():
+    """Summary cache size, hit rate and LLM time saved"""
+    return jsonify(recorder.db.get_summary_cache_stats())
+
+@app.route('/api/llm/backends')
+def llm_backend_stats():
+    """Health, load and latency of each LLM backend, summed over the worker processes"""
+    from config.config import LLM_HEALTH_CHECK_INTERVAL
+    return jsonify(recorder.db.get_llm_backend_stats(max_age=3 * LLM_HEALTH_CHECK_INTERVAL))
+
 @app.route('/api/devices')
 def list_devices():
     """Get list of available input devices"""
     try:
-        devices = recorder.audio_processor.list_input_devices()
+        devices = recorder.list_input_devices()
         if not devices:
             return jsonify({'error': ERROR_MESSAGES['no_devices']}), 404
         return jsonify({'devices': devices})
@@ -143,6 +153,8 @@ def list_devices():
 def select_device():
     """Select input device for recording"""
     try:
+        if recorder.web_only:
+            return jsonify({'error': 'Recording is not available in web-only mode'}), 503
         device_id = request.json.get('device_id')
         if device_id is not None:
             if recorder.audio_processor.set_input_device(device_id):
@@ -168,7 +180,7 @@ def index():
         transcript_search=transcript_search if transcript_search else None
     )
     
-    devices = recorder.audio_processor.list_input_devices()
+    devices = recorder.list_input_devices()
     all_tags = recorder.db.get_all_tags()
     
     return render_template('index.html', 
@@ -226,7 +238,8 @@ def stop_recording():
         recording_state['current_meeting'] = None
         
         return jsonify({
-            'message': 'Recording stopped'
+            'message': 'Recording stopped',
+            'meeting_id': recorder.last_meeting.id if recorder.last_meeting else None
         })
     except Exception as e:
         recording_state['status'] = 'error'
@@ -239,7 +252,11 @@ def recording_status():
     return jsonify({
         'status': recording_state['status'],
         'progress': recording_state['progress'],
-        'meeting_id': recording_state['current_meeting'].id if recording_state['current_meeting'] else None
+        'meeting_id': recorder.last_meeting.id if recorder.last_meeting else None,
+        'partial_transcript': [
+            {'start_time': seg.start, 'end_time': seg.end, 'text': seg.text.strip()}
+            for seg in recorder.partial_transcript()
+        ]
     })
 
 @app.route('/meeting/<meeting_id>')
@@ -255,6 +272,44 @@ def meeting_detail(meeting_id):
                          meeting=meeting,
                          all_tags=all_tags)
 
+@app.route('/api/meetings/<meeting_id>/summary/stream')
+def stream_summary(meeting_id):
+    """Server-sent events carrying the summary text until it is complete or has failed"""
+    from config.config import SUMMARY_FLUSH_INTERVAL, SUMMARY_STREAM_IDLE_TIMEOUT
+
+    def events():
+        sent, last_change = None, time.monotonic()
+        while True:
+            row = recorder.db.get_meeting_summary(meeting_id)
+            if row is None:
+                yield f"event: done\ndata: {json.dumps({'error': ERROR_MESSAGES['meeting_not_found']})}\n\n"
+                return
+            summary, status = row
+            payload = json.dumps({'summary': summary or '', 'status': status})
+            if status not in ('pending', 'streaming'):
+                yield f"event: done\ndata: {payload}\n\n"
+                return
+            if summary != sent:
+                yield f"data: {payload}\n\n"
+                sent, last_change = summary, time.monotonic()
+            elif time.monotonic() - last_change > SUMMARY_STREAM_IDLE_TIMEOUT:
+                return
+            time.sleep(SUMMARY_FLUSH_INTERVAL)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/meetings/<meeting_id>/summary', methods=['POST'])
+def regenerate_summary(meeting_id):
+    """Queue (re)generation of a meeting's summary"""
+    if not recorder.db.get_meeting_summary(meeting_id):
+        return jsonify({'error': ERROR_MESSAGES['meeting_not_found']}), 404
+    job = recorder.queue_summary(meeting_id)
+    return jsonify({'message': 'Summary queued', 'job_id': job.id}), 202
+
 @app.route('/api/meetings/<meeting_id>/send_email', methods=['POST'])
 def send_meeting_email(meeting_id):
     """Send meeting details to specified email"""
@@ -301,7 +356,8 @@ def get_audio(meeting_id):
     
     return send_file(
         meeting.audio_path,
-        mimetype='audio/wav'
+        mimetype=audio_mime_type(meeting.audio_path),
+        conditional=True
     )
 
 def cleanup_orphaned_recordings():
@@ -313,7 +369,7 @@ def cleanup_orphaned_recordings():
         
         # Check recordings directory
         recordings_dir = BASE_DIR / "data/recordings"
-        for recording_file in recordings_dir.glob("meeting_*.wav"):
+        for recording_file in recordings_dir.glob("meeting_*.*"):
             if str(recording_file) not in valid_audio_paths:
                 try:
                     recording_file.unlink()
@@ -322,6 +378,44 @@ def cleanup_orphaned_recordings():
     except Exception as e:
         print(f"Error during orphaned recordings cleanup: {e}")
 
+@app.route('/api/meetings/<meeting_id>/recluster', methods=['POST'])
+def recluster_meeting(meeting_id):
+    """Re-cluster stored speaker embeddings with a new speaker count or threshold"""
+    data = request.get_json(silent=True) or {}
+    try:
+        num_speakers = int(data['num_speakers']) if data.get('num_speakers') else None
+        threshold = float(data['distance_threshold']) if data.get('distance_threshold') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid num_speakers or distance_threshold'}), 400
+    try:
+        meeting = recorder.recluster_meeting(meeting_id, num_speakers, threshold)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404 if 'not found' in str(e) else 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return jsonify({
+        'message': 'Speakers re-clustered',
+        'transcript': [seg.__dict__ for seg in meeting.transcript]
+    })
+
+@app.route('/api/meetings/<meeting_id>/speakers', methods=['POST'])
+def confirm_speaker(meeting_id):
+    """Name a meeting's speaker and remember their voice for future meetings"""
+    data = request.get_json(silent=True) or {}
+    speaker, name = data.get('speaker'), data.get('name')
+    if not speaker or not name:
+        return jsonify({'error': 'speaker and name are required'}), 400
+    try:
+        meeting = recorder.confirm_speaker(meeting_id, speaker, name)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404 if 'not found' in str(e) else 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return jsonify({
+        'message': f'{speaker} saved as {name}',
+        'transcript': [seg.__dict__ for seg in meeting.transcript]
+    })
+
 @app.route('/delete/<meeting_id>', methods=['POST'])
 def delete_meeting(meeting_id):
     """Delete a meeting and its associated files"""
@@ -334,6 +428,8 @@ def delete_meeting(meeting_id):
         audio_path = Path(meeting.audio_path)
         if audio_path.exists():
             audio_path.unlink()
+        if meeting.embeddings_path:
+            Path(meeting.embeddings_path).unlink(missing_ok=True)
         
         # Delete any exports
         export_pattern = f"meeting_*_{meeting.id[:8]}.*"
@@ -427,6 +523,8 @@ def get_ip():
     return ip
 
 if __name__ == '__main__':
+    if recorder.role == 'all':
+        job_queue.start()
     try:
         # Check if certificate files exist
         cert_path = BASE_DIR / "config/ssl/cert.pem"
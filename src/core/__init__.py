@@ -1,4 +1,4 @@
-from .audio import AudioProcessor, TranscriptSegment
+from .transcript import TranscriptSegment
 from .db import DatabaseManager, Meeting
 from .llm import LLMProcessor
 from .recorder import MeetingRecorder
@@ -11,3 +11,11 @@ __all__ = [
     'LLMProcessor',
     'MeetingRecorder'
 ]
+
+def __getattr__(name):
+    # AudioProcessor pulls in torch, speechbrain, sklearn and faster_whisper;
+    # only import it when somebody actually asks for it.
+    if name == 'AudioProcessor':
+        from .audio import AudioProcessor
+        return AudioProcessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
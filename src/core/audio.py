@@ -2,10 +2,8 @@ import sounddevice as sd
 import time
 from datetime import datetime
 import numpy as np
-import wave
 from pathlib import Path
 import torch
-import torchaudio
 import logging
 import warnings
 # Configure logging
@@ -13,29 +11,32 @@ logging.getLogger('speechbrain').setLevel(logging.WARNING)
 warnings.filterwarnings('ignore', category=UserWarning, module='speechbrain')
 warnings.filterwarnings('ignore', category=FutureWarning, module='speechbrain')
 
-from speechbrain.pretrained import EncoderClassifier
-from sklearn.cluster import AgglomerativeClustering
-from faster_whisper import WhisperModel
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
-
-@dataclass
-class TranscriptSegment:
-    speaker: str
-    text: str
-    start_time: float
-    end_time: float
-    confidence: float
+from faster_whisper import WhisperModel, BatchedInferencePipeline
+from typing import List, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from .transcript import TranscriptSegment, clip_segments
+from .cache import StageCache
+from .audio_buffer import AudioBuffer
+from .capture import StreamingCapture
+from .live import LiveTranscriber
+from .sharding import ShardedTranscriber, shard_count
+from .profiles import PerformanceProfile, get_profile
+from .diarization import (
+    load_speaker_model, extract_embeddings, extract_embeddings_many, EmbeddingWorkerPool
+)
+from .speakers import SpeakerTimeline, assign_speakers, window_bounds, windows_to_array
 
 class AudioProcessor:
     def __init__(self, sample_rate=44100, input_device=None):
         self.sample_rate = sample_rate
         self.input_device = input_device
-        self.spk_model = EncoderClassifier.from_hparams(
-            source="speechbrain/spkrec-ecapa-voxceleb",
-            savedir="models/pretrained/spkrec-ecapa"
-        )
-        self.frames = []
+        self._spk_model = None
+        self._whisper_models = {}
+        self._batched_pipelines = {}
+        self._model_lock = threading.Lock()
+        self.capture = None
+        self.live = None
         self.stream = None
         self.__post_init__()
 
@@ -70,19 +71,130 @@ class AudioProcessor:
 
     def __post_init__(self):
         """Initialize after constructor"""
-        self.whisper = WhisperModel("medium", device="cpu", compute_type="int8")
         from utils import setup_python_path
         setup_python_path()
-        from config.config import BASE_DIR
+        from config.config import PARALLEL_PIPELINE, PIPELINE_CPU_THREADS, WHISPER_THREAD_SHARE
+        self.parallel_pipeline = PARALLEL_PIPELINE
+        if PARALLEL_PIPELINE:
+            self.whisper_threads = max(1, int(PIPELINE_CPU_THREADS * WHISPER_THREAD_SHARE))
+            self.torch_threads = max(1, PIPELINE_CPU_THREADS - self.whisper_threads)
+        else:
+            self.whisper_threads = self.torch_threads = PIPELINE_CPU_THREADS
+        torch.set_num_threads(self.torch_threads)
+        from config.config import WHISPER_NUM_WORKERS
+        self.whisper_workers = WHISPER_NUM_WORKERS
+        from config.config import (
+            SHARDED_TRANSCRIPTION, SHARD_MIN_SECONDS, SHARD_WORKERS, SHARD_THREADS_PER_WORKER,
+            SHARD_OVERLAP, SHARD_SILENCE_SEARCH
+        )
+        self.sharded_transcription = SHARDED_TRANSCRIPTION
+        self.shard_min_seconds = SHARD_MIN_SECONDS
+        self.shard_workers = SHARD_WORKERS or max(1, self.whisper_threads // SHARD_THREADS_PER_WORKER)
+        self.shard_overlap = SHARD_OVERLAP
+        self.shard_silence_search = SHARD_SILENCE_SEARCH
+        self._shard_pool = None
+        from config.config import BASE_DIR, EMBEDDING_BATCH_SIZE, EMBEDDING_WORKERS
         self.audio_dir = BASE_DIR / "data/recordings"
         self.audio_dir.mkdir(exist_ok=True)
-        
+        self.embedding_batch_size = EMBEDDING_BATCH_SIZE
+        self.embedding_workers = EMBEDDING_WORKERS
+        self._embedding_pool = None
+        # Live recordings and jobs without an explicit profile use DEFAULT_PROFILE
+        self.default_profile = get_profile()
+
+    @property
+    def spk_model(self):
+        """ECAPA speaker encoder, loaded on first use"""
+        if self._spk_model is None:
+            with self._model_lock:
+                if self._spk_model is None:
+                    self._spk_model = load_speaker_model()
+        return self._spk_model
+
+    def whisper_model(self, profile: PerformanceProfile) -> WhisperModel:
+        """Whisper model for a profile, loaded on first use and shared by profiles that match"""
+        key = (profile.whisper_model, profile.compute_type)
+        if key not in self._whisper_models:
+            with self._model_lock:
+                if key not in self._whisper_models:
+                    self._whisper_models[key] = WhisperModel(
+                        profile.whisper_model,
+                        device="cpu",
+                        compute_type=profile.compute_type,
+                        cpu_threads=self.whisper_threads,
+                        num_workers=self.whisper_workers
+                    )
+        return self._whisper_models[key]
+
+    def batched_pipeline(self, profile: PerformanceProfile) -> BatchedInferencePipeline:
+        """Batched VAD-chunk pipeline wrapping the profile's Whisper model"""
+        key = (profile.whisper_model, profile.compute_type)
+        if key not in self._batched_pipelines:
+            model = self.whisper_model(profile)
+            with self._model_lock:
+                if key not in self._batched_pipelines:
+                    self._batched_pipelines[key] = BatchedInferencePipeline(model=model)
+        return self._batched_pipelines[key]
 
-    def start_recording(self) -> bool:
-        """Start recording audio"""
+    @property
+    def whisper(self) -> WhisperModel:
+        """Whisper model of the default profile"""
+        return self.whisper_model(self.default_profile)
+
+    def warm_up(self):
+        """Load both models ahead of the first job"""
+        self.spk_model
+        self.whisper
+
+    def _get_embedding_pool(self) -> Optional[EmbeddingWorkerPool]:
+        """Lazily start the embedding worker pool when configured"""
+        if self.embedding_workers <= 0:
+            return None
+        if self._embedding_pool is None:
+            self._embedding_pool = EmbeddingWorkerPool(self.embedding_workers)
+        return self._embedding_pool
+
+    def _get_shard_pool(self) -> ShardedTranscriber:
+        """Lazily start the transcription shard pool, splitting the Whisper thread budget"""
+        if self._shard_pool is None:
+            self._shard_pool = ShardedTranscriber(
+                self.shard_workers,
+                threads_per_worker=max(1, self.whisper_threads // self.shard_workers)
+            )
+        return self._shard_pool
+
+    def start_recording(self, live: bool = False) -> bool:
+        """Start recording audio, streaming it to disk as it arrives.
+
+        With ``live`` set, closed chunks are transcribed while recording continues.
+        """
         try:
+            from config.config import (
+                CAPTURE_FORMAT, CAPTURE_RING_SECONDS, CAPTURE_CHECKPOINT_INTERVAL,
+                LIVE_CHUNK_SECONDS, LIVE_CHUNK_OVERLAP, LIVE_SILENCE_SEARCH
+            )
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.capture = StreamingCapture(
+                self.audio_dir / f"capture_{timestamp}.{CAPTURE_FORMAT}",
+                sample_rate=self.sample_rate,
+                channels=1,
+                ring_seconds=CAPTURE_RING_SECONDS,
+                checkpoint_interval=CAPTURE_CHECKPOINT_INTERVAL,
+                file_format=CAPTURE_FORMAT
+            )
+            self.live = None
+            if live:
+                self.live = LiveTranscriber(
+                    self,
+                    sample_rate=self.sample_rate,
+                    profile=self.default_profile,
+                    chunk_seconds=LIVE_CHUNK_SECONDS,
+                    overlap_seconds=LIVE_CHUNK_OVERLAP,
+                    silence_search_seconds=LIVE_SILENCE_SEARCH
+                )
+                self.capture.add_listener(self.live.feed)
+
             # Create input stream with callback
-            self.frames = []
             self.stream = sd.InputStream(
                 samplerate=self.sample_rate,
                 channels=1,
@@ -94,19 +206,22 @@ class AudioProcessor:
             self.stream.start()
             return True
         except Exception as e:
-            self.frames = []
+            if self.capture:
+                Path(self.capture.close()).unlink(missing_ok=True)
+                self.capture = None
+            self.live = None
             self.stream = None
             raise RuntimeError(f"Failed to start recording: {str(e)}")
 
     def _audio_callback(self, indata, frames, time, status):
-        """Callback to collect audio data"""
+        """Callback to hand audio data to the capture ring buffer"""
         if status:
             print(f'Audio callback status: {status}')
         if len(indata) > 0:
-            self.frames.append(indata.copy())
+            self.capture.push(indata)
 
     def stop_recording(self, _) -> str:
-        """Stop recording and save audio file"""
+        """Stop recording and finalize the audio file"""
         try:
             if not self.stream:
                 raise RuntimeError("No active recording stream")
@@ -116,108 +231,234 @@ class AudioProcessor:
             self.stream.close()
             self.stream = None
 
-            # Combine all frames
-            if not self.frames:
+            # Flush remaining audio and fix up the file header
+            capture, self.capture = self.capture, None
+            filename = capture.close()
+            if not capture.frames_written:
+                Path(filename).unlink(missing_ok=True)
                 raise RuntimeError("No audio data recorded")
-            recording = np.concatenate(self.frames)
-            self.frames = []
 
-            # Generate unique filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = self.audio_dir / f"meeting_{timestamp}.wav"
-
-            # Save to WAV file
-            with wave.open(str(filename), 'wb') as wf:
-                wf.setnchannels(1)
-                wf.setsampwidth(2)
-                wf.setframerate(self.sample_rate)
-                wf.writeframes(recording.tobytes())
-
-            return str(filename)
+            return filename
         except Exception as e:
             if self.stream:
                 self.stream.stop()
                 self.stream.close()
                 self.stream = None
-            self.frames = []
+            if self.capture:
+                self.capture.close()
+                self.capture = None
+            self.live = None
             raise RuntimeError(f"Failed to stop recording: {str(e)}")
 
-    def process_audio(self, audio_path: str, callback=None) -> List[TranscriptSegment]:
-        if callback:
-            callback("Loading audio file...")
-            
-        signal, sr = torchaudio.load(audio_path)
-        if signal.shape[0] > 1:
-            signal = torch.mean(signal, dim=0, keepdim=True)
-        
-        if callback:
-            callback("Analyzing speakers...")
-            
-        # Process in segments
-        segment_length = int(sr * 3)
-        segments = []
-        embeddings = []
-        
-        total_segments = signal.shape[1] // segment_length + 1
-        for i in range(0, signal.shape[1], segment_length):
-            if callback:
-                progress = (i // segment_length) / total_segments
-                callback(f"Processing audio... {progress:.0%}")
-                
-            seg = signal[:, i:i + segment_length]
-            if seg.shape[1] < segment_length:
-                seg = torch.nn.functional.pad(seg, (0, segment_length - seg.shape[1]))
-            
-            emb = self.spk_model.encode_batch(seg)
-            embeddings.append(emb.squeeze().cpu().numpy())
-            segments.append({
-                'start': i / sr,
-                'end': min((i + segment_length) / sr, signal.shape[1] / sr)
-            })
-        
+    def finish_live_transcription(self, callback=None, cache: Optional[StageCache] = None) -> Optional[List[TranscriptSegment]]:
+        """Complete a live transcription after stop_recording; None if live mode was off"""
+        live, self.live = self.live, None
+        if live is None:
+            return None
+        whisper_segments, timeline = live.finish(callback)
+        if cache:
+            profile = live.profile
+            cache.store_segments(profile.transcription_key(), whisper_segments)
+            if live.embeddings is not None:
+                cache.store('embeddings', profile.embedding_key(), live.embeddings)
+                cache.store('windows', profile.embedding_key(), windows_to_array(live.windows))
+                cache.store('labels', profile.clustering_key(), np.asarray(timeline.labels))
         if callback:
-            callback("Identifying speakers...")
-            
-        # Cluster speakers
-        if len(embeddings) < 2:
-            labels = [0]
-        else:
-            clustering = AgglomerativeClustering(
-                n_clusters=min(len(embeddings), 3),
-                metric='cosine',
-                linkage='average'
+            callback("Assigning speakers...")
+        return assign_speakers(whisper_segments, timeline)
+
+    def _diarize(
+        self,
+        signal: torch.Tensor,
+        sr: int,
+        report=None,
+        profile: Optional[PerformanceProfile] = None,
+        cache: Optional[StageCache] = None
+    ) -> SpeakerTimeline:
+        """Embed fixed-length windows and cluster them into a speaker timeline"""
+        profile = profile or self.default_profile
+        # Process in mini-batches of fixed-length windows
+        segment_length = int(sr * profile.segment_length)
+        segments = window_bounds(signal.shape[-1], sr, segment_length)
+
+        labels = cache.load('labels', profile.clustering_key()) if cache else None
+        if labels is not None and len(labels) == len(segments):
+            if report:
+                report("done")
+            return SpeakerTimeline(segments, labels)
+
+        embeddings = cache.load('embeddings', profile.embedding_key()) if cache else None
+        if embeddings is None or len(embeddings) != len(segments):
+            embeddings, segments, rate = extract_embeddings(
+                self.spk_model,
+                signal,
+                sr,
+                segment_length,
+                batch_size=self.embedding_batch_size,
+                pool=self._get_embedding_pool(),
+                callback=report
             )
-            labels = clustering.fit_predict(embeddings)
+            print(f"Extracted {len(embeddings)} speaker embeddings ({rate:.1f} embeddings/s)")
+            if cache:
+                cache.store('embeddings', profile.embedding_key(), embeddings)
+                cache.store('windows', profile.embedding_key(), windows_to_array(segments))
         
-        for i, seg in enumerate(segments):
-            seg['speaker'] = f'Speaker_{labels[i] + 1}'
-        
-        if callback:
-            callback("Transcribing audio...")
+        if report:
+            report("Identifying speakers...")
             
-        # Transcribe
-        transcript_segments = []
-        whisper_segments, _ = self.whisper.transcribe(
-            audio_path,
-            beam_size=5,
-            word_timestamps=True
+        # Cluster speakers (count is estimated, bounded by the profile's max_speakers)
+        labels = profile.make_clusterer().fit_predict(embeddings)
+        if cache:
+            cache.store('labels', profile.clustering_key(), np.asarray(labels))
+        if report:
+            report("done")
+        return SpeakerTimeline(segments, labels)
+
+    def diarize_many(
+        self, buffers: List[AudioBuffer], profile: Optional[PerformanceProfile] = None
+    ) -> List[Tuple[SpeakerTimeline, np.ndarray]]:
+        """Diarize several recordings, sharing embedding batches; returns each timeline with its embeddings"""
+        profile = profile or self.default_profile
+        segment_length = int(AudioBuffer.SAMPLE_RATE * profile.segment_length)
+        clusterer = profile.make_clusterer()
+        all_embeddings = extract_embeddings_many(
+            self.spk_model,
+            [buffer.as_tensor() for buffer in buffers],
+            segment_length,
+            batch_size=self.embedding_batch_size
         )
-        
+        timelines = []
+        for buffer, embeddings in zip(buffers, all_embeddings):
+            labels = clusterer.fit_predict(embeddings)
+            segments = window_bounds(len(buffer.samples), buffer.sample_rate, segment_length)
+            timelines.append((SpeakerTimeline(segments, labels), embeddings))
+        return timelines
+
+    def transcription_path(self, duration: float, profile: PerformanceProfile) -> str:
+        """How ``_transcribe`` decodes a recording: 'sharded', 'batched' or 'sequential'"""
+        if self.sharded_transcription and shard_count(duration, self.shard_workers, self.shard_min_seconds) > 1:
+            return 'sharded'
+        return 'batched' if profile.batch_size > 0 else 'sequential'
+
+    def _transcribe(self, audio: AudioBuffer, report=None, profile: Optional[PerformanceProfile] = None) -> list:
+        """Run Whisper to completion, reporting progress against the audio duration"""
+        profile = profile or self.default_profile
+        path = self.transcription_path(audio.duration, profile)
+        if path == 'sharded':
+            n_shards = shard_count(audio.duration, self.shard_workers, self.shard_min_seconds)
+            results = self._get_shard_pool().transcribe(
+                audio,
+                profile,
+                n_shards,
+                overlap_seconds=self.shard_overlap,
+                search_seconds=self.shard_silence_search,
+                report=report
+            )
+            if report:
+                report("done")
+            return results
+        if path == 'batched':
+            # Speech regions (or fixed clips without VAD) are decoded batch_size at
+            # a time; the pipeline returns timestamps in absolute recording time
+            whisper_segments, info = self.batched_pipeline(profile).transcribe(
+                audio.samples,
+                batch_size=profile.batch_size,
+                beam_size=profile.beam_size,
+                word_timestamps=True,
+                **profile.batched_options(len(audio.samples))
+            )
+        else:
+            whisper_segments, info = self.whisper_model(profile).transcribe(
+                audio.samples,
+                beam_size=profile.beam_size,
+                vad_filter=profile.vad_filter,
+                word_timestamps=True
+            )
+        results = []
         for segment in whisper_segments:
-            speaker = "Unknown"
-            segment_mid_time = (segment.start + segment.end) / 2
-            
-            for spk_seg in segments:
-                if spk_seg['start'] <= segment_mid_time <= spk_seg['end']:
-                    speaker = spk_seg['speaker']
-                    break
-            
-            transcript_segments.append(TranscriptSegment(
-                speaker=speaker,
-                text=segment.text.strip(),
-                start_time=segment.start,
-                end_time=segment.end,
-                confidence=segment.avg_logprob
-            ))
+            results.append(segment)
+            if report and info.duration:
+                report(f"{min(segment.end / info.duration, 1.0):.0%}")
+        if report:
+            report("done")
+        return results
+
+    def _transcribe_cached(
+        self,
+        audio: AudioBuffer,
+        report=None,
+        profile: Optional[PerformanceProfile] = None,
+        cache: Optional[StageCache] = None
+    ) -> list:
+        """Whisper segments from the stage cache, or transcribe and cache them"""
+        if cache is None:
+            return self._transcribe(audio, report, profile)
+        profile = profile or self.default_profile
+        segments = cache.load_segments(profile.transcription_key())
+        if segments is not None:
+            if report:
+                report("done")
+            return segments
+        segments = clip_segments(self._transcribe(audio, report, profile), 0.0, float('-inf'), float('inf'))
+        cache.store_segments(profile.transcription_key(), segments)
+        return segments
+
+    def process_audio(
+        self,
+        audio: Union[str, AudioBuffer],
+        callback=None,
+        profile: Union[str, PerformanceProfile, None] = None,
+        cache: Optional[StageCache] = None
+    ) -> List[TranscriptSegment]:
+        """Diarize and transcribe a recording.
+
+        ``audio`` may be a file path or an already decoded AudioBuffer; either way
+        the samples are decoded once and shared by the ECAPA encoder and Whisper.
+        ``profile`` is a performance profile or its name (default profile if None).
+        With a ``cache``, stage outputs computed earlier for the same audio and
+        stage configuration are reused instead of recomputed.
+        """
+        if not isinstance(profile, PerformanceProfile):
+            profile = get_profile(profile)
+        if not isinstance(audio, AudioBuffer):
+            if callback:
+                callback("Loading audio file...")
+            with AudioBuffer.from_file(audio) as buffer:
+                return self.process_audio(buffer, callback, profile, cache)
+
+        signal, sr = audio.as_tensor(), audio.sample_rate
         
-        return transcript_segments
+        if not self.parallel_pipeline:
+            if callback:
+                callback("Analyzing speakers...")
+            timeline = self._diarize(signal, sr, callback, profile, cache)
+            if callback:
+                callback("Transcribing audio...")
+            return assign_speakers(self._transcribe_cached(audio, profile=profile, cache=cache), timeline)
+
+        # Diarization and transcription only meet at speaker assignment, so run both
+        # branches side by side; torch and CTranslate2 release the GIL while computing.
+        progress = {'speakers': 'starting', 'transcription': 'starting'}
+        lock = threading.Lock()
+
+        def reporter(branch):
+            def report(message):
+                if not callback:
+                    return
+                with lock:
+                    progress[branch] = message.replace("Processing audio... ", "")
+                    callback(
+                        f"Analyzing speakers: {progress['speakers']} | "
+                        f"Transcribing: {progress['transcription']}"
+                    )
+            return report
+
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="pipeline") as executor:
+            diarization = executor.submit(self._diarize, signal, sr, reporter('speakers'), profile, cache)
+            transcription = executor.submit(self._transcribe_cached, audio, reporter('transcription'), profile, cache)
+            timeline = diarization.result()
+            whisper_segments = transcription.result()
+
+        if callback:
+            callback("Assigning speakers...")
+        return assign_speakers(whisper_segments, timeline)
@@ -0,0 +1,161 @@
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+
+class AudioBuffer:
+    """Decoded 16 kHz mono float32 audio shared by every pipeline stage.
+
+    The source is decoded exactly once. Recordings longer than
+    ``AUDIO_MMAP_THRESHOLD`` seconds are written to a scratch file and memory-mapped
+    so the ECAPA encoder and faster-whisper read the same pages instead of
+    each holding a private copy.
+    """
+
+    SAMPLE_RATE = 16000
+    BLOCK_SIZE = 16000 * 60  # one minute of audio per decode block
+    # Input samples read on each side of a block being resampled; far wider than the
+    # resampling filter, so block by block output matches resampling the whole signal
+    RESAMPLE_CONTEXT = 16000
+
+    def __init__(self, samples: np.ndarray, scratch_path: Optional[Path] = None):
+        self.samples = samples
+        self._scratch_path = scratch_path
+        # Stored file holding the same audio, when there is one (lets other processes decode it themselves)
+        self.source_path: Optional[str] = None
+
+    @property
+    def sample_rate(self) -> int:
+        return self.SAMPLE_RATE
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.SAMPLE_RATE
+
+    @property
+    def is_memory_mapped(self) -> bool:
+        return isinstance(self.samples, np.memmap)
+
+    def as_tensor(self):
+        """[1, N] tensor view over the samples (no copy)"""
+        import torch
+        return torch.from_numpy(self.samples).unsqueeze(0)
+
+    @staticmethod
+    def _settings():
+        from config.config import AUDIO_CACHE_DIR, AUDIO_MMAP_THRESHOLD
+        return AUDIO_CACHE_DIR, AUDIO_MMAP_THRESHOLD
+
+    @classmethod
+    def _allocate(cls, num_samples: int) -> "AudioBuffer":
+        """Allocate an in-memory or memory-mapped destination for decoded samples"""
+        cache_dir, threshold = cls._settings()
+        if num_samples / cls.SAMPLE_RATE < threshold:
+            return cls(np.empty(num_samples, dtype=np.float32))
+
+        cache_dir.mkdir(exist_ok=True, parents=True)
+        fd, name = tempfile.mkstemp(suffix=".f32", dir=cache_dir)
+        os.close(fd)
+        samples = np.memmap(name, dtype=np.float32, mode='w+', shape=(max(num_samples, 1),))
+        return cls(samples[:num_samples], scratch_path=Path(name))
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "AudioBuffer":
+        """Decode an audio file to 16 kHz mono float32"""
+        import soundfile as sf
+
+        info = sf.info(str(path))
+        if info.samplerate == cls.SAMPLE_RATE:
+            # Already at the model rate: stream blocks straight into the destination
+            buffer = cls._allocate(info.frames)
+            pos = 0
+            for block in sf.blocks(str(path), blocksize=cls.BLOCK_SIZE, dtype='float32', always_2d=True):
+                mono = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+                buffer.samples[pos:pos + len(mono)] = mono
+                pos += len(mono)
+            buffer._flush()
+            buffer.source_path = str(path)
+            return buffer
+
+        with sf.SoundFile(str(path)) as f:
+            def read(start, stop):
+                f.seek(start)
+                block = f.read(stop - start, dtype='float32', always_2d=True)
+                return block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0]
+            buffer = cls._resample_blocks(read, info.frames, info.samplerate)
+        buffer.source_path = str(path)
+        return buffer
+
+    @classmethod
+    def from_array(cls, audio_array: np.ndarray, sample_rate: int) -> "AudioBuffer":
+        """Build a buffer from raw samples (int16 PCM or float), resampling if needed"""
+        audio = np.asarray(audio_array)
+        scale = np.float32(1.0 / 32768.0 if audio.dtype == np.int16 else 1.0)
+
+        # Convert (and downmix) block by block so large inputs never exist twice, or as float64
+        def read(start, stop):
+            block = audio[start:stop].astype(np.float32)
+            if block.ndim > 1:
+                block = block.mean(axis=1, dtype=np.float32)
+            return block * scale
+
+        if sample_rate != cls.SAMPLE_RATE:
+            return cls._resample_blocks(read, len(audio), sample_rate)
+
+        buffer = cls._allocate(len(audio))
+        for pos in range(0, len(audio), cls.BLOCK_SIZE):
+            block = read(pos, pos + cls.BLOCK_SIZE)
+            buffer.samples[pos:pos + len(block)] = block
+        buffer._flush()
+        return buffer
+
+    @classmethod
+    def _resample_blocks(
+        cls, read: Callable[[int, int], np.ndarray], frames: int, sample_rate: int
+    ) -> "AudioBuffer":
+        """Resample to 16 kHz one block at a time; ``read(start, stop)`` returns mono float32 samples.
+
+        Blocks start on multiples of the reduced input rate so each maps onto a
+        whole number of output samples, and are resampled together with
+        ``RESAMPLE_CONTEXT`` samples of their neighbours, which are then trimmed off.
+        """
+        import torch
+        import torchaudio
+
+        g = math.gcd(sample_rate, cls.SAMPLE_RATE)
+        orig, new = sample_rate // g, cls.SAMPLE_RATE // g
+        step = max(1, cls.BLOCK_SIZE // orig) * orig
+        context = max(1, cls.RESAMPLE_CONTEXT // orig) * orig
+
+        buffer = cls._allocate(math.ceil(frames * new / orig))
+        for start in range(0, frames, step):
+            stop = min(start + step, frames)
+            lo, hi = max(0, start - context), min(frames, stop + context)
+            resampled = torchaudio.functional.resample(torch.from_numpy(read(lo, hi)), orig, new).numpy()
+            first, last = start * new // orig, math.ceil(stop * new / orig)
+            offset = (start - lo) * new // orig
+            buffer.samples[first:last] = resampled[offset:offset + last - first]
+        buffer._flush()
+        return buffer
+
+    def _flush(self):
+        if self.is_memory_mapped:
+            self.samples.flush()
+
+    def close(self):
+        """Release the mapping and remove any scratch file"""
+        if self._scratch_path is not None:
+            # Unlinking is safe while views are still mapped; pages go away with the last reference
+            self.samples = np.empty(0, dtype=np.float32)
+            self._scratch_path.unlink(missing_ok=True)
+            self._scratch_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
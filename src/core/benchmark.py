@@ -0,0 +1,81 @@
+"""Real-time factor of sequential vs batched transcription.
+
+    python -m src.core.benchmark recordings/*.flac --profile balanced --batch-size 8
+
+RTF is processing time divided by audio duration (lower is faster). Sharded
+transcription is turned off so both runs decode the whole recording in one
+process; the path each run took is printed next to its RTF.
+"""
+import argparse
+import time
+from dataclasses import replace
+
+
+def measure(processor, audio, profile) -> tuple:
+    """Seconds taken to transcribe ``audio`` with ``profile``, the words produced and the path taken"""
+    path = processor.transcription_path(audio.duration, profile)
+    start = time.perf_counter()
+    segments = processor._transcribe(audio, profile=profile)
+    elapsed = time.perf_counter() - start
+    words = sum(len(segment.text.split()) for segment in segments)
+    return elapsed, words, path
+
+
+def main():
+    from utils import setup_python_path
+    setup_python_path()
+    from config.config import WHISPER_BATCH_SIZE
+    from .audio import AudioProcessor
+    from .audio_buffer import AudioBuffer
+    from .profiles import get_profile
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='+', help="recordings to transcribe")
+    parser.add_argument('--profile', default=None, help="performance profile (default: DEFAULT_PROFILE)")
+    parser.add_argument('--batch-size', type=int, default=None, help="batch size for the batched run")
+    args = parser.parse_args()
+
+    profile = get_profile(args.profile)
+    batch_size = args.batch_size or profile.batch_size or WHISPER_BATCH_SIZE
+    modes = [
+        ('sequential', replace(profile, batch_size=0)),
+        (f'batched({batch_size})', replace(profile, batch_size=batch_size))
+    ]
+
+    processor = AudioProcessor()
+    # Long recordings would otherwise go through the shard pool in both modes
+    processor.sharded_transcription = False
+    print(f"Loading {profile.whisper_model} ({profile.compute_type})...")
+    for _, mode_profile in modes:
+        # Load models outside the timed runs
+        processor.whisper_model(mode_profile)
+
+    totals = {name: 0.0 for name, _ in modes}
+    total_duration = 0.0
+    print(f"{'file':40} {'duration':>9} " + " ".join(f"{name:>14}" for name, _ in modes) + f" {'speedup':>8}")
+    for path in args.files:
+        with AudioBuffer.from_file(path) as audio:
+            results = [measure(processor, audio, mode_profile) for _, mode_profile in modes]
+            total_duration += audio.duration
+            for (name, _), (elapsed, _, _) in zip(modes, results):
+                totals[name] += elapsed
+            rtfs = [elapsed / audio.duration for elapsed, _, _ in results]
+            print(
+                f"{str(path)[-40:]:40} {audio.duration:8.1f}s "
+                + " ".join(f"{rtf:8.3f} RTF  " for rtf in rtfs)
+                + f" {rtfs[0] / rtfs[1]:7.2f}x"
+                + f"  words: {' / '.join(str(words) for _, words, _ in results)}"
+                + f"  path: {' / '.join(taken for _, _, taken in results)}"
+            )
+
+    if total_duration:
+        rtfs = [totals[name] / total_duration for name, _ in modes]
+        print(
+            f"{'total':40} {total_duration:8.1f}s "
+            + " ".join(f"{rtf:8.3f} RTF  " for rtf in rtfs)
+            + f" {rtfs[0] / rtfs[1]:7.2f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import hashlib
+import json
+from dataclasses import asdict
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from .transcript import TimedSegment, TimedWord
+
+
+def config_key(*parts) -> str:
+    """Stable short hash of the configuration a stage output depends on"""
+    blob = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+
+def segments_to_json(segments: List[TimedSegment]) -> list:
+    return [asdict(segment) for segment in segments]
+
+
+def segments_from_json(data: list) -> List[TimedSegment]:
+    return [
+        TimedSegment(**{**seg, 'words': [TimedWord(**w) for w in seg.get('words', [])]})
+        for seg in data
+    ]
+
+
+def remove_cache_files(paths: List[str]):
+    """Delete evicted stage output files"""
+    for path in paths:
+        try:
+            Path(path).unlink(missing_ok=True)
+        except OSError as e:
+            print(f"Error removing cached file {path}: {e}")
+
+
+class StageCache:
+    """Outputs of the processing stages of one recording, keyed by its content hash.
+
+    Each stage output is stored under (audio_hash, stage, config_key), where the
+    key hashes only the settings that stage depends on, so re-processing the
+    same audio recomputes just the stages whose configuration changed. Small
+    outputs are kept as JSON in the ``stage_cache`` table; arrays go to ``.npy``
+    files under ``cache_dir``. Outputs unused for ``STAGE_CACHE_MAX_AGE_DAYS`` are
+    evicted, and the least recently used ones once the cache exceeds
+    ``STAGE_CACHE_MAX_MB``.
+    """
+
+    def __init__(self, db, audio_hash: str, cache_dir: Optional[Path] = None):
+        from config.config import STAGE_CACHE_DIR, STAGE_CACHE_MAX_MB, STAGE_CACHE_MAX_AGE_DAYS
+        if cache_dir is None:
+            cache_dir = STAGE_CACHE_DIR
+        self.max_bytes = STAGE_CACHE_MAX_MB * 1024 * 1024
+        self.max_age = STAGE_CACHE_MAX_AGE_DAYS * 86400
+        self.db = db
+        self.audio_hash = audio_hash
+        self.cache_dir = Path(cache_dir) / audio_hash[:2]
+
+    def load(self, stage: str, key: str):
+        """Cached value (JSON data or numpy array), or None on a miss"""
+        entry = self.db.get_stage_output(self.audio_hash, stage, key)
+        if entry is None:
+            return None
+        if entry['path']:
+            try:
+                return np.load(entry['path'])
+            except (OSError, ValueError) as e:
+                print(f"Discarding unreadable cached {stage}: {e}")
+                return None
+        return entry['value']
+
+    def store(self, stage: str, key: str, value):
+        try:
+            if isinstance(value, np.ndarray):
+                self.cache_dir.mkdir(exist_ok=True, parents=True)
+                path = self.cache_dir / f"{self.audio_hash}_{stage}_{key}.npy"
+                np.save(path, value)
+                self.db.save_stage_output(self.audio_hash, stage, key, path=str(path), size=path.stat().st_size)
+            else:
+                self.db.save_stage_output(self.audio_hash, stage, key, value=value)
+            remove_cache_files(self.db.evict_stage_outputs(self.max_bytes, self.max_age))
+        except Exception as e:
+            # A failed cache write must never fail the job
+            print(f"Error caching {stage}: {e}")
+
+    def load_segments(self, key: str) -> Optional[List[TimedSegment]]:
+        data = self.load('transcript', key)
+        return segments_from_json(data) if data is not None else None
+
+    def store_segments(self, key: str, segments: List[TimedSegment]):
+        self.store('transcript', key, segments_to_json(segments))
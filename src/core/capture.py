@@ -0,0 +1,231 @@
+import os
+import struct
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import Callable, List, Union
+
+import numpy as np
+
+
+def repair_wav_header(path: Union[str, Path]) -> int:
+    """Rewrite the RIFF/data sizes of a 44-byte-header PCM WAV from its file length.
+
+    Used to recover a capture that was interrupted before stop; returns the
+    number of frames the repaired file contains.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    data_size = max(0, size - 44)
+    with open(path, 'r+b') as f:
+        f.seek(22)
+        channels, = struct.unpack('<H', f.read(2))
+        f.seek(34)
+        bits, = struct.unpack('<H', f.read(2))
+        frame_size = channels * bits // 8
+        data_size -= data_size % frame_size
+        f.seek(4)
+        f.write(struct.pack('<I', 36 + data_size))
+        f.seek(40)
+        f.write(struct.pack('<I', data_size))
+    return data_size // frame_size
+
+
+def recover_captures(directory: Union[str, Path], destination: Union[str, Path], min_age: float) -> List[Path]:
+    """Move captures left behind by a crash into ``destination`` as readable WAV files.
+
+    Only captures untouched for ``min_age`` seconds are taken, since a running
+    capture is appended to continuously. The move is atomic, so when several
+    processes start together each capture is recovered once. Empty captures are
+    deleted. Returns the recovered files.
+    """
+    destination = Path(destination)
+    destination.mkdir(exist_ok=True, parents=True)
+    recovered = []
+    for capture in sorted(Path(directory).glob("capture_*.*")):
+        try:
+            if time.time() - capture.stat().st_mtime < min_age:
+                continue
+            target = destination / f"recovered_{capture.name}"
+            os.replace(capture, target)
+        except FileNotFoundError:
+            # Claimed by another process
+            continue
+        try:
+            if target.suffix == '.wav':
+                frames = repair_wav_header(target)
+            else:
+                frames = _flac_to_wav(target)
+                target = target.with_suffix('.wav')
+        except Exception as e:
+            print(f"Could not recover capture {capture.name}: {e}")
+            continue
+        if not frames:
+            target.unlink(missing_ok=True)
+            continue
+        print(f"Recovered interrupted capture {capture.name} ({frames} frames)")
+        recovered.append(target)
+    return recovered
+
+
+def _flac_to_wav(path: Path) -> int:
+    """Rewrite a (possibly unfinished) FLAC capture as 16-bit WAV next to it"""
+    import soundfile as sf
+
+    frames = 0
+    with sf.SoundFile(str(path)) as src, wave.open(str(path.with_suffix('.wav')), 'wb') as dst:
+        dst.setnchannels(src.channels)
+        dst.setsampwidth(2)
+        dst.setframerate(src.samplerate)
+        for block in src.blocks(blocksize=src.samplerate * 60, dtype='int16', always_2d=True):
+            dst.writeframes(block.tobytes())
+            frames += len(block)
+    path.unlink()
+    return frames
+
+
+class StreamingCapture:
+    """Disk-backed recorder fed from the audio callback.
+
+    The callback copies samples into a preallocated ring buffer (no allocation
+    on the real-time thread). A writer thread drains the ring and appends to
+    the output file as the recording runs, and every ``checkpoint_interval``
+    seconds it makes the file on disk valid (WAV header sizes patched, or
+    FLAC frames flushed), so a crash loses at most one checkpoint interval.
+    Memory use is bounded by the ring size no matter how long the recording is.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        sample_rate: int,
+        channels: int = 1,
+        ring_seconds: float = 30,
+        checkpoint_interval: float = 10,
+        file_format: str = 'wav'
+    ):
+        if file_format not in ('wav', 'flac'):
+            raise ValueError(f"Unsupported capture format: {file_format}")
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.checkpoint_interval = checkpoint_interval
+        self.file_format = file_format
+
+        self._ring = np.zeros((int(ring_seconds * sample_rate), channels), dtype=np.int16)
+        self._write_pos = 0   # total frames pushed by the callback
+        self._read_pos = 0    # total frames drained to disk
+        self.dropped_frames = 0
+        self.frames_written = 0
+        self._listeners: List[Callable[[np.ndarray], None]] = []
+
+        self._data_ready = threading.Event()
+        self._stopping = threading.Event()
+        self._file = self._open()
+        self._writer = threading.Thread(target=self._run, name="capture-writer", daemon=True)
+        self._writer.start()
+
+    def _open(self):
+        if self.file_format == 'wav':
+            wf = wave.open(str(self.path), 'wb')
+            wf.setnchannels(self.channels)
+            wf.setsampwidth(2)
+            wf.setframerate(self.sample_rate)
+            return wf
+
+        import soundfile as sf
+        return sf.SoundFile(
+            str(self.path), 'w',
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            format='FLAC',
+            subtype='PCM_16'
+        )
+
+    def add_listener(self, listener: Callable[[np.ndarray], None]):
+        """Receive every drained block (on the writer thread), e.g. for live transcription"""
+        self._listeners.append(listener)
+
+    def push(self, indata: np.ndarray):
+        """Copy a block from the audio callback into the ring buffer"""
+        n = len(indata)
+        capacity = len(self._ring)
+        if self._write_pos - self._read_pos + n > capacity:
+            # Writer fell behind by a whole ring; drop rather than block the audio thread
+            self.dropped_frames += n
+            return
+        start = self._write_pos % capacity
+        first = min(n, capacity - start)
+        self._ring[start:start + first] = indata[:first]
+        if first < n:
+            self._ring[:n - first] = indata[first:]
+        self._write_pos += n
+        self._data_ready.set()
+
+    def _drain(self):
+        available = self._write_pos - self._read_pos
+        if available <= 0:
+            return
+        capacity = len(self._ring)
+        start = self._read_pos % capacity
+        first = min(available, capacity - start)
+        blocks = [self._ring[start:start + first]]
+        if first < available:
+            blocks.append(self._ring[:available - first])
+        for block in blocks:
+            if self.file_format == 'wav':
+                self._file.writeframesraw(block.tobytes())
+            else:
+                self._file.write(block)
+            for listener in self._listeners:
+                try:
+                    listener(block.copy())
+                except Exception as e:
+                    print(f"Capture listener error: {e}")
+        self.frames_written += available
+        self._read_pos += available
+
+    def _checkpoint(self):
+        """Make the partial recording on disk readable"""
+        if not self.frames_written:
+            return
+        if self.file_format == 'wav':
+            fh = self._file._file
+            fh.flush()
+            data_size = self.frames_written * self.channels * 2
+            pos = fh.tell()
+            fh.seek(4)
+            fh.write(struct.pack('<I', 36 + data_size))
+            fh.seek(40)
+            fh.write(struct.pack('<I', data_size))
+            fh.seek(pos)
+            fh.flush()
+            os.fsync(fh.fileno())
+        else:
+            self._file.flush()
+
+    def _run(self):
+        last_checkpoint = time.monotonic()
+        while not self._stopping.is_set():
+            self._data_ready.wait(timeout=0.5)
+            self._data_ready.clear()
+            try:
+                self._drain()
+                if time.monotonic() - last_checkpoint >= self.checkpoint_interval:
+                    self._checkpoint()
+                    last_checkpoint = time.monotonic()
+            except Exception as e:
+                print(f"Error writing capture to {self.path}: {e}")
+
+    def close(self) -> str:
+        """Drain remaining audio, fix up the header and close the file"""
+        self._stopping.set()
+        self._data_ready.set()
+        self._writer.join()
+        self._drain()
+        # wave patches the RIFF/data sizes on close; soundfile finalizes FLAC STREAMINFO
+        self._file.close()
+        if self.dropped_frames:
+            print(f"Warning: dropped {self.dropped_frames} frames while capturing {self.path.name}")
+        return str(self.path)
@@ -1,10 +1,13 @@
 import sqlite3
 import json
-from datetime import datetime
-from pathlib import Path
+import os
+import queue
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from dataclasses import dataclass
-from typing import List, Optional, Set
-from .audio import TranscriptSegment
+from typing import Callable, List, Optional, Set
+import uuid
+from .transcript import TranscriptSegment
 
 @dataclass
 class Meeting:
@@ -18,19 +21,121 @@ class Meeting:
     tags: Set[str] = None
     email_recipient: Optional[str] = None
     notes: Optional[str] = None
+    original_sample_rate: Optional[int] = None
+    profile: Optional[str] = None
+    audio_hash: Optional[str] = None
+    embeddings_path: Optional[str] = None
+    summary_status: Optional[str] = None  # pending, streaming, complete, failed (None for older meetings)
 
     def __post_init__(self):
         if self.tags is None:
             self.tags = set()
 
+@dataclass
+class Job:
+    id: str
+    status: str  # queued, running, complete, failed
+    created_at: datetime
+    audio_path: str
+    params: dict
+    stage: Optional[str] = None
+    progress: float = 0.0
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    meeting_id: Optional[str] = None
+    error: Optional[str] = None
+
+    def eta_seconds(self) -> Optional[float]:
+        """Remaining time extrapolated from elapsed time and progress"""
+        if self.status != 'running' or not self.started_at or self.progress <= 0:
+            return None
+        elapsed = (datetime.now() - self.started_at).total_seconds()
+        return max(0.0, elapsed * (1 - self.progress) / self.progress)
+
+    def to_dict(self) -> dict:
+        eta = self.eta_seconds()
+        return {
+            'id': self.id,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': round(self.progress, 3),
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'task': self.params.get('task', 'process'),
+            'profile': self.params.get('profile'),
+            'meeting_id': self.meeting_id,
+            'error': self.error
+        }
+
 class DatabaseManager:
     def __init__(self):
         from utils import setup_python_path
         setup_python_path()
-        from config.config import BASE_DIR
+        from config.config import (
+            BASE_DIR, DB_POOL_SIZE, DB_BUSY_TIMEOUT, DB_CACHE_SIZE_MB, DB_MMAP_SIZE_MB, DB_STATEMENT_CACHE_SIZE
+        )
         self.db_path = BASE_DIR / "data/db/meetings.db"
+        self.busy_timeout = DB_BUSY_TIMEOUT
+        self.cache_size_mb = DB_CACHE_SIZE_MB
+        self.mmap_size_mb = DB_MMAP_SIZE_MB
+        self.statement_cache_size = DB_STATEMENT_CACHE_SIZE
+        self._pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+        self._pool_pid = os.getpid()
         self.init_database()
 
+    def _open_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            cached_statements=self.statement_cache_size,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers run alongside a writer; NORMAL is durable in WAL mode except on power loss
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute(f"PRAGMA cache_size = -{self.cache_size_mb * 1024}")
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size_mb * 1024 * 1024}")
+        return conn
+
+    @contextmanager
+    def _connect(self):
+        """A pooled connection for one transaction, committed on success and rolled back on error.
+
+        Each connection keeps its prepared statements between uses. Connections
+        are never shared with a forked child process, which starts a pool of its own.
+        """
+        if self._pool_pid != os.getpid():
+            self._pool = queue.LifoQueue(maxsize=self._pool.maxsize)
+            self._pool_pid = os.getpid()
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._open_connection()
+        try:
+            with conn:
+                yield conn
+        finally:
+            if conn.in_transaction:
+                # Left inside an explicit transaction; closing rolls it back
+                conn.close()
+            else:
+                try:
+                    self._pool.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+
+    def close(self):
+        """Close the idle pooled connections"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
     def _check_and_migrate_schema(self, conn):
         """Check database schema and perform any necessary migrations"""
         print("Checking database schema...")
@@ -48,7 +153,12 @@ class DatabaseManager:
             'audio_path': 'TEXT',
             'transcript': 'JSON',
             'summary': 'TEXT',
-            'notes': 'TEXT'
+            'notes': 'TEXT',
+            'original_sample_rate': 'INTEGER',
+            'profile': 'TEXT',
+            'audio_hash': 'TEXT',
+            'embeddings_path': 'TEXT',
+            'summary_status': 'TEXT'
         }
         
         # Add any missing columns
@@ -61,7 +171,7 @@ class DatabaseManager:
     def init_database(self):
         """Initialize the SQLite database with required tables"""
         self.db_path.parent.mkdir(exist_ok=True)
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             # Create meetings table with minimal required columns
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS meetings (
@@ -88,12 +198,115 @@ class DatabaseManager:
                 )
             """)
             
+            # Create processing jobs table
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    progress REAL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    audio_path TEXT NOT NULL,
+                    params JSON,
+                    meeting_id TEXT,
+                    error TEXT,
+                    worker TEXT,
+                    heartbeat_at TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+            # Ownership columns added after the jobs table first shipped
+            job_columns = {col[1] for col in conn.execute("PRAGMA table_info(jobs)").fetchall()}
+            for col_name in ('worker', 'heartbeat_at'):
+                if col_name not in job_columns:
+                    print(f"Adding column {col_name} (TEXT) to jobs table...")
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {col_name} TEXT")
+            
+            # Create stage output cache (keyed by audio content hash and stage configuration)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS stage_cache (
+                    audio_hash TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    config_key TEXT NOT NULL,
+                    value JSON,
+                    path TEXT,
+                    created_at TEXT NOT NULL,
+                    size INTEGER NOT NULL DEFAULT 0,
+                    last_used_at TEXT,
+                    PRIMARY KEY (audio_hash, stage, config_key)
+                )
+            """)
+            # Eviction columns added after the stage cache first shipped
+            stage_columns = {col[1] for col in conn.execute("PRAGMA table_info(stage_cache)").fetchall()}
+            for col_name, col_type in (('size', 'INTEGER NOT NULL DEFAULT 0'), ('last_used_at', 'TEXT')):
+                if col_name not in stage_columns:
+                    print(f"Adding column {col_name} ({col_type}) to stage_cache table...")
+                    conn.execute(f"ALTER TABLE stage_cache ADD COLUMN {col_name} {col_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_stage_cache_used ON stage_cache (last_used_at)")
+
+            # LLM summaries keyed by transcript content, model and prompt version
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS summary_cache (
+                    transcript_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    generation_seconds REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    last_used_at TEXT NOT NULL,
+                    PRIMARY KEY (transcript_hash, model, prompt_version)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_summary_cache_lru ON summary_cache (last_used_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS summary_cache_stats (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    misses INTEGER NOT NULL DEFAULT 0,
+                    seconds_saved REAL NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO summary_cache_stats (id) VALUES (1)")
+
+            # Latest LLM backend load and latency reported by each process
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_backend_stats (
+                    process TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    healthy INTEGER NOT NULL,
+                    concurrency INTEGER NOT NULL,
+                    in_flight INTEGER NOT NULL,
+                    queued INTEGER NOT NULL,
+                    requests INTEGER NOT NULL,
+                    errors INTEGER NOT NULL,
+                    latency_seconds REAL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (process, url)
+                )
+            """)
+
+            # Enrolled speakers; centroids live in the voiceprint matrix at `row`
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS voiceprints (
+                    name TEXT PRIMARY KEY,
+                    row INTEGER UNIQUE NOT NULL,
+                    samples REAL NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            
             # Check and migrate schema
             self._check_and_migrate_schema(conn)
+            # Foreign keys used to be off, so deleted meetings may have left their tag links behind
+            conn.execute("DELETE FROM meeting_tags WHERE meeting_id NOT IN (SELECT id FROM meetings)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_meetings_audio_hash ON meetings (audio_hash)")
 
     def save_meeting(self, meeting: Meeting):
         """Save or update a meeting in the database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             transcript_json = json.dumps([{
                 'speaker': seg.speaker,
                 'text': seg.text,
@@ -102,11 +315,19 @@ class DatabaseManager:
                 'confidence': seg.confidence
             } for seg in meeting.transcript])
             
-            # Save meeting
+            # Save meeting (an upsert: REPLACE would delete the row and cascade to its tags)
             conn.execute("""
-                INSERT OR REPLACE INTO meetings
-                (id, title, date, duration, audio_path, transcript, summary, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO meetings
+                (id, title, date, duration, audio_path, transcript, summary, notes,
+                 original_sample_rate, profile, audio_hash, embeddings_path, summary_status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    title = excluded.title, date = excluded.date, duration = excluded.duration,
+                    audio_path = excluded.audio_path, transcript = excluded.transcript,
+                    summary = excluded.summary, notes = excluded.notes,
+                    original_sample_rate = excluded.original_sample_rate, profile = excluded.profile,
+                    audio_hash = excluded.audio_hash, embeddings_path = excluded.embeddings_path,
+                    summary_status = excluded.summary_status
             """, (
                 meeting.id,
                 meeting.title,
@@ -115,23 +336,27 @@ class DatabaseManager:
                 meeting.audio_path,
                 transcript_json,
                 meeting.summary,
-                meeting.notes
+                meeting.notes,
+                meeting.original_sample_rate,
+                meeting.profile,
+                meeting.audio_hash,
+                meeting.embeddings_path,
+                meeting.summary_status
             ))
             
             # Save tags
             if meeting.tags:
                 for tag in meeting.tags:
                     # Insert or get tag ID
-                    cursor = conn.execute(
+                    conn.execute(
                         "INSERT OR IGNORE INTO tags (name) VALUES (?)",
                         (tag,)
                     )
-                    if cursor.rowcount == 0:
-                        cursor = conn.execute(
-                            "SELECT id FROM tags WHERE name = ?",
-                            (tag,)
-                        )
-                    tag_id = cursor.lastrowid or cursor.fetchone()[0]
+                    # Looked up rather than lastrowid, which an ignored insert leaves at an unrelated row
+                    tag_id = conn.execute(
+                        "SELECT id FROM tags WHERE name = ?",
+                        (tag,)
+                    ).fetchone()[0]
                     
                     # Link tag to meeting
                     conn.execute("""
@@ -141,8 +366,7 @@ class DatabaseManager:
 
     def get_meeting(self, meeting_id: str) -> Optional[Meeting]:
         """Retrieve a meeting by its ID"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             result = conn.execute("SELECT * FROM meetings WHERE id = ?", (meeting_id,)).fetchone()
             
             if result:
@@ -176,7 +400,12 @@ class DatabaseManager:
                     transcript=transcript,
                     summary=result['summary'],
                     tags=tags,
-                    notes=result['notes']
+                    notes=result['notes'],
+                    original_sample_rate=result['original_sample_rate'],
+                    profile=result['profile'],
+                    audio_hash=result['audio_hash'],
+                    embeddings_path=result['embeddings_path'],
+                    summary_status=result['summary_status']
                 )
         return None
 
@@ -192,8 +421,7 @@ class DatabaseManager:
         - title_search: Case-insensitive partial match on title
         - transcript_search: Case-insensitive search in transcript text
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             
             # Base query
             query = "SELECT DISTINCT m.* FROM meetings m"
@@ -279,42 +507,117 @@ class DatabaseManager:
                     transcript=transcript,
                     summary=result['summary'],
                     tags=tags,
-                    notes=result['notes']
+                    notes=result['notes'],
+                    original_sample_rate=result['original_sample_rate'],
+                    profile=result['profile'],
+                    audio_hash=result['audio_hash'],
+                    embeddings_path=result['embeddings_path'],
+                    summary_status=result['summary_status']
                 ))
             return meetings
 
+    def update_meeting_transcript(self, meeting_id: str, transcript: List[TranscriptSegment]) -> bool:
+        """Replace a meeting's transcript (e.g. after re-labeling speakers)"""
+        try:
+            with self._connect() as conn:
+                conn.execute("UPDATE meetings SET transcript = ? WHERE id = ?", (
+                    json.dumps([{
+                        'speaker': seg.speaker,
+                        'text': seg.text,
+                        'start_time': seg.start_time,
+                        'end_time': seg.end_time,
+                        'confidence': seg.confidence
+                    } for seg in transcript]),
+                    meeting_id
+                ))
+                return True
+        except Exception as e:
+            print(f"Error updating transcript: {e}")
+            return False
+
+    def update_meeting_summary(self, meeting_id: str, summary: str, status: Optional[str] = None) -> bool:
+        """Store a (possibly partial) summary, optionally updating its status"""
+        try:
+            with self._connect() as conn:
+                if status is None:
+                    conn.execute("UPDATE meetings SET summary = ? WHERE id = ?", (summary, meeting_id))
+                else:
+                    conn.execute(
+                        "UPDATE meetings SET summary = ?, summary_status = ? WHERE id = ?",
+                        (summary, status, meeting_id)
+                    )
+                return True
+        except Exception as e:
+            print(f"Error updating summary: {e}")
+            return False
+
+    def update_meeting_summary_status(self, meeting_id: str, status: str) -> bool:
+        """Change a summary's status, keeping its text"""
+        try:
+            with self._connect() as conn:
+                conn.execute("UPDATE meetings SET summary_status = ? WHERE id = ?", (status, meeting_id))
+                return True
+        except Exception as e:
+            print(f"Error updating summary status: {e}")
+            return False
+
+    def get_meeting_summary(self, meeting_id: str) -> Optional[tuple]:
+        """(summary, summary_status) without loading the rest of the meeting"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT summary, summary_status FROM meetings WHERE id = ?", (meeting_id,)
+            ).fetchone()
+
+    def find_meeting_by_hash(self, audio_hash: str, profile: Optional[str] = None) -> Optional[Meeting]:
+        """Most recent meeting processed from the same audio content (and profile, if given)"""
+        with self._connect() as conn:
+            query = "SELECT id FROM meetings WHERE audio_hash = ?"
+            params = [audio_hash]
+            if profile:
+                query += " AND profile = ?"
+                params.append(profile)
+            row = conn.execute(query + " ORDER BY date DESC LIMIT 1", params).fetchone()
+        return self.get_meeting(row[0]) if row else None
+
     def delete_meeting(self, meeting_id: str) -> bool:
-        """Delete a meeting from the database"""
+        """Delete a meeting from the database, with its cached stage outputs if no other meeting shares its audio"""
+        from .cache import remove_cache_files
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
+                row = conn.execute("SELECT audio_hash FROM meetings WHERE id = ?", (meeting_id,)).fetchone()
                 # Meeting tags will be deleted automatically due to CASCADE
                 conn.execute("DELETE FROM meetings WHERE id = ?", (meeting_id,))
-                return True
+                paths = []
+                if row and row[0] and not conn.execute(
+                    "SELECT 1 FROM meetings WHERE audio_hash = ? LIMIT 1", (row[0],)
+                ).fetchone():
+                    paths = self._delete_stage_outputs(conn, "audio_hash = ?", (row[0],))
+            remove_cache_files(paths)
+            return True
         except Exception as e:
             print(f"Error deleting meeting: {e}")
             return False
 
     def get_all_tags(self) -> List[str]:
         """Get list of all tags"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute("SELECT name FROM tags ORDER BY name")
             return [row[0] for row in cursor.fetchall()]
 
     def add_meeting_tag(self, meeting_id: str, tag: str) -> bool:
         """Add a tag to a meeting"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 # Insert or get tag ID
-                cursor = conn.execute(
+                conn.execute(
                     "INSERT OR IGNORE INTO tags (name) VALUES (?)",
                     (tag,)
                 )
-                if cursor.rowcount == 0:
-                    cursor = conn.execute(
-                        "SELECT id FROM tags WHERE name = ?",
-                        (tag,)
-                    )
-                tag_id = cursor.lastrowid or cursor.fetchone()[0]
+                # Looked up rather than lastrowid, which an ignored insert leaves at an unrelated row
+                tag_id = conn.execute(
+                    "SELECT id FROM tags WHERE name = ?",
+                    (tag,)
+                ).fetchone()[0]
                 
                 # Link tag to meeting
                 conn.execute("""
@@ -329,7 +632,7 @@ class DatabaseManager:
     def remove_meeting_tag(self, meeting_id: str, tag: str) -> bool:
         """Remove a tag from a meeting and clean up unused tags"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 # Remove tag from meeting
                 conn.execute("""
                     DELETE FROM meeting_tags
@@ -355,7 +658,7 @@ class DatabaseManager:
     def update_meeting_notes(self, meeting_id: str, notes: str) -> bool:
         """Update meeting notes"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.execute("""
                     UPDATE meetings
                     SET notes = ?
@@ -365,3 +668,313 @@ class DatabaseManager:
         except Exception as e:
             print(f"Error updating notes: {e}")
             return False
+
+
+    def _row_to_job(self, row) -> Job:
+        return Job(
+            id=row['id'],
+            status=row['status'],
+            stage=row['stage'],
+            progress=row['progress'] or 0.0,
+            created_at=datetime.fromisoformat(row['created_at']),
+            started_at=datetime.fromisoformat(row['started_at']) if row['started_at'] else None,
+            finished_at=datetime.fromisoformat(row['finished_at']) if row['finished_at'] else None,
+            audio_path=row['audio_path'],
+            params=json.loads(row['params']) if row['params'] else {},
+            meeting_id=row['meeting_id'],
+            error=row['error']
+        )
+
+    def create_job(self, audio_path: str, params: dict, not_before: Optional[datetime] = None) -> Job:
+        """Queue a job (an upload to process, or a post-processing task in ``params``).
+
+        A job dated ``not_before`` is not claimed until then.
+        """
+        job = Job(
+            id=uuid.uuid4().hex,
+            status='queued',
+            created_at=not_before or datetime.now(),
+            audio_path=audio_path,
+            params=params,
+            stage='Queued'
+        )
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO jobs (id, status, stage, progress, created_at, audio_path, params)
+                VALUES (?, ?, ?, 0, ?, ?, ?)
+            """, (job.id, job.status, job.stage, job.created_at.isoformat(), audio_path, json.dumps(params)))
+        return job
+
+    def claim_next_job(self, worker: Optional[str] = None) -> Optional[Job]:
+        """Atomically move the oldest queued job to running, owned by ``worker``, and return it"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("""
+                    SELECT * FROM jobs WHERE status = 'queued' AND created_at <= ?
+                    ORDER BY created_at LIMIT 1
+                """, (datetime.now().isoformat(),)).fetchone()
+                if not row:
+                    conn.execute("COMMIT")
+                    return None
+                started = datetime.now().isoformat()
+                conn.execute("""
+                    UPDATE jobs SET status = 'running', stage = 'Starting', started_at = ?, worker = ?, heartbeat_at = ?
+                    WHERE id = ?
+                """, (started, worker, started, row['id']))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        job = self._row_to_job(row)
+        job.status = 'running'
+        job.stage = 'Starting'
+        job.started_at = datetime.fromisoformat(started)
+        return job
+
+    def update_job(self, job_id: str, **fields) -> bool:
+        """Update status/stage/progress/result columns of a job"""
+        allowed = {'status', 'stage', 'progress', 'finished_at', 'meeting_id', 'error'}
+        fields = {k: v for k, v in fields.items() if k in allowed}
+        if not fields:
+            return False
+        if isinstance(fields.get('finished_at'), datetime):
+            fields['finished_at'] = fields['finished_at'].isoformat()
+        try:
+            with self._connect() as conn:
+                assignments = ", ".join(f"{k} = ?" for k in fields)
+                conn.execute(
+                    f"UPDATE jobs SET {assignments} WHERE id = ?",
+                    (*fields.values(), job_id)
+                )
+                return True
+        except Exception as e:
+            print(f"Error updating job: {e}")
+            return False
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """Retrieve a job by its ID"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return self._row_to_job(row) if row else None
+
+    def get_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Job]:
+        """Most recent jobs, optionally filtered by status"""
+        with self._connect() as conn:
+            if status:
+                rows = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                    (status, limit)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+                ).fetchall()
+            return [self._row_to_job(row) for row in rows]
+
+    def heartbeat_job(self, job_id: str, worker: str) -> bool:
+        """Record that ``worker`` is still running the job"""
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND worker = ? AND status = 'running'
+            """, (datetime.now().isoformat(), job_id, worker))
+            return cursor.rowcount > 0
+
+    def requeue_stale_jobs(self, stale_after: float) -> int:
+        """Put running jobs whose worker stopped sending heartbeats back on the queue.
+
+        Jobs of live workers, in this process or any other, keep running.
+        """
+        cutoff = (datetime.now() - timedelta(seconds=stale_after)).isoformat()
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                UPDATE jobs SET status = 'queued', stage = 'Queued', progress = 0, started_at = NULL,
+                                worker = NULL, heartbeat_at = NULL
+                WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)
+            """, (cutoff,))
+            return cursor.rowcount
+
+    def get_stage_output(self, audio_hash: str, stage: str, config_key: str) -> Optional[dict]:
+        """Cached output of a pipeline stage: {'value': ..., 'path': ...} or None"""
+        with self._connect() as conn:
+            row = conn.execute("""
+                SELECT value, path FROM stage_cache
+                WHERE audio_hash = ? AND stage = ? AND config_key = ?
+            """, (audio_hash, stage, config_key)).fetchone()
+            if not row:
+                return None
+            conn.execute("""
+                UPDATE stage_cache SET last_used_at = ?
+                WHERE audio_hash = ? AND stage = ? AND config_key = ?
+            """, (datetime.now().isoformat(), audio_hash, stage, config_key))
+        return {'value': json.loads(row[0]) if row[0] is not None else None, 'path': row[1]}
+
+    def save_stage_output(
+        self,
+        audio_hash: str,
+        stage: str,
+        config_key: str,
+        value=None,
+        path: Optional[str] = None,
+        size: int = 0
+    ):
+        """Record the output of a pipeline stage (JSON value or path to a binary file of ``size`` bytes)"""
+        value = json.dumps(value) if value is not None else None
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO stage_cache (audio_hash, stage, config_key, value, path, created_at, size, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (audio_hash, stage, config_key, value, path, now, size + len(value or ''), now))
+
+    def _delete_stage_outputs(self, conn, where: str, params: tuple) -> List[str]:
+        """Delete matching stage cache rows, returning the files they pointed to"""
+        rows = conn.execute(f"SELECT path FROM stage_cache WHERE {where}", params).fetchall()
+        conn.execute(f"DELETE FROM stage_cache WHERE {where}", params)
+        return [row[0] for row in rows if row[0]]
+
+    def evict_stage_outputs(self, max_bytes: int, max_age: float) -> List[str]:
+        """Drop stage outputs unused for ``max_age`` seconds, then the least recently used
+        beyond ``max_bytes`` in total; returns the files to remove"""
+        cutoff = (datetime.now() - timedelta(seconds=max_age)).isoformat()
+        with self._connect() as conn:
+            paths = self._delete_stage_outputs(conn, "COALESCE(last_used_at, created_at) < ?", (cutoff,))
+            paths += self._delete_stage_outputs(conn, """rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid, SUM(size) OVER (ORDER BY COALESCE(last_used_at, created_at) DESC, rowid) AS total
+                    FROM stage_cache
+                ) WHERE total > ?
+            )""", (max_bytes,))
+        return paths
+
+    def get_voiceprints(self) -> List[dict]:
+        """Enrolled speakers ordered by their row in the voiceprint matrix"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT name, row, samples FROM voiceprints ORDER BY row").fetchall()
+        return [{'name': name, 'row': row, 'samples': samples} for name, row, samples in rows]
+
+    def enroll_voiceprint(self, name: str, weight: float, write: Callable[[int, float], None]) -> int:
+        """Fold a sample into a speaker's voiceprint under the database write lock.
+
+        The speaker keeps their row, or a new one is allocated past the highest in
+        use. ``write(row, samples)`` updates the matrix while the lock is held, so
+        concurrent enrollments from other processes never share a row.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = conn.execute(
+                    "SELECT row, samples FROM voiceprints WHERE name = ?", (name,)
+                ).fetchone()
+                if existing:
+                    row, samples = existing
+                else:
+                    row = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM voiceprints").fetchone()[0]
+                    samples = 0.0
+                write(row, samples)
+                conn.execute("""
+                    INSERT INTO voiceprints (name, row, samples, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (name) DO UPDATE SET
+                        samples = excluded.samples,
+                        updated_at = excluded.updated_at
+                """, (name, row, samples + weight, datetime.now().isoformat()))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return row
+
+    def get_cached_summary(self, transcript_hash: str, model: str, prompt_version: str) -> Optional[str]:
+        """Cached summary, counting the lookup as a hit or a miss"""
+        with self._connect() as conn:
+            row = conn.execute("""
+                SELECT summary, generation_seconds FROM summary_cache
+                WHERE transcript_hash = ? AND model = ? AND prompt_version = ?
+            """, (transcript_hash, model, prompt_version)).fetchone()
+            if row is None:
+                conn.execute("UPDATE summary_cache_stats SET misses = misses + 1 WHERE id = 1")
+                return None
+            conn.execute("""
+                UPDATE summary_cache SET hits = hits + 1, last_used_at = ?
+                WHERE transcript_hash = ? AND model = ? AND prompt_version = ?
+            """, (datetime.now().isoformat(), transcript_hash, model, prompt_version))
+            conn.execute(
+                "UPDATE summary_cache_stats SET hits = hits + 1, seconds_saved = seconds_saved + ? WHERE id = 1",
+                (row[1],)
+            )
+            return row[0]
+
+    def save_cached_summary(
+        self,
+        transcript_hash: str,
+        model: str,
+        prompt_version: str,
+        summary: str,
+        generation_seconds: float,
+        max_entries: int
+    ):
+        """Store a summary and evict the least recently used entries beyond ``max_entries``"""
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO summary_cache
+                (transcript_hash, model, prompt_version, summary, generation_seconds, hits, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, 0, ?, ?)
+            """, (transcript_hash, model, prompt_version, summary, generation_seconds, now, now))
+            conn.execute("""
+                DELETE FROM summary_cache WHERE rowid IN (
+                    SELECT rowid FROM summary_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (max_entries,))
+
+    def save_llm_backend_stats(self, process: str, backends: List[dict]):
+        """Replace the backend stats reported by ``process``"""
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO llm_backend_stats
+                (process, url, healthy, concurrency, in_flight, queued, requests, errors, latency_seconds, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(
+                process, b['url'], b['healthy'], b['concurrency'], b['in_flight'], b['queued'],
+                b['requests'], b['errors'], b['latency_seconds'], now
+            ) for b in backends])
+
+    def get_llm_backend_stats(self, max_age: float) -> List[dict]:
+        """Backend stats summed over the processes that reported within ``max_age`` seconds"""
+        since = (datetime.now() - timedelta(seconds=max_age)).isoformat()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_backend_stats WHERE updated_at < ?", (since,))
+            rows = conn.execute("""
+                SELECT url, MIN(healthy), SUM(concurrency), SUM(in_flight), SUM(queued), SUM(requests), SUM(errors),
+                       SUM(latency_seconds * requests) / NULLIF(SUM(requests), 0),
+                       COUNT(*)
+                FROM llm_backend_stats GROUP BY url ORDER BY url
+            """).fetchall()
+        return [{
+            'url': url,
+            'healthy': bool(healthy),
+            'concurrency': concurrency,
+            'in_flight': in_flight,
+            'queued': queued,
+            'requests': requests,
+            'errors': errors,
+            'latency_seconds': latency,
+            'processes': processes
+        } for url, healthy, concurrency, in_flight, queued, requests, errors, latency, processes in rows]
+
+    def get_summary_cache_stats(self) -> dict:
+        with self._connect() as conn:
+            hits, misses, seconds_saved = conn.execute(
+                "SELECT hits, misses, seconds_saved FROM summary_cache_stats WHERE id = 1"
+            ).fetchone()
+            entries = conn.execute("SELECT COUNT(*) FROM summary_cache").fetchone()[0]
+        lookups = hits + misses
+        return {
+            'entries': entries,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'llm_seconds_saved': seconds_saved
+        }
@@ -0,0 +1,177 @@
+import os
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from .speakers import window_bounds
+
+ECAPA_SOURCE = "speechbrain/spkrec-ecapa-voxceleb"
+ECAPA_SAVEDIR = "models/pretrained/spkrec-ecapa"
+
+
+def load_speaker_model():
+    """Load the ECAPA speaker embedding model"""
+    from speechbrain.pretrained import EncoderClassifier
+    return EncoderClassifier.from_hparams(
+        source=ECAPA_SOURCE,
+        savedir=ECAPA_SAVEDIR
+    )
+
+
+def iter_window_batches(
+    signal: torch.Tensor,
+    segment_length: int,
+    batch_size: int
+) -> Iterator[torch.Tensor]:
+    """Yield [batch, segment_length] tensors of consecutive windows.
+
+    The trailing window is zero-padded exactly like the sequential path,
+    so every window the encoder sees is identical to the one-at-a-time loop.
+    """
+    signal = signal.reshape(-1)
+    num_samples = signal.shape[0]
+    step = segment_length * batch_size
+    for offset in range(0, num_samples, step):
+        chunk = signal[offset:offset + step]
+        n_windows = -(-chunk.shape[0] // segment_length)
+        pad = n_windows * segment_length - chunk.shape[0]
+        if pad:
+            chunk = torch.nn.functional.pad(chunk, (0, pad))
+        yield chunk.reshape(n_windows, segment_length)
+
+
+def encode_windows(model, windows: torch.Tensor) -> np.ndarray:
+    """Run one encode_batch call over a stack of windows"""
+    with torch.no_grad():
+        emb = model.encode_batch(windows)
+    return emb.reshape(windows.shape[0], -1).cpu().numpy()
+
+
+# Per-process state for the embedding worker pool
+_worker_model = None
+
+
+def _init_worker(core_queue, threads_per_worker: int):
+    """Pin the worker to its own core(s) and load a private model copy"""
+    global _worker_model
+    cores = core_queue.get()
+    if cores and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError as e:
+            print(f"Could not pin embedding worker to cores {cores}: {e}")
+    torch.set_num_threads(threads_per_worker)
+    _worker_model = load_speaker_model()
+
+
+def _encode_in_worker(windows: np.ndarray) -> np.ndarray:
+    return encode_windows(_worker_model, torch.from_numpy(windows))
+
+
+class EmbeddingWorkerPool:
+    """Pool of worker processes, each pinned to separate cores with its own ECAPA model"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        ctx = mp.get_context('spawn')
+        available = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') \
+            else list(range(os.cpu_count() or 1))
+        per_worker = max(1, len(available) // workers)
+        core_queue = ctx.Queue()
+        for w in range(workers):
+            cores = available[w * per_worker:(w + 1) * per_worker] or [available[w % len(available)]]
+            core_queue.put(set(cores))
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(core_queue, per_worker)
+        )
+
+    def map(self, batches: Iterator[torch.Tensor]) -> Iterator[np.ndarray]:
+        """Encode batches in parallel, yielding results in input order"""
+        return self.executor.map(_encode_in_worker, (b.numpy() for b in batches))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+def extract_embeddings(
+    model,
+    signal: torch.Tensor,
+    sr: int,
+    segment_length: int,
+    batch_size: int = 64,
+    pool: Optional[EmbeddingWorkerPool] = None,
+    callback: Optional[Callable] = None
+) -> Tuple[np.ndarray, List[dict], float]:
+    """Compute one speaker embedding per window in mini-batches.
+
+    Returns the [n_windows, dim] embedding matrix, the window boundaries
+    and the achieved throughput in embeddings per second.
+    """
+    num_samples = signal.shape[-1]
+    segments = window_bounds(num_samples, sr, segment_length)
+    total = len(segments)
+    batch_size = max(1, batch_size)
+
+    start = time.perf_counter()
+    batches = iter_window_batches(signal, segment_length, batch_size)
+    results = pool.map(batches) if pool else (encode_windows(model, b) for b in batches)
+
+    embeddings = []
+    done = 0
+    for emb in results:
+        embeddings.append(emb)
+        done += emb.shape[0]
+        if callback:
+            callback(f"Processing audio... {done / total:.0%}")
+    elapsed = time.perf_counter() - start
+
+    embeddings = np.concatenate(embeddings) if embeddings else np.empty((0, 0), dtype=np.float32)
+    rate = done / elapsed if elapsed > 0 else float('inf')
+    return embeddings, segments, rate
+
+
+def extract_embeddings_many(
+    model,
+    signals: List[torch.Tensor],
+    segment_length: int,
+    batch_size: int = 64
+) -> List[np.ndarray]:
+    """Embed the windows of several recordings in shared mini-batches.
+
+    Short recordings from different requests fill the same encode_batch
+    call instead of each running a nearly empty batch of its own.
+    """
+    batch_size = max(1, batch_size)
+    results: List[List[np.ndarray]] = [[] for _ in signals]
+    pending: List[Tuple[int, torch.Tensor]] = []
+    pending_rows = 0
+
+    def flush():
+        emb = encode_windows(model, torch.cat([w for _, w in pending]))
+        pos = 0
+        for owner, windows in pending:
+            results[owner].append(emb[pos:pos + windows.shape[0]])
+            pos += windows.shape[0]
+        pending.clear()
+
+    for owner, signal in enumerate(signals):
+        for windows in iter_window_batches(signal, segment_length, batch_size):
+            while windows.shape[0]:
+                take = windows[:batch_size - pending_rows]
+                windows = windows[take.shape[0]:]
+                pending.append((owner, take))
+                pending_rows += take.shape[0]
+                if pending_rows == batch_size:
+                    flush()
+                    pending_rows = 0
+    if pending:
+        flush()
+
+    return [np.concatenate(r) if r else np.empty((0, 0), dtype=np.float32) for r in results]
@@ -5,7 +5,7 @@ from email.mime.multipart import MIMEMultipart
 from typing import Optional
 from pathlib import Path
 from datetime import datetime
-from .audio import TranscriptSegment
+from .transcript import TranscriptSegment
 from typing import List
 
 class EmailService:
@@ -0,0 +1,289 @@
+import ipaddress
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.connection import Client, Listener
+from typing import Callable, List, Optional
+
+from .transcript import TranscriptSegment
+
+
+def parse_address(address: str):
+    """'host:port' -> AF_INET tuple, anything else is a Unix socket path.
+
+    TCP is limited to loopback addresses: the connection carries pickles, so it
+    must never be reachable from other machines.
+    """
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and '/' not in address:
+        host = host or '127.0.0.1'
+        try:
+            loopback = host == 'localhost' or ipaddress.IPv4Address(host).is_loopback
+        except ValueError:
+            loopback = False
+        if not loopback:
+            raise ValueError(f"Inference server address must be a Unix socket or a loopback host, not {host}")
+        return (host, int(port)), 'AF_INET'
+    return address, 'AF_UNIX'
+
+
+def require_authkey(authkey: bytes) -> bytes:
+    if not authkey:
+        raise ValueError("Set INFERENCE_AUTHKEY to a shared secret to use the inference server")
+    return authkey
+
+
+@dataclass
+class InferenceRequest:
+    op: str
+    payload: dict
+    reply: "queue.Queue"
+
+    def progress(self, message: str):
+        self.reply.put(('progress', message))
+
+
+class InferenceServer:
+    """Long-lived process that owns the speech models for every web worker.
+
+    Thin clients (Flask/FastAPI/job workers) connect over a Unix socket or
+    local TCP and submit jobs; model memory stays constant no matter how many
+    web processes run. Requests that arrive within ``batch_window`` seconds of
+    each other are processed together: their ECAPA windows share embedding
+    batches and their Whisper runs overlap on the shared model. Up to
+    ``max_batches`` batches run at once; while all are busy, new requests
+    accumulate and form the next batch.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        authkey: bytes,
+        batch_window: float = 0.05,
+        processor=None,
+        max_batches: int = 2
+    ):
+        self.address, self.family = parse_address(address)
+        self.authkey = require_authkey(authkey)
+        self.batch_window = batch_window
+        self._slots = threading.BoundedSemaphore(max_batches)
+        self._batches = ThreadPoolExecutor(max_workers=max_batches, thread_name_prefix="inference-batch")
+        if processor is None:
+            from .audio import AudioProcessor
+            processor = AudioProcessor()
+        self.processor = processor
+        self._requests: "queue.Queue[InferenceRequest]" = queue.Queue()
+
+    def serve_forever(self):
+        print("Loading speech models...")
+        self.processor.warm_up()
+        if self.family == 'AF_UNIX' and os.path.exists(self.address):
+            os.unlink(self.address)
+        # Create the Unix socket owner-only from the start
+        umask = os.umask(0o177)
+        try:
+            listener = Listener(self.address, family=self.family, authkey=self.authkey)
+        finally:
+            os.umask(umask)
+        threading.Thread(target=self._dispatch_loop, name="inference-dispatch", daemon=True).start()
+        print(f"Inference server listening on {self.address}")
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    print(f"Rejected inference client: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+
+    def _handle(self, conn):
+        """Relay one client's requests to the dispatcher and stream replies back"""
+        with conn:
+            while True:
+                try:
+                    op, payload = conn.recv()
+                except (EOFError, OSError):
+                    return
+                request = InferenceRequest(op, payload, queue.Queue())
+                if op == 'ping':
+                    conn.send(('result', 'pong'))
+                    continue
+                self._requests.put(request)
+                while True:
+                    kind, value = request.reply.get()
+                    try:
+                        conn.send((kind, value))
+                    except (EOFError, OSError):
+                        return
+                    if kind in ('result', 'error'):
+                        break
+
+    def _dispatch_loop(self):
+        while True:
+            pending = [self._requests.get()]
+            # Wait for a free batch slot; requests that arrive meanwhile join this batch
+            self._slots.acquire()
+            time.sleep(self.batch_window)
+            while True:
+                try:
+                    pending.append(self._requests.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Only requests sharing a performance profile can share model batches
+            batches = {}
+            for request in pending:
+                if request.op != 'process':
+                    request.reply.put(('error', f"Unknown operation: {request.op}"))
+                    continue
+                batches.setdefault(request.payload.get('profile'), []).append(request)
+            if not batches:
+                self._slots.release()
+            for i, (profile_name, batch) in enumerate(batches.items()):
+                if i:
+                    self._slots.acquire()
+                self._batches.submit(self._run_batch_in_slot, batch, profile_name)
+
+    def _run_batch_in_slot(self, requests: List[InferenceRequest], profile_name: Optional[str]):
+        try:
+            self._run_batch(requests, profile_name)
+        except Exception as e:
+            for request in requests:
+                request.reply.put(('error', str(e)))
+        finally:
+            self._slots.release()
+
+    def _run_batch(self, requests: List[InferenceRequest], profile_name: Optional[str] = None):
+        from .speakers import assign_speakers, windows_to_array
+        from .audio_buffer import AudioBuffer
+        from .profiles import get_profile
+
+        profile = get_profile(profile_name)
+
+        buffers = []
+        try:
+            for request in requests:
+                request.progress("Loading audio file...")
+                if request.payload.get('path'):
+                    buffers.append(AudioBuffer.from_file(self._audio_path(request.payload['path'])))
+                else:
+                    buffers.append(AudioBuffer.from_array(request.payload['samples'], AudioBuffer.SAMPLE_RATE))
+                request.progress("Analyzing speakers and transcribing...")
+
+            # Diarization for the whole batch runs alongside each request's Whisper pass
+            with ThreadPoolExecutor(max_workers=len(requests) + 1, thread_name_prefix="inference") as executor:
+                diarization = executor.submit(self.processor.diarize_many, buffers, profile)
+                transcriptions = [
+                    executor.submit(self.processor._transcribe, buffer, self._transcription_reporter(request), profile)
+                    for request, buffer in zip(requests, buffers)
+                ]
+                timelines = diarization.result()
+                for request, (timeline, embeddings), transcription in zip(requests, timelines, transcriptions):
+                    try:
+                        request.progress("Assigning speakers...")
+                        # Speaker stages go back too: the client caches them for
+                        # re-clustering and voiceprint matching
+                        request.reply.put(('result', {
+                            'transcript': assign_speakers(transcription.result(), timeline),
+                            'embeddings': embeddings,
+                            'windows': windows_to_array(
+                                [{'start': s, 'end': e} for s, e in zip(timeline.starts, timeline.ends)]
+                            ),
+                            'labels': timeline.labels
+                        }))
+                    except Exception as e:
+                        request.reply.put(('error', str(e)))
+        finally:
+            for buffer in buffers:
+                buffer.close()
+
+    @staticmethod
+    def _audio_path(path: str) -> str:
+        """Only audio the application stores may be read by path"""
+        from pathlib import Path
+        from config.config import RECORDINGS_DIR, UPLOADS_DIR, AUDIO_CACHE_DIR
+        resolved = Path(path).resolve()
+        for root in (RECORDINGS_DIR, UPLOADS_DIR, AUDIO_CACHE_DIR):
+            if resolved.is_relative_to(Path(root).resolve()):
+                return str(resolved)
+        raise ValueError(f"Refusing to read audio outside the data directories: {path}")
+
+    @staticmethod
+    def _transcription_reporter(request: InferenceRequest):
+        def report(message):
+            request.progress(f"Transcribing: {message}")
+        return report
+
+
+class InferenceClient:
+    """Drop-in for AudioProcessor.process_audio that runs on the shared inference server"""
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address, self.family = parse_address(address)
+        self.authkey = require_authkey(authkey)
+
+    def _call(self, op: str, payload: dict, callback: Optional[Callable] = None):
+        with Client(self.address, family=self.family, authkey=self.authkey) as conn:
+            conn.send((op, payload))
+            while True:
+                kind, value = conn.recv()
+                if kind == 'progress':
+                    if callback:
+                        callback(value)
+                elif kind == 'result':
+                    return value
+                else:
+                    raise RuntimeError(f"Inference server error: {value}")
+
+    def ping(self) -> bool:
+        try:
+            return self._call('ping', {}) == 'pong'
+        except Exception:
+            return False
+
+    def process_audio(self, audio, callback=None, profile: Optional[str] = None, cache=None) -> List[TranscriptSegment]:
+        """Diarize and transcribe a recording given as a path or AudioBuffer.
+
+        The server recomputes every stage; the speaker embeddings, windows and
+        labels it returns are stored in ``cache`` like in-process processing does.
+        """
+        from .profiles import get_profile
+        path = audio if isinstance(audio, (str, os.PathLike)) else audio.source_path
+        if path:
+            payload = {'path': os.path.abspath(str(path))}
+        else:
+            payload = {'samples': audio.samples}
+        payload['profile'] = getattr(profile, 'name', profile)
+        result = self._call('process', payload, callback)
+        if cache:
+            stages = get_profile(payload['profile'])
+            cache.store('embeddings', stages.embedding_key(), result['embeddings'])
+            cache.store('windows', stages.embedding_key(), result['windows'])
+            cache.store('labels', stages.clustering_key(), result['labels'])
+        return result['transcript']
+
+
+if __name__ == '__main__':
+    # Shared inference service: python -m src.core.inference
+    from utils import setup_python_path
+    setup_python_path()
+    from config.config import (
+        INFERENCE_SERVER_ADDRESS, INFERENCE_AUTHKEY, INFERENCE_BATCH_WINDOW, INFERENCE_MAX_BATCHES
+    )
+    if not INFERENCE_SERVER_ADDRESS:
+        raise SystemExit("Set INFERENCE_SERVER_ADDRESS to a socket path or loopback host:port")
+    try:
+        server = InferenceServer(
+            INFERENCE_SERVER_ADDRESS,
+            INFERENCE_AUTHKEY,
+            batch_window=INFERENCE_BATCH_WINDOW,
+            max_batches=INFERENCE_MAX_BATCHES
+        )
+    except ValueError as e:
+        raise SystemExit(str(e))
+    server.serve_forever()
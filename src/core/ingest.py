@@ -0,0 +1,132 @@
+import hashlib
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from .audio_buffer import AudioBuffer
+
+# File extension and libsndfile format/subtype for each canonical storage format
+RECORDING_FORMATS = {
+    'flac': ('.flac', 'FLAC', 'PCM_16'),
+    'wav': ('.wav', 'WAV', 'PCM_16')
+}
+
+AUDIO_MIME_TYPES = {
+    '.flac': 'audio/flac',
+    '.wav': 'audio/wav'
+}
+
+
+@dataclass
+class IngestedRecording:
+    path: str
+    original_sample_rate: int
+    buffer: AudioBuffer
+    audio_hash: Optional[str] = None
+
+
+def audio_mime_type(path: Union[str, Path]) -> str:
+    """MIME type to serve a stored recording with"""
+    return AUDIO_MIME_TYPES.get(Path(path).suffix.lower(), 'application/octet-stream')
+
+
+def audio_content_hash(audio_array: np.ndarray, sample_rate: int) -> str:
+    """SHA-256 of uploaded samples and their rate, identifying repeat uploads of the same audio"""
+    digest = hashlib.sha256(f"{sample_rate}:{np.asarray(audio_array).dtype.str}:".encode())
+    digest.update(np.ascontiguousarray(audio_array))
+    return digest.hexdigest()
+
+
+def file_content_hash(path: Union[str, Path], chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's bytes, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _recording_format():
+    from config.config import RECORDING_FORMAT
+    if RECORDING_FORMAT not in RECORDING_FORMATS:
+        raise ValueError(f"Unsupported recording format: {RECORDING_FORMAT}")
+    return RECORDING_FORMATS[RECORDING_FORMAT]
+
+
+def _write_canonical(buffer: AudioBuffer, audio_dir: Path, original_sample_rate: int) -> str:
+    import soundfile as sf
+
+    extension, fmt, subtype = _recording_format()
+    # Unique even when several workers ingest within the same second
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = Path(audio_dir) / f"meeting_{timestamp}_{uuid.uuid4().hex[:8]}{extension}"
+
+    with sf.SoundFile(
+        str(filename), 'w',
+        samplerate=buffer.sample_rate,
+        channels=1,
+        format=fmt,
+        subtype=subtype
+    ) as f:
+        f.comment = f"original_sample_rate={original_sample_rate}"
+        for pos in range(0, len(buffer.samples), AudioBuffer.BLOCK_SIZE):
+            f.write(np.clip(buffer.samples[pos:pos + AudioBuffer.BLOCK_SIZE], -1.0, 1.0))
+    return str(filename)
+
+
+def ingest_array(
+    audio_array: np.ndarray,
+    sample_rate: int,
+    audio_dir: Path,
+    audio_hash: Optional[str] = None
+) -> IngestedRecording:
+    """Convert uploaded samples to the canonical 16 kHz mono format and store them.
+
+    The returned buffer holds the already-resampled audio, so processing can
+    start without reading the stored file back.
+    """
+    audio_hash = audio_hash or audio_content_hash(audio_array, sample_rate)
+    buffer = AudioBuffer.from_array(audio_array, sample_rate)
+    try:
+        path = _write_canonical(buffer, audio_dir, sample_rate)
+    except Exception:
+        buffer.close()
+        raise
+    buffer.source_path = path
+    return IngestedRecording(path=path, original_sample_rate=sample_rate, buffer=buffer, audio_hash=audio_hash)
+
+
+def ingest_file(
+    source_path: Union[str, Path],
+    audio_dir: Path,
+    remove_source: bool = True,
+    audio_hash: Optional[str] = None
+) -> IngestedRecording:
+    """Convert a captured or uploaded file to the canonical format, replacing the original"""
+    import soundfile as sf
+
+    source_path = Path(source_path)
+    original_sample_rate = sf.info(str(source_path)).samplerate
+    audio_hash = audio_hash or file_content_hash(source_path)
+    buffer = AudioBuffer.from_file(source_path)
+    try:
+        path = _write_canonical(buffer, audio_dir, original_sample_rate)
+    except Exception:
+        buffer.close()
+        raise
+    buffer.source_path = path
+    if remove_source and Path(path) != source_path:
+        source_path.unlink(missing_ok=True)
+    return IngestedRecording(
+        path=path,
+        original_sample_rate=original_sample_rate,
+        buffer=buffer,
+        audio_hash=audio_hash
+    )
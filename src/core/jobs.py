@@ -0,0 +1,296 @@
+import atexit
+import os
+import re
+import socket
+import threading
+import time
+import wave
+import multiprocessing as mp
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from .db import DatabaseManager, Job
+
+# Share of overall progress reached when each pipeline stage starts
+STAGE_PROGRESS = {
+    'Saving meeting': 0.95,
+    'Queueing summary': 0.99
+}
+AUDIO_STAGE_SHARE = 0.95
+
+
+def estimate_progress(message: str) -> Optional[float]:
+    """Map a pipeline status message to overall job progress (0..1)"""
+    for prefix, progress in STAGE_PROGRESS.items():
+        if message.startswith(prefix):
+            return progress
+    # Parallel branches report e.g. "Analyzing speakers: 40% | Transcribing: done";
+    # the job is only as far along as its slowest branch
+    parts = [p for p in message.split('|') if p.strip()]
+    fractions = []
+    for part in parts:
+        if 'done' in part:
+            fractions.append(1.0)
+            continue
+        match = re.search(r'(\d+)%', part)
+        if match:
+            fractions.append(int(match.group(1)) / 100)
+    if not fractions:
+        return None
+    return AUDIO_STAGE_SHARE * min(fractions)
+
+
+def send_summary_email(recorder, meeting_id: str, email: Optional[str], status_callback=None):
+    if not email:
+        return
+    try:
+        if recorder.email_service:
+            if status_callback:
+                status_callback("Sending email notification...")
+            recorder.send_meeting_email(meeting_id, email)
+        else:
+            print("Email service not available. Skipping email notification.")
+    except Exception as e:
+        print(f"Error sending email: {e}")
+
+
+def run_summary_job(recorder, db: DatabaseManager, job: Job):
+    """Summarize a saved meeting; a failed attempt is queued again with a growing delay"""
+    from config.config import SUMMARY_JOB_ATTEMPTS, SUMMARY_RETRY_DELAY
+    params = job.params
+    meeting_id = params['meeting_id']
+    attempt = params.get('attempt', 1)
+
+    def status_callback(message):
+        db.update_job(job.id, stage=message)
+
+    try:
+        meeting = recorder.summarize_meeting(meeting_id, status_callback)
+    except Exception as e:
+        print(f"Error summarizing meeting {meeting_id}: {e}")
+        db.update_job(job.id, status='failed', stage='Failed', error=str(e), finished_at=datetime.now())
+        return
+
+    if meeting.summary_status == 'complete':
+        send_summary_email(recorder, meeting_id, params.get('email'), status_callback)
+        db.update_job(
+            job.id, status='complete', stage='Complete', progress=1.0,
+            meeting_id=meeting_id, finished_at=datetime.now()
+        )
+        return
+
+    db.update_job(
+        job.id, status='failed', stage='Failed', meeting_id=meeting_id,
+        error=meeting.summary, finished_at=datetime.now()
+    )
+    if attempt < SUMMARY_JOB_ATTEMPTS:
+        delay = SUMMARY_RETRY_DELAY * 2 ** (attempt - 1)
+        print(f"Retrying summary of meeting {meeting_id} in {delay:.0f}s (attempt {attempt + 1})")
+        recorder.queue_summary(meeting_id, params.get('email'), attempt + 1, delay)
+    else:
+        # Out of attempts: send what there is (the transcript at least)
+        send_summary_email(recorder, meeting_id, params.get('email'), status_callback)
+
+
+def run_job(recorder, db: DatabaseManager, job: Job):
+    """Process one persisted upload end to end and record the outcome on the job"""
+    if job.params.get('task') == 'summarize':
+        return run_summary_job(recorder, db, job)
+    state = {'progress': 0.0}
+
+    def status_callback(message):
+        progress = estimate_progress(message)
+        if progress is not None:
+            state['progress'] = max(state['progress'], progress)
+        db.update_job(job.id, stage=message, progress=state['progress'])
+
+    params = job.params
+    try:
+        meeting = recorder.record_meeting(
+            duration=params.get('duration', 0),
+            title=params.get('title', ''),
+            status_callback=status_callback,
+            audio_path=job.audio_path,
+            profile=params.get('profile'),
+            on_saved=lambda meeting: db.update_job(job.id, meeting_id=meeting.id),
+            # Sent by the summary job once the summary is ready
+            email=params.get('email')
+        )
+
+        for tag in params.get('tags', []):
+            recorder.db.add_meeting_tag(meeting.id, tag)
+        if params.get('notes'):
+            recorder.db.update_meeting_notes(meeting.id, params['notes'])
+
+        db.update_job(
+            job.id,
+            status='complete',
+            stage='Complete',
+            progress=1.0,
+            meeting_id=meeting.id,
+            finished_at=datetime.now()
+        )
+        Path(job.audio_path).unlink(missing_ok=True)
+    except Exception as e:
+        print(f"Error processing job {job.id}: {e}")
+        db.update_job(job.id, status='failed', stage='Failed', error=str(e), finished_at=datetime.now())
+
+
+def _worker_main(worker_id: int, poll_interval: float):
+    """Worker process: own a MeetingRecorder and drain the job table"""
+    from utils import setup_python_path
+    setup_python_path()
+    from config.config import WARM_UP_MODELS, JOB_HEARTBEAT_INTERVAL, JOB_STALE_AFTER, LLM_WARM_UP_IDLE
+    from .recorder import MeetingRecorder
+
+    print(f"Job worker {worker_id} starting...")
+    recorder = MeetingRecorder(role='worker')
+    if WARM_UP_MODELS:
+        recorder.warm_up()
+    else:
+        # The summary model loads in the background either way
+        recorder.llm_processor.warm_up(background=True)
+    db = recorder.db
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    current = {'job': None}
+
+    def heartbeat():
+        # Jobs run for minutes without touching the database; keep their ownership fresh
+        while True:
+            time.sleep(JOB_HEARTBEAT_INTERVAL)
+            job_id = current['job']
+            if job_id:
+                try:
+                    db.heartbeat_job(job_id, worker)
+                except Exception as e:
+                    print(f"Job worker {worker_id} could not record a heartbeat: {e}")
+
+    threading.Thread(target=heartbeat, daemon=True, name="job-heartbeat").start()
+    last_sweep = 0.0
+    while True:
+        try:
+            job = db.claim_next_job(worker)
+        except Exception as e:
+            print(f"Job worker {worker_id} could not claim a job: {e}")
+            job = None
+        if job is None:
+            # Idle: pick up jobs of workers that died since startup
+            if time.monotonic() - last_sweep >= JOB_STALE_AFTER:
+                last_sweep = time.monotonic()
+                try:
+                    requeued = db.requeue_stale_jobs(JOB_STALE_AFTER)
+                    if requeued:
+                        print(f"Job worker {worker_id} requeued {requeued} stale job(s)")
+                except Exception as e:
+                    print(f"Job worker {worker_id} could not requeue stale jobs: {e}")
+            time.sleep(poll_interval)
+            continue
+        # Reload the summary model while the audio is processed if Ollama may have unloaded it
+        recorder.llm_processor.warm_up(background=True, idle_after=LLM_WARM_UP_IDLE)
+        current['job'] = job.id
+        try:
+            run_job(recorder, db, job)
+        finally:
+            current['job'] = None
+
+
+class JobQueue:
+    """Persistent upload queue drained by a pool of worker processes.
+
+    Uploads are written to UPLOADS_DIR and recorded in the ``jobs`` table, so the
+    web request returns immediately with a job ID and queued work survives a
+    restart. Each worker process claims the oldest queued job atomically.
+    """
+
+    def __init__(self, db: Optional[DatabaseManager] = None, workers: Optional[int] = None):
+        from config.config import UPLOADS_DIR, JOB_WORKERS, JOB_POLL_INTERVAL
+        self.db = db or DatabaseManager()
+        self.uploads_dir = Path(UPLOADS_DIR)
+        self.uploads_dir.mkdir(exist_ok=True, parents=True)
+        self.workers = JOB_WORKERS if workers is None else workers
+        self.poll_interval = JOB_POLL_INTERVAL
+        self._processes: List[mp.Process] = []
+
+    def start(self):
+        """Requeue work interrupted by a previous shutdown and start the workers.
+
+        Only jobs whose worker stopped sending heartbeats are requeued, so starting
+        another web process leaves the jobs of running workers alone.
+        """
+        from config.config import JOB_STALE_AFTER
+        requeued = self.db.requeue_stale_jobs(JOB_STALE_AFTER)
+        if requeued:
+            print(f"Requeued {requeued} interrupted job(s)")
+        self.recover_captures()
+        ctx = mp.get_context('spawn')
+        for worker_id in range(self.workers):
+            process = ctx.Process(
+                target=_worker_main,
+                args=(worker_id, self.poll_interval),
+                name=f"job-worker-{worker_id}"
+            )
+            process.start()
+            self._processes.append(process)
+        # Not daemonic (workers may start their own pools), so stop them explicitly on exit
+        atexit.register(self.stop)
+
+    def submit(self, audio_file, params: dict, filename: Optional[str] = None) -> Job:
+        """Persist an uploaded audio stream and queue it for processing.
+
+        The upload keeps the extension of ``filename`` (WAV if there is none), so
+        the worker can decode any format soundfile reads.
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        suffix = Path(filename).suffix.lower() if filename else ''
+        if not re.fullmatch(r'\.[a-z0-9]{1,5}', suffix):
+            suffix = '.wav'
+        upload_path = self.uploads_dir / f"upload_{timestamp}{suffix}"
+        with open(upload_path, 'wb') as f:
+            while True:
+                chunk = audio_file.read(1024 * 1024)
+                if not chunk:
+                    break
+                f.write(chunk)
+        return self.db.create_job(str(upload_path), params)
+
+    def recover_captures(self) -> List[Job]:
+        """Queue recordings whose capture was cut short by a crash, repairing their files"""
+        from config.config import RECORDINGS_DIR, CAPTURE_CHECKPOINT_INTERVAL
+        from .capture import recover_captures
+        jobs = []
+        for path in recover_captures(RECORDINGS_DIR, self.uploads_dir, min_age=max(60, 3 * CAPTURE_CHECKPOINT_INTERVAL)):
+            with wave.open(str(path), 'rb') as wf:
+                duration = wf.getnframes() / wf.getframerate()
+            last_written = datetime.fromtimestamp(path.stat().st_mtime)
+            jobs.append(self.db.create_job(str(path), {
+                'title': f"Recovered recording {last_written.strftime('%Y-%m-%d %H:%M')}",
+                'duration': duration
+            }))
+        return jobs
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.db.get_job(job_id)
+
+    def list(self, status: Optional[str] = None) -> List[Job]:
+        return self.db.get_jobs(status)
+
+    def stop(self):
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            process.join()
+        self._processes = []
+
+
+if __name__ == '__main__':
+    # Standalone worker role: python -m src.core.jobs
+    from utils import setup_python_path
+    setup_python_path()
+    queue = JobQueue()
+    queue.start()
+    try:
+        for process in queue._processes:
+            process.join()
+    except KeyboardInterrupt:
+        queue.stop()
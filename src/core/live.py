@@ -0,0 +1,187 @@
+import queue
+import threading
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from .audio_buffer import AudioBuffer
+from .diarization import extract_embeddings
+from .speakers import SpeakerTimeline
+from .transcript import TimedSegment, clip_segments
+
+
+class LiveTranscriber:
+    """Transcribe and embed a recording chunk by chunk while it is still being captured.
+
+    Captured blocks arrive from StreamingCapture's writer thread. Whenever
+    roughly ``chunk_seconds`` have accumulated, the chunk is cut at the quietest
+    point of the last ``silence_search_seconds`` and queued, padded by
+    ``overlap_seconds`` of context on either side. A worker thread runs Whisper
+    on it and keeps only the words whose midpoint falls inside the chunk's own
+    span, so the overlap is never transcribed twice. Speaker embeddings for
+    complete windows are computed as the audio arrives, so stopping leaves only
+    the tail chunk, clustering and speaker assignment.
+    """
+
+    def __init__(
+        self,
+        processor,
+        sample_rate: int,
+        profile=None,
+        chunk_seconds: float = 30,
+        overlap_seconds: float = 1.0,
+        silence_search_seconds: float = 5.0
+    ):
+        self.processor = processor
+        # The meeting's performance profile: Whisper options, embedding windows and clustering
+        self.profile = profile or processor.default_profile
+        self.sr = sample_rate
+        self.chunk_len = int(chunk_seconds * sample_rate)
+        self.overlap = int(overlap_seconds * sample_rate)
+        self.search = int(silence_search_seconds * sample_rate)
+
+        # Device-rate audio not yet handed to the worker, starting at _buffer_start
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0
+        self._prev_cut = 0
+
+        # 16 kHz audio already transcribed but not yet covered by a full embedding window,
+        # starting _pending_start samples into the recording
+        self.segment_length = int(AudioBuffer.SAMPLE_RATE * self.profile.segment_length)
+        self._pending_16k = np.zeros(0, dtype=np.float32)
+        self._pending_start = 0
+        self._embeddings: List[np.ndarray] = []
+        self._windows: List[dict] = []
+
+        self._segments: List[TimedSegment] = []
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="live-transcriber", daemon=True)
+        self._worker.start()
+
+    def feed(self, block: np.ndarray):
+        """Capture listener: accept an int16 block at the device rate"""
+        samples = block.reshape(len(block), -1)[:, 0].astype(np.float32) / 32768.0
+        self._buffer = np.concatenate([self._buffer, samples])
+        end = self._buffer_start + len(self._buffer)
+        target = self._prev_cut + self.chunk_len
+        if end >= target + self.overlap:
+            self._enqueue(self._find_cut(target), final=False)
+
+    def _find_cut(self, target: int) -> int:
+        """Quietest 20 ms frame in the search window before ``target``"""
+        lo = max(self._prev_cut + self.overlap, target - self.search)
+        region = self._buffer[lo - self._buffer_start:target - self._buffer_start]
+        frame = max(1, int(0.02 * self.sr))
+        n_frames = len(region) // frame
+        if n_frames == 0:
+            return target
+        energy = np.square(region[:n_frames * frame].reshape(n_frames, frame)).mean(axis=1)
+        return lo + int(np.argmin(energy)) * frame + frame // 2
+
+    def _enqueue(self, cut: int, final: bool):
+        chunk_start = max(0, self._prev_cut - self.overlap)
+        chunk_end = self._buffer_start + len(self._buffer) if final else cut + self.overlap
+        chunk = self._buffer[chunk_start - self._buffer_start:chunk_end - self._buffer_start].copy()
+        self._queue.put((chunk, chunk_start, self._prev_cut, None if final else cut))
+        self._prev_cut = cut
+        keep_from = max(self._buffer_start, cut - self.overlap)
+        self._buffer = self._buffer[keep_from - self._buffer_start:]
+        self._buffer_start = keep_from
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._process(*item)
+            except Exception as e:
+                print(f"Error in live transcription: {e}")
+                self._skip(*item)
+
+    def _skip(self, chunk: np.ndarray, chunk_start: int, keep_start: int, keep_end: Optional[int]):
+        """Leave a failed chunk's span without speaker windows so later windows keep their times"""
+        end = keep_end if keep_end is not None else chunk_start + len(chunk)
+        missing = int(round((end - keep_start) * AudioBuffer.SAMPLE_RATE / self.sr))
+        lost = len(self._pending_16k)
+        try:
+            # Audio before the gap gets a (short) window of its own
+            self._embed(np.zeros(0, dtype=np.float32), final=True)
+            lost = 0
+        except Exception as e:
+            print(f"Error embedding audio before a failed live chunk: {e}")
+        self._pending_16k = np.zeros(0, dtype=np.float32)
+        self._pending_start += lost + missing
+
+    def _process(self, chunk: np.ndarray, chunk_start: int, keep_start: int, keep_end: Optional[int]):
+        offset = chunk_start / self.sr
+        lo = keep_start / self.sr
+        hi = keep_end / self.sr if keep_end is not None else float('inf')
+
+        with AudioBuffer.from_array(chunk, self.sr) as audio:
+            profile = self.profile
+            whisper_segments, _ = self.processor.whisper_model(profile).transcribe(
+                audio.samples,
+                beam_size=profile.beam_size,
+                vad_filter=profile.vad_filter,
+                word_timestamps=True
+            )
+            kept = clip_segments(whisper_segments, offset, lo, hi)
+
+            # Append this chunk's own span to the embedding stream
+            ratio = audio.sample_rate / self.sr
+            a = int(round((keep_start - chunk_start) * ratio))
+            b = int(round((keep_end - chunk_start) * ratio)) if keep_end is not None else len(audio.samples)
+            own = np.array(audio.samples[a:b], dtype=np.float32)
+
+        with self._lock:
+            self._segments.extend(kept)
+        self._embed(own, final=keep_end is None)
+
+    def _embed(self, samples: np.ndarray, final: bool):
+        """Embed the complete windows of the pending audio; leaves state untouched if that fails"""
+        pending = np.concatenate([self._pending_16k, samples])
+        usable = len(pending) if final else (len(pending) // self.segment_length) * self.segment_length
+        if usable == 0:
+            self._pending_16k = pending
+            return
+        embeddings, windows, _ = extract_embeddings(
+            self.processor.spk_model,
+            torch.from_numpy(pending[:usable]),
+            AudioBuffer.SAMPLE_RATE,
+            self.segment_length,
+            batch_size=self.processor.embedding_batch_size
+        )
+        offset = self._pending_start / AudioBuffer.SAMPLE_RATE
+        self._embeddings.append(embeddings)
+        self._windows.extend({'start': w['start'] + offset, 'end': w['end'] + offset} for w in windows)
+        self._pending_start += usable
+        self._pending_16k = pending[usable:]
+
+    def partial_transcript(self) -> List[TimedSegment]:
+        """Segments transcribed so far (speakers are assigned on finish)"""
+        with self._lock:
+            return list(self._segments)
+
+    def finish(self, callback: Optional[Callable] = None) -> Tuple[List[TimedSegment], SpeakerTimeline]:
+        """Transcribe the tail, then cluster all embeddings into a speaker timeline.
+
+        ``embeddings`` is None afterwards if no audio could be embedded.
+        """
+        if callback:
+            callback("Transcribing final chunk...")
+        self._enqueue(self._buffer_start + len(self._buffer), final=True)
+        self._queue.put(None)
+        self._worker.join()
+
+        if callback:
+            callback("Identifying speakers...")
+        self.embeddings = np.concatenate(self._embeddings) if self._embeddings else None
+        self.windows = list(self._windows)
+        if self.embeddings is None:
+            labels = np.zeros(0, dtype=int)
+        else:
+            labels = self.profile.make_clusterer().fit_predict(self.embeddings)
+        return self.partial_transcript(), SpeakerTimeline(self.windows, labels)
@@ -1,45 +1,305 @@
+import hashlib
+import re
+import time
 import requests
-from typing import List
-from .audio import TranscriptSegment
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+from .cache import config_key
+from .llm_client import OllamaClient
+from .transcript import TranscriptSegment
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+def transcript_hash(transcript: List[TranscriptSegment]) -> str:
+    """Hash of the transcript text as the LLM sees it, ignoring whitespace differences"""
+    text = "\n".join(f"{seg.speaker}: {' '.join(seg.text.split())}" for seg in transcript)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def compact_transcript(
+    transcript: List[TranscriptSegment],
+    min_confidence: Optional[float] = None,
+    fillers: Sequence[str] = ()
+) -> List[TranscriptSegment]:
+    """Shrink a transcript for the LLM without losing content.
+
+    Drops segments below ``min_confidence`` (Whisper avg_logprob), strips filler
+    words, drops a segment that repeats the speaker's previous one and merges
+    consecutive segments of the same speaker. The result depends only on the input.
+    """
+    filler_re = None
+    if fillers:
+        words = "|".join(re.escape(f) for f in sorted(fillers, key=len, reverse=True))
+        # The filler plus any comma or dash directly after it
+        filler_re = re.compile(rf"\b(?:{words})\b[,.]?(?:\s*-+)?", re.IGNORECASE)
+
+    compacted: List[TranscriptSegment] = []
+    previous = {}
+    for seg in transcript:
+        if min_confidence is not None and seg.confidence is not None and seg.confidence < min_confidence:
+            continue
+        text = filler_re.sub("", seg.text) if filler_re else seg.text
+        text = re.sub(r"\s+([,.?!])", r"\1", " ".join(text.split())).strip(" ,")
+        if not re.search(r"\w", text):
+            continue
+
+        # Whisper sometimes repeats a line; keep it once per speaker run
+        normalized = re.sub(r"[^\w\s]", "", text.lower())
+        if compacted and compacted[-1].speaker == seg.speaker and previous.get(seg.speaker) == normalized:
+            continue
+        previous[seg.speaker] = normalized
+
+        if compacted and compacted[-1].speaker == seg.speaker:
+            last = compacted[-1]
+            compacted[-1] = TranscriptSegment(
+                speaker=last.speaker,
+                text=f"{last.text} {text}",
+                start_time=last.start_time,
+                end_time=seg.end_time,
+                confidence=min((c for c in (last.confidence, seg.confidence) if c is not None), default=None)
+            )
+        else:
+            compacted.append(TranscriptSegment(
+                speaker=seg.speaker,
+                text=text,
+                start_time=seg.start_time,
+                end_time=seg.end_time,
+                confidence=seg.confidence
+            ))
+    return compacted
+
+
+def chunk_transcript(transcript: List[TranscriptSegment], max_tokens: int) -> List[str]:
+    """Split a transcript into chunks of at most ``max_tokens``, cutting between speaker turns.
+
+    A turn longer than the budget is cut between its segments instead, and a
+    segment longer than the budget between its sentences.
+    """
+    turns = []
+    for seg in transcript:
+        if turns and turns[-1][0] == seg.speaker:
+            turns[-1][1].append(seg.text.strip())
+        else:
+            turns.append((seg.speaker, [seg.text.strip()]))
+
+    chunks, lines, used = [], [], 0
+
+    def add(line):
+        nonlocal lines, used
+        tokens = estimate_tokens(line)
+        if lines and used + tokens > max_tokens:
+            chunks.append("\n".join(lines))
+            lines, used = [], 0
+        lines.append(line)
+        used += tokens
+
+    for speaker, texts in turns:
+        line = f"{speaker}: {' '.join(texts)}"
+        if estimate_tokens(line) <= max_tokens:
+            add(line)
+            continue
+        for text in texts:
+            line = f"{speaker}: {text}"
+            if estimate_tokens(line) <= max_tokens:
+                add(line)
+                continue
+            piece = ""
+            for sentence in re.split(r"(?<=[.?!])\s+", text):
+                if piece and estimate_tokens(f"{speaker}: {piece} {sentence}") > max_tokens:
+                    add(f"{speaker}: {piece}")
+                    piece = sentence
+                else:
+                    piece = f"{piece} {sentence}".strip()
+            if piece:
+                add(f"{speaker}: {piece}")
+    if lines:
+        chunks.append("\n".join(lines))
+    return chunks
+
+
+def split_text(text: str, max_tokens: int) -> List[str]:
+    """Split text into pieces of at most ``max_tokens``, cutting between lines, else between words"""
+    max_chars = max(1, max_tokens - 1) * 4
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind("\n", 0, max_chars + 1)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, max_chars + 1)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(text[:cut].strip())
+        text = text[cut:].strip()
+    pieces.append(text)
+    return pieces
+
 
 class LLMProcessor:
-    def __init__(self, api_url="http://localhost:11434/api/generate"):
-        self.api_url = api_url
-        self.timeout = 30
+    def __init__(self, api_url: Optional[str] = None, client: Optional[OllamaClient] = None, db=None):
+        from config.config import (
+            LLM_TIMEOUT_PER_1K_TOKENS, SUMMARY_CHUNK_TOKENS, SUMMARY_MAP_WORKERS, SUMMARY_CHUNK_RETRIES,
+            SUMMARY_CACHE_MAX_ENTRIES, SUMMARY_COMPACTION, SUMMARY_MIN_CONFIDENCE, SUMMARY_FILLER_WORDS
+        )
+        self.client = client or OllamaClient(api_url=api_url, db=db)
+        self.model = self.client.model
+        self.timeout = self.client.timeout
+        self.timeout_per_1k_tokens = LLM_TIMEOUT_PER_1K_TOKENS
+        self.chunk_tokens = SUMMARY_CHUNK_TOKENS
+        # Enough concurrent chunk requests to occupy every backend
+        self.map_workers = max(SUMMARY_MAP_WORKERS, self.client.pool.capacity)
+        self.chunk_retries = SUMMARY_CHUNK_RETRIES
+        # Summaries are cached in the database when one is given
+        self.db = db
+        self.cache_max_entries = SUMMARY_CACHE_MAX_ENTRIES
+        self.compaction = SUMMARY_COMPACTION
+        self.min_confidence = SUMMARY_MIN_CONFIDENCE
+        self.fillers = tuple(SUMMARY_FILLER_WORDS)
 
-    def generate_summary(self, transcript: List[TranscriptSegment]) -> str:
-        """Generate a meeting summary using a local LLM"""
+    @property
+    def prompt_version(self) -> str:
+        """Hash of everything besides transcript and model that shapes a summary"""
+        from config.config import (
+            SUMMARY_PROMPT_TEMPLATE, SUMMARY_CHUNK_PROMPT_TEMPLATE, SUMMARY_REDUCE_PROMPT_TEMPLATE
+        )
+        return config_key(
+            SUMMARY_PROMPT_TEMPLATE, SUMMARY_CHUNK_PROMPT_TEMPLATE, SUMMARY_REDUCE_PROMPT_TEMPLATE, self.chunk_tokens,
+            self.compaction and (self.min_confidence, sorted(self.fillers))
+        )
+
+    def timeout_for(self, prompt: str) -> float:
+        """Request timeout scaled with the prompt size"""
+        return self.timeout + estimate_tokens(prompt) / 1000 * self.timeout_per_1k_tokens
+
+    def _generate(self, prompt: str, on_text: Optional[Callable[[str], None]] = None) -> str:
+        """Run one completion; with ``on_text``, stream it and report the text so far as it grows"""
+        return self.client.generate(prompt, on_text, timeout=self.timeout_for(prompt))
+
+    def _generate_with_retries(self, prompt: str, on_text: Optional[Callable[[str], None]] = None) -> str:
+        return self.client.generate(prompt, on_text, timeout=self.timeout_for(prompt), retries=self.chunk_retries)
+
+    def warm_up(self, background: bool = False, idle_after: float = 0):
+        """Load the summary model ahead of the first summary (on backends idle for ``idle_after`` seconds)"""
+        self.client.warm_up(background, idle_after)
+
+    def _summarize_chunks(self, chunks: List[str], on_text: Optional[Callable[[str], None]] = None) -> str:
+        """Summarize chunks concurrently, then reduce the partial summaries to one"""
+        from config.config import SUMMARY_CHUNK_PROMPT_TEMPLATE
+        prompts = [
+            SUMMARY_CHUNK_PROMPT_TEMPLATE.format(part=i, parts=len(chunks), transcript=chunk)
+            for i, chunk in enumerate(chunks, start=1)
+        ]
+        with ThreadPoolExecutor(max_workers=max(1, min(self.map_workers, len(prompts)))) as executor:
+            partials = list(executor.map(self._generate_with_retries, prompts))
+        return self._reduce(partials, on_text)
+
+    def _group(self, pieces: List[str]) -> List[List[str]]:
+        """Numbered pieces packed into groups that fit the chunk budget together"""
+        groups, group, used = [], [], 0
+        for i, piece in enumerate(pieces, start=1):
+            tokens = estimate_tokens(piece)
+            if group and used + tokens > self.chunk_tokens:
+                groups.append(group)
+                group, used = [], 0
+            group.append(f"Part {i}:\n{piece}")
+            used += tokens
+        groups.append(group)
+        return groups
+
+    def _reduce(self, summaries: List[str], on_text: Optional[Callable[[str], None]] = None) -> str:
+        """Combine partial summaries, in several rounds if they exceed the chunk budget together.
+
+        A summary longer than half the budget is split into pieces that are
+        combined separately, so nothing is dropped. Only if the LLM answers such
+        a round without clearly shortening the text are summaries cut to half the budget
+        from then on, with a warning, so each round at least halves their number.
+        """
+        from config.config import SUMMARY_REDUCE_PROMPT_TEMPLATE, SUMMARY_REDUCE_MAX_ROUNDS
+        half = max(2, self.chunk_tokens // 2)
+        sent, verbose = None, False
+        for _ in range(SUMMARY_REDUCE_MAX_ROUNDS):
+            pieces = [piece for summary in summaries for piece in split_text(summary.strip(), half)]
+            received = sum(estimate_tokens(summary.strip()) for summary in summaries)
+            stalled = len(summaries) > 1 and len(self._group(pieces)) >= len(summaries)
+            # Combining that barely shortens the text would never fit the budget
+            if stalled and sent is not None and (verbose or received > 0.75 * sent):
+                verbose = True
+                cut = sum(1 for summary in summaries if estimate_tokens(summary.strip()) > half)
+                print(f"Warning: truncating {cut} of {len(summaries)} partial summaries "
+                      f"to {half} tokens; the LLM's summaries are too long to combine")
+                pieces = [split_text(summary.strip(), half)[0] for summary in summaries]
+            sent = sum(estimate_tokens(piece) for piece in pieces)
+            groups = self._group(pieces)
+
+            prompts = [SUMMARY_REDUCE_PROMPT_TEMPLATE.format(summaries="\n\n".join(g)) for g in groups]
+            if len(prompts) == 1:
+                return self._generate_with_retries(prompts[0], on_text)
+            with ThreadPoolExecutor(max_workers=max(1, min(self.map_workers, len(prompts)))) as executor:
+                summaries = list(executor.map(self._generate_with_retries, prompts))
+        raise RuntimeError(
+            f"{len(summaries)} partial summaries still exceed the chunk budget after "
+            f"{SUMMARY_REDUCE_MAX_ROUNDS} reduce rounds"
+        )
+
+    def stream_summary(self, transcript: List[TranscriptSegment], on_text: Optional[Callable[[str], None]] = None) -> str:
+        """Generate a meeting summary using a local LLM, raising on failure.
+
+        With ``on_text`` the final completion is streamed and the callback receives
+        the summary text so far as tokens arrive. Transcripts longer than
+        ``chunk_tokens`` are summarized hierarchically: speaker-turn aligned chunks
+        are summarized in parallel and the partial summaries are combined in a
+        final pass. A transcript summarized before with the same model and
+        prompts is answered from the summary cache without calling the LLM.
+        """
+        key = None
+        if self.db is not None:
+            key = (transcript_hash(transcript), self.model, self.prompt_version)
+            summary = self.db.get_cached_summary(*key)
+            if summary is not None:
+                if on_text:
+                    on_text(summary)
+                return summary
+
+        start = time.perf_counter()
+        summary = self._summarize(transcript, on_text)
+        if key:
+            self.db.save_cached_summary(
+                *key, summary, time.perf_counter() - start, self.cache_max_entries
+            )
+        return summary
+
+    def compact(self, transcript: List[TranscriptSegment]) -> List[TranscriptSegment]:
+        """Transcript as submitted to the LLM, logging the prompt tokens saved by compaction"""
+        if not self.compaction:
+            return transcript
+        compacted = compact_transcript(transcript, self.min_confidence, self.fillers)
+        before = sum(estimate_tokens(f"{seg.speaker}: {seg.text}") for seg in transcript)
+        after = sum(estimate_tokens(f"{seg.speaker}: {seg.text}") for seg in compacted)
+        print(f"Compacted transcript from {len(transcript)} to {len(compacted)} segments, "
+              f"~{before} to ~{after} tokens ({1 - after / max(before, 1):.0%} fewer)")
+        return compacted
+
+    def _summarize(self, transcript: List[TranscriptSegment], on_text: Optional[Callable[[str], None]] = None) -> str:
+        from config.config import SUMMARY_PROMPT_TEMPLATE
+        transcript = self.compact(transcript)
         full_text = "\n".join([
             f"{seg.speaker}: {seg.text}" for seg in transcript
         ])
-        
-        prompt = f"""As an AI meeting assistant, analyze this meeting transcript and provide:
-1. Key Topics: Main subjects that were introduced or discussed
-2. Context: Any background information or setup provided
-3. Next Steps: Suggested follow-ups based on the topics mentioned
-
-Keep the summary concise and focus on the introductory nature of the discussion if it was brief.
 
-Meeting Transcript:
-{full_text}"""
+        if estimate_tokens(full_text) > self.chunk_tokens:
+            chunks = chunk_transcript(transcript, self.chunk_tokens)
+            print(f"Summarizing long transcript in {len(chunks)} chunks")
+            return self._summarize_chunks(chunks, on_text)
+        return self._generate(SUMMARY_PROMPT_TEMPLATE.format(transcript=full_text), on_text)
 
+    def generate_summary(self, transcript: List[TranscriptSegment]) -> str:
+        """Generate a meeting summary, returning an error message instead of raising"""
         try:
-            response = requests.post(
-                self.api_url,
-                headers={'Content-Type': 'application/json'},
-                json={
-                    "model": "llama3:latest",
-                    "prompt": prompt,
-                    "stream": False
-                },
-                timeout=self.timeout
-            )
-            
-            response.raise_for_status()
-            return response.json()["response"]
-            
+            return self.stream_summary(transcript)
         except requests.Timeout:
-            return "Error: Summary generation timed out after 30 seconds"
+            return "Error: Summary generation timed out"
         except requests.RequestException as e:
             return f"Error generating summary: {str(e)}"
         except Exception as e:
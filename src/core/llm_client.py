@@ -0,0 +1,489 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Status codes worth retrying: rate limiting and a busy or restarting server
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Weight of the newest request in a backend's moving latency average
+LATENCY_SMOOTHING = 0.3
+
+# Seconds between checks for a free backend slot while a coroutine waits for one
+SLOT_POLL_INTERVAL = 0.05
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed request may succeed if repeated"""
+    # ChunkedEncodingError: the server dropped the connection in the middle of a streamed reply
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRY_STATUS
+    return False
+
+
+def _requests_error(error: Exception) -> requests.RequestException:
+    """The requests exception matching an httpx one, so sync and async requests fail alike"""
+    import httpx
+    if isinstance(error, httpx.HTTPStatusError):
+        # is_transient only reads response.status_code, which httpx responses have too
+        return requests.HTTPError(str(error), response=error.response)
+    if isinstance(error, httpx.TimeoutException):
+        return requests.Timeout(str(error))
+    if isinstance(error, httpx.RemoteProtocolError):
+        return requests.exceptions.ChunkedEncodingError(str(error))
+    if isinstance(error, httpx.TransportError):
+        return requests.ConnectionError(str(error))
+    return requests.RequestException(str(error))
+
+
+class LLMBackend:
+    """One Ollama server with a limit on concurrent requests, its health and latency"""
+
+    def __init__(self, url: str, concurrency: int):
+        self.url = url
+        self.concurrency = concurrency
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.in_flight = 0
+        self.queued = 0
+        self.healthy = True
+        self.requests = 0
+        self.errors = 0
+        self.latency: Optional[float] = None
+        # time.monotonic() of this process's last successful request or warm-up
+        self.last_used: Optional[float] = None
+
+    @property
+    def health_url(self) -> str:
+        """Ollama's model list, cheap to fetch and only served by a running server"""
+        return self.url.split('/api/')[0].rstrip('/') + '/api/tags'
+
+    @property
+    def load(self) -> float:
+        return (self.in_flight + self.queued) / self.concurrency
+
+    def stats(self) -> dict:
+        return {
+            'url': self.url,
+            'healthy': self.healthy,
+            'concurrency': self.concurrency,
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'requests': self.requests,
+            'errors': self.errors,
+            'latency_seconds': self.latency
+        }
+
+
+class LLMBackendPool:
+    """Routes requests to the least-loaded healthy backend.
+
+    Each backend admits at most ``concurrency`` requests from this process; further
+    requests queue for its slots, and the queue counts towards its load. A backend
+    whose request fails with a transient error is marked unhealthy and skipped until
+    a background health check finds it answering again. Limits and stats are per
+    process; with a database, each health check also publishes the stats there.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence,
+        session: requests.Session,
+        concurrency: int,
+        health_check_interval: float,
+        db=None
+    ):
+        self.backends = [
+            LLMBackend(*b) if isinstance(b, (tuple, list)) else LLMBackend(b, concurrency)
+            for b in backends
+        ]
+        if not self.backends:
+            raise ValueError("No LLM backends configured")
+        self.session = session
+        self.health_check_interval = health_check_interval
+        self.db = db
+        self.process = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        self._health_thread = None
+        # Ties go round-robin, starting at a different backend in each process so
+        # worker processes summarizing different meetings don't all pick the first
+        self._turn = os.getpid()
+
+    def _choose(self, exclude: Sequence[LLMBackend]) -> LLMBackend:
+        """Queue for the least-loaded healthy backend not in ``exclude``"""
+        self._start_health_checks()
+        with self._lock:
+            candidates = [b for b in self.backends if b not in exclude] or self.backends
+            # With every candidate down, try them anyway rather than fail without asking
+            candidates = [b for b in candidates if b.healthy] or candidates
+            n = len(self.backends)
+            backend = min(candidates, key=lambda b: (b.load, (self.backends.index(b) - self._turn) % n))
+            self._turn += 1
+            backend.queued += 1
+        return backend
+
+    def _admit(self, backend: LLMBackend, acquired: bool) -> LLMBackend:
+        with self._lock:
+            backend.queued -= 1
+            if acquired:
+                backend.in_flight += 1
+        return backend
+
+    def acquire(self, exclude: Sequence[LLMBackend] = ()) -> LLMBackend:
+        """Wait for a slot on the least-loaded healthy backend not in ``exclude``"""
+        backend = self._choose(exclude)
+        backend.slots.acquire()
+        return self._admit(backend, True)
+
+    async def acquire_async(self, exclude: Sequence[LLMBackend] = ()) -> LLMBackend:
+        """``acquire`` for coroutines: wait for the slot without blocking the event loop"""
+        backend = self._choose(exclude)
+        try:
+            while not backend.slots.acquire(blocking=False):
+                await asyncio.sleep(SLOT_POLL_INTERVAL)
+        except BaseException:
+            # Cancelled while queued
+            self._admit(backend, False)
+            raise
+        return self._admit(backend, True)
+
+    def release(self, backend: LLMBackend, seconds: float, error: Optional[Exception] = None):
+        """Return the slot and record the outcome of the request"""
+        with self._lock:
+            backend.in_flight -= 1
+            if error is None:
+                backend.requests += 1
+                backend.healthy = True
+                backend.last_used = time.monotonic()
+                backend.latency = seconds if backend.latency is None else (
+                    LATENCY_SMOOTHING * seconds + (1 - LATENCY_SMOOTHING) * backend.latency
+                )
+            else:
+                backend.errors += 1
+                if is_transient(error):
+                    backend.healthy = False
+        backend.slots.release()
+
+    def alternatives(self, tried: Sequence[LLMBackend]) -> bool:
+        """Whether a healthy backend remains that a request hasn't tried"""
+        return any(b.healthy and b not in tried for b in self.backends)
+
+    def claim_idle(self, idle_after: float) -> List[LLMBackend]:
+        """Backends without a request from this process for ``idle_after`` seconds.
+
+        They are marked used, so concurrent callers don't warm the same backend twice.
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = [b for b in self.backends if b.last_used is None or now - b.last_used >= idle_after]
+            for backend in idle:
+                backend.last_used = now
+        return idle
+
+    def check_health(self):
+        """Probe every backend and publish the stats"""
+        for backend in self.backends:
+            try:
+                self.session.get(backend.health_url, timeout=5).raise_for_status()
+                healthy = True
+            except requests.RequestException:
+                healthy = False
+            if healthy != backend.healthy:
+                print(f"LLM backend {backend.url} is {'back up' if healthy else 'down'}")
+            backend.healthy = healthy
+        if self.db is not None:
+            try:
+                self.db.save_llm_backend_stats(self.process, self.stats())
+            except Exception as e:
+                print(f"Could not save LLM backend stats: {e}")
+
+    def _health_loop(self):
+        while True:
+            time.sleep(self.health_check_interval)
+            self.check_health()
+
+    def _start_health_checks(self):
+        if self._health_thread is None:
+            with self._lock:
+                if self._health_thread is None:
+                    self._health_thread = threading.Thread(
+                        target=self._health_loop, daemon=True, name="llm-health-check"
+                    )
+                    self._health_thread.start()
+
+    @property
+    def capacity(self) -> int:
+        """Concurrent requests all backends admit together"""
+        return sum(b.concurrency for b in self.backends)
+
+    def stats(self) -> List[dict]:
+        with self._lock:
+            return [b.stats() for b in self.backends]
+
+
+class OllamaClient:
+    """Client for Ollama's generate API over a pooled keep-alive session.
+
+    One ``requests.Session`` (and its connection pool) is shared by every request
+    and thread of the process. Requests are spread over the configured backends by
+    an ``LLMBackendPool``; a transient failure fails over to another healthy backend
+    at once, and is retried with exponential backoff once all have been tried.
+    Every request asks Ollama to keep the model loaded for ``keep_alive`` so
+    consecutive summaries don't pay a model load.
+    """
+
+    def __init__(
+        self,
+        api_url: Optional[str] = None,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        keep_alive: Optional[str] = None,
+        retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        pool_size: Optional[int] = None,
+        backends: Optional[Sequence] = None,
+        db=None
+    ):
+        from config.config import (
+            LLM_MODEL, LLM_TIMEOUT, LLM_KEEP_ALIVE, LLM_RETRIES, LLM_RETRY_BACKOFF, LLM_POOL_SIZE,
+            LLM_BACKENDS, LLM_BACKEND_CONCURRENCY, LLM_HEALTH_CHECK_INTERVAL
+        )
+        self.model = model or LLM_MODEL
+        self.timeout = timeout or LLM_TIMEOUT
+        self.keep_alive = keep_alive or LLM_KEEP_ALIVE
+        self.retries = LLM_RETRIES if retries is None else retries
+        self.backoff = LLM_RETRY_BACKOFF if backoff is None else backoff
+        self.pool_size = pool_size or LLM_POOL_SIZE
+
+        self.session = requests.Session()
+        self.session.headers.update({'Content-Type': 'application/json'})
+        backends = backends or ([api_url] if api_url else LLM_BACKENDS)
+        # One connection pool per backend host
+        adapter = HTTPAdapter(pool_connections=len(backends), pool_maxsize=self.pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.pool = LLMBackendPool(backends, self.session, LLM_BACKEND_CONCURRENCY, LLM_HEALTH_CHECK_INTERVAL, db)
+        self.api_url = self.pool.backends[0].url
+
+    def _post(
+        self,
+        backend: LLMBackend,
+        payload: dict,
+        timeout: float,
+        on_text: Optional[Callable[[str], None]]
+    ) -> str:
+        stream = on_text is not None
+        with self.session.post(
+            backend.url,
+            json={**payload, "model": self.model, "stream": stream, "keep_alive": self.keep_alive},
+            timeout=timeout,
+            stream=stream
+        ) as response:
+            response.raise_for_status()
+            if not stream:
+                return response.json().get("response", "")
+
+            text = ""
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise requests.RequestException(chunk["error"])
+                if chunk.get("response"):
+                    text += chunk["response"]
+                    on_text(text)
+                if chunk.get("done"):
+                    break
+            return text
+
+    def generate(
+        self,
+        prompt: str,
+        on_text: Optional[Callable[[str], None]] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None
+    ) -> str:
+        """Complete ``prompt``; with ``on_text``, stream and report the text so far as it grows.
+
+        A retried streaming request starts over, so ``on_text`` sees the text restart.
+        Failing over to an untried backend doesn't use up one of the ``retries``.
+        """
+        retries = self.retries if retries is None else retries
+        attempt, tried = 0, []
+        while True:
+            backend = self.pool.acquire(exclude=tried)
+            start = time.perf_counter()
+            try:
+                text = self._post(backend, {"prompt": prompt}, timeout or self.timeout, on_text)
+            except requests.RequestException as e:
+                self.pool.release(backend, time.perf_counter() - start, e)
+                if not is_transient(e):
+                    raise
+                tried.append(backend)
+                if self.pool.alternatives(tried):
+                    print(f"LLM backend {backend.url} failed ({e}), failing over...")
+                    continue
+                if attempt == retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                print(f"LLM request failed ({e}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+                attempt, tried = attempt + 1, []
+                continue
+            except BaseException as e:
+                self.pool.release(backend, time.perf_counter() - start, e)
+                raise
+            self.pool.release(backend, time.perf_counter() - start)
+            return text
+
+    def warm_up(self, background: bool = False, idle_after: float = 0):
+        """Load the model into memory on every backend (an empty prompt only loads it) and keep it resident.
+
+        With ``idle_after``, only backends this process hasn't used for that many
+        seconds are asked; the others still have the model loaded.
+        """
+        threads = [
+            threading.Thread(target=self._warm_up, args=(backend,), daemon=True, name="llm-warm-up")
+            for backend in self.pool.claim_idle(idle_after)
+        ]
+        for thread in threads:
+            thread.start()
+        if not background:
+            for thread in threads:
+                thread.join()
+
+    def _warm_up(self, backend: LLMBackend):
+        start = time.perf_counter()
+        try:
+            # Loading a large model can take much longer than a normal request
+            self._post(backend, {"prompt": ""}, max(self.timeout, 120), None)
+            print(f"LLM {self.model} ready on {backend.url} in {time.perf_counter() - start:.1f}s")
+        except requests.RequestException as e:
+            backend.last_used = None
+            print(f"Could not warm up LLM {self.model} on {backend.url}: {e}")
+
+    def stats(self) -> List[dict]:
+        """Load, health and latency of each backend as seen from this process"""
+        return self.pool.stats()
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncOllamaClient:
+    """``OllamaClient`` for coroutines, over a pooled keep-alive ``httpx.AsyncClient``.
+
+    Shares the settings and backend pool of a sync client, so both count towards
+    the same per-backend limits, health and idle tracking, and follows the same
+    failover, backoff and keep-alive policy. Errors are raised as the requests
+    exceptions the sync client raises. The HTTP pool belongs to the event loop
+    that first uses it.
+    """
+
+    def __init__(self, client: Optional[OllamaClient] = None):
+        import httpx
+        self.client = client or OllamaClient()
+        self.pool = self.client.pool
+        self.http = httpx.AsyncClient(
+            headers={'Content-Type': 'application/json'},
+            limits=httpx.Limits(
+                max_connections=self.client.pool_size * len(self.pool.backends),
+                max_keepalive_connections=self.client.pool_size * len(self.pool.backends)
+            )
+        )
+
+    async def _post(
+        self,
+        backend: LLMBackend,
+        payload: dict,
+        timeout: float,
+        on_text: Optional[Callable[[str], None]]
+    ) -> str:
+        import httpx
+        stream = on_text is not None
+        try:
+            async with self.http.stream(
+                "POST",
+                backend.url,
+                json={**payload, "model": self.client.model, "stream": stream, "keep_alive": self.client.keep_alive},
+                timeout=timeout
+            ) as response:
+                response.raise_for_status()
+                if not stream:
+                    return json.loads(await response.aread()).get("response", "")
+
+                text = ""
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise requests.RequestException(chunk["error"])
+                    if chunk.get("response"):
+                        text += chunk["response"]
+                        on_text(text)
+                    if chunk.get("done"):
+                        break
+                return text
+        except httpx.HTTPError as e:
+            raise _requests_error(e) from e
+
+    async def generate(
+        self,
+        prompt: str,
+        on_text: Optional[Callable[[str], None]] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None
+    ) -> str:
+        """``OllamaClient.generate`` without blocking the event loop"""
+        retries = self.client.retries if retries is None else retries
+        attempt, tried = 0, []
+        while True:
+            backend = await self.pool.acquire_async(exclude=tried)
+            start = time.perf_counter()
+            try:
+                text = await self._post(backend, {"prompt": prompt}, timeout or self.client.timeout, on_text)
+            except requests.RequestException as e:
+                self.pool.release(backend, time.perf_counter() - start, e)
+                if not is_transient(e):
+                    raise
+                tried.append(backend)
+                if self.pool.alternatives(tried):
+                    print(f"LLM backend {backend.url} failed ({e}), failing over...")
+                    continue
+                if attempt == retries:
+                    raise
+                delay = self.client.backoff * 2 ** attempt
+                print(f"LLM request failed ({e}), retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+                attempt, tried = attempt + 1, []
+                continue
+            except BaseException as e:
+                self.pool.release(backend, time.perf_counter() - start, e)
+                raise
+            self.pool.release(backend, time.perf_counter() - start)
+            return text
+
+    async def warm_up(self, idle_after: float = 0):
+        """``OllamaClient.warm_up``, with the backends asked concurrently"""
+        await asyncio.gather(*(self._warm_up(backend) for backend in self.pool.claim_idle(idle_after)))
+
+    async def _warm_up(self, backend: LLMBackend):
+        start = time.perf_counter()
+        try:
+            await self._post(backend, {"prompt": ""}, max(self.client.timeout, 120), None)
+            print(f"LLM {self.client.model} ready on {backend.url} in {time.perf_counter() - start:.1f}s")
+        except requests.RequestException as e:
+            backend.last_used = None
+            print(f"Could not warm up LLM {self.client.model} on {backend.url}: {e}")
+
+    async def aclose(self):
+        await self.http.aclose()
@@ -0,0 +1,106 @@
+from dataclasses import dataclass, replace
+from typing import List, Optional
+
+
+@dataclass(frozen=True)
+class PerformanceProfile:
+    """Transcription and diarization parameters that are chosen together"""
+    name: str
+    whisper_model: str
+    compute_type: str
+    beam_size: int
+    vad_filter: bool
+    batch_size: int  # Whisper batch size over VAD chunks (30 s clips without VAD); 0 decodes sequentially
+    segment_length: float  # seconds per speaker-embedding window
+    max_speakers: int
+    min_speakers: int
+    speaker_count_method: str
+    distance_threshold: float
+    max_centroids: int
+    metric: str
+    linkage: str
+
+    def transcription_key(self) -> str:
+        """Configuration the Whisper output depends on"""
+        from .cache import config_key
+        return config_key('whisper', self.whisper_model, self.compute_type, self.beam_size,
+                          self.vad_filter, self.batch_size)
+
+    def batched_options(self, num_samples: int, sample_rate: int = 16000) -> dict:
+        """faster-whisper batched pipeline arguments that honour ``vad_filter``.
+
+        Without VAD the pipeline needs the regions to decode, so the audio is cut
+        into consecutive 30 s clips (sample offsets) instead of speech regions.
+        """
+        if self.vad_filter:
+            return {'vad_filter': True}
+        step = 30 * sample_rate
+        return {
+            'vad_filter': False,
+            'clip_timestamps': [
+                {'start': start, 'end': min(start + step, num_samples)}
+                for start in range(0, num_samples, step)
+            ]
+        }
+
+    def embedding_key(self) -> str:
+        """Configuration the speaker embeddings depend on"""
+        from .cache import config_key
+        return config_key('speechbrain/spkrec-ecapa-voxceleb', self.segment_length)
+
+    def clustering_key(self) -> str:
+        """Configuration the cluster labels depend on (includes the embeddings')"""
+        from .cache import config_key
+        return config_key(self.embedding_key(), self.max_speakers, self.min_speakers,
+                          self.speaker_count_method, self.distance_threshold, self.max_centroids,
+                          self.metric, self.linkage)
+
+    def make_clusterer(self):
+        from .speakers import SpeakerClusterer
+        return SpeakerClusterer(
+            max_speakers=self.max_speakers,
+            min_speakers=self.min_speakers,
+            max_centroids=self.max_centroids,
+            method=self.speaker_count_method,
+            distance_threshold=self.distance_threshold,
+            metric=self.metric,
+            linkage=self.linkage
+        )
+
+
+def _defaults(name: str) -> PerformanceProfile:
+    from config.config import (
+        WHISPER_MODEL, COMPUTE_TYPE, SEGMENT_LENGTH, MAX_SPEAKERS, MIN_SPEAKERS,
+        SPEAKER_COUNT_METHOD, SPEAKER_DISTANCE_THRESHOLD, SPEAKER_MAX_CENTROIDS,
+        SPEAKER_CLUSTERING_METRIC, SPEAKER_CLUSTERING_LINKAGE, WHISPER_BATCH_SIZE
+    )
+    return PerformanceProfile(
+        name=name,
+        whisper_model=WHISPER_MODEL,
+        compute_type=COMPUTE_TYPE,
+        beam_size=5,
+        vad_filter=False,
+        batch_size=WHISPER_BATCH_SIZE,
+        segment_length=SEGMENT_LENGTH,
+        max_speakers=MAX_SPEAKERS,
+        min_speakers=MIN_SPEAKERS,
+        speaker_count_method=SPEAKER_COUNT_METHOD,
+        distance_threshold=SPEAKER_DISTANCE_THRESHOLD,
+        max_centroids=SPEAKER_MAX_CENTROIDS,
+        metric=SPEAKER_CLUSTERING_METRIC,
+        linkage=SPEAKER_CLUSTERING_LINKAGE
+    )
+
+
+def profile_names() -> List[str]:
+    from config.config import PERFORMANCE_PROFILES
+    return list(PERFORMANCE_PROFILES)
+
+
+def get_profile(name: Optional[str] = None) -> PerformanceProfile:
+    """Resolve a named profile from config (DEFAULT_PROFILE when name is empty)"""
+    from config.config import PERFORMANCE_PROFILES, DEFAULT_PROFILE
+    name = name or DEFAULT_PROFILE
+    if name not in PERFORMANCE_PROFILES:
+        raise ValueError(f"Unknown performance profile: {name}")
+    return replace(_defaults(name), **PERFORMANCE_PROFILES[name])
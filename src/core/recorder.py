@@ -1,21 +1,43 @@
 import hashlib
-import wave
-from datetime import datetime
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Callable
-from .audio import AudioProcessor
+import numpy as np
+import requests
+from .ingest import ingest_array, ingest_file, audio_content_hash, file_content_hash
+from .profiles import get_profile
+from .cache import StageCache
+from .speakers import (
+    SpeakerTimeline, assign_speakers, relabel_segments, rename_speakers, speaker_name, speaker_label,
+    cluster_centroids, save_speaker_embeddings, load_speaker_embeddings, windows_from_array
+)
+from .voiceprints import VoiceprintIndex
 from .db import DatabaseManager, Meeting
 from .llm import LLMProcessor
 from .email import EmailService
 
+# Separates partial summary text from the reason generation stopped
+SUMMARY_INTERRUPTED_NOTE = "\n\n*Summary interrupted: "
+# Starts a failed summary that has no text worth keeping
+SUMMARY_ERROR_PREFIX = "Error"
+
+
 class MeetingRecorder:
-    def __init__(self):
+    def __init__(self, role: Optional[str] = None):
+        from config.config import PROCESS_ROLE
+        self.role = role or PROCESS_ROLE
+        if self.role not in ('all', 'web', 'worker'):
+            raise ValueError(f"Unknown process role: {self.role}")
         self.db = DatabaseManager()
-        self.audio_processor = AudioProcessor()
-        self.llm_processor = LLMProcessor()
+        self.voiceprints = VoiceprintIndex(self.db)
+        self._audio_processor = None
+        self.llm_processor = LLMProcessor(db=self.db)
         self.current_recording = None
         self.recording_start_time = None
         self.status_callback = None
+        self.last_meeting = None
         
         # Initialize email service if credentials are available
         try:
@@ -24,17 +46,66 @@ class MeetingRecorder:
             print("Email credentials not found. Email functionality will be disabled.")
             self.email_service = None
 
+    @property
+    def web_only(self) -> bool:
+        return self.role == 'web'
+
+    @property
+    def audio_processor(self):
+        """AudioProcessor, imported and built on first use so the ML stack stays unloaded until needed"""
+        if self._audio_processor is None:
+            if self.web_only:
+                raise RuntimeError("Audio processing is not available in the web-only role")
+            from .audio import AudioProcessor
+            self._audio_processor = AudioProcessor()
+        return self._audio_processor
+
+    @property
+    def processing_backend(self):
+        """Shared inference server client when configured, otherwise the in-process AudioProcessor"""
+        from config.config import INFERENCE_SERVER_ADDRESS, INFERENCE_AUTHKEY
+        if INFERENCE_SERVER_ADDRESS:
+            from .inference import InferenceClient
+            return InferenceClient(INFERENCE_SERVER_ADDRESS, INFERENCE_AUTHKEY)
+        return self.audio_processor
+
+    def warm_up(self):
+        """Load the speech models and the summary model ahead of the first processing job"""
+        from config.config import INFERENCE_SERVER_ADDRESS
+        self.llm_processor.warm_up(background=True)
+        if INFERENCE_SERVER_ADDRESS:
+            return
+        self.audio_processor.warm_up()
+
+    def list_input_devices(self):
+        """Server-side input devices (none in the web-only role)"""
+        if self.web_only:
+            return []
+        return self.audio_processor.list_input_devices()
+
+    def partial_transcript(self):
+        """Segments transcribed so far by an in-progress live recording"""
+        processor = self._audio_processor
+        if processor is None or processor.live is None:
+            return []
+        return processor.live.partial_transcript()
+
     def start_recording(
         self, 
         title: str = None,
-        status_callback: Optional[Callable] = None
+        status_callback: Optional[Callable] = None,
+        live: Optional[bool] = None
     ) -> bool:
-        """Start recording a new meeting"""
+        """Start recording a new meeting (transcribed live when enabled)"""
         try:
+            if live is None:
+                from config.config import LIVE_TRANSCRIPTION
+                live = LIVE_TRANSCRIPTION
             self.status_callback = status_callback
             self.recording_start_time = datetime.now()
             self.title = title
-            self.current_recording = self.audio_processor.start_recording()
+            self.last_meeting = None
+            self.current_recording = self.audio_processor.start_recording(live=live)
             if status_callback:
                 status_callback("Recording started...")
             return True
@@ -50,8 +121,28 @@ class MeetingRecorder:
             raise RuntimeError("No active recording")
 
         try:
-            # Stop recording and get audio path
-            audio_path = self.audio_processor.stop_recording(self.current_recording)
+            # Stop recording and convert the capture to the canonical storage format
+            captured_path = self.audio_processor.stop_recording(self.current_recording)
+            ingested = ingest_file(captured_path, self.audio_processor.audio_dir)
+            duration = ingested.buffer.duration
+            ingested.buffer.close()
+            audio_path = ingested.path
+
+            # In live mode only the tail chunk and speaker assignment remain
+            cache = StageCache(self.db, ingested.audio_hash)
+            transcript = self.audio_processor.finish_live_transcription(self.status_callback, cache)
+            if transcript is not None:
+                self.last_meeting = self._save_processed_meeting(
+                    audio_path,
+                    transcript,
+                    duration=duration,
+                    title=self.title,
+                    original_sample_rate=ingested.original_sample_rate,
+                    profile=self.audio_processor.default_profile.name,
+                    audio_hash=ingested.audio_hash,
+                    cache=cache,
+                    status_callback=self.status_callback
+                )
 
             # Clear recording state
             self.current_recording = None
@@ -72,57 +163,289 @@ class MeetingRecorder:
         duration: float, 
         title: str = None, 
         status_callback: Optional[Callable] = None, 
-        audio_data=None
+        audio_data=None,
+        profile: Optional[str] = None,
+        on_saved: Optional[Callable[[Meeting], None]] = None,
+        email: Optional[str] = None,
+        audio_path: Optional[str] = None
     ) -> Meeting:
-        """Record and process a meeting with provided audio data"""
-        if not audio_data:
+        """Record and process a meeting from ``audio_data`` (samples, rate) or an audio file.
+
+        A file at ``audio_path`` (any format soundfile reads) is decoded once,
+        block by block, into the canonical recording; it is left in place. ``on_saved``
+        is called once the meeting exists. Its summary is generated afterwards by
+        a queued post-processing job, which emails ``email`` when done.
+        """
+        if not audio_data and not audio_path:
             raise ValueError("Audio data is required")
+        profile = get_profile(profile).name
 
-        audio_array, sample_rate = audio_data
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = self.audio_processor.audio_dir / f"meeting_{timestamp}.wav"
-        
-        with wave.open(str(filename), 'wb') as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(sample_rate)
-            wf.writeframes(audio_array.tobytes())
-        
-        # Process audio
-        transcript = self.audio_processor.process_audio(str(filename), status_callback)
+        # The same audio processed with the same profile (e.g. a retried upload) is returned as is
+        if audio_path:
+            audio_hash = file_content_hash(audio_path)
+        else:
+            audio_array, sample_rate = audio_data
+            audio_hash = audio_content_hash(audio_array, sample_rate)
+        existing = self.db.find_meeting_by_hash(audio_hash, profile)
+        if existing and Path(existing.audio_path).exists():
+            if status_callback:
+                status_callback("Duplicate recording, reusing existing meeting...")
+            return existing
+        cache = StageCache(self.db, audio_hash)
         
-        if status_callback:
-            status_callback("Generating summary...")
+        # Store as canonical 16 kHz mono and process straight from the resampled samples
+        from config.config import RECORDINGS_DIR
+        if audio_path:
+            ingested = ingest_file(audio_path, RECORDINGS_DIR, remove_source=False, audio_hash=audio_hash)
+        else:
+            ingested = ingest_array(audio_array, sample_rate, RECORDINGS_DIR, audio_hash=audio_hash)
+        filename = ingested.path
+        with ingested.buffer as audio:
+            transcript = self.processing_backend.process_audio(audio, status_callback, profile, cache)
         
+        return self._save_processed_meeting(
+            filename,
+            transcript,
+            duration=duration,
+            title=title,
+            original_sample_rate=ingested.original_sample_rate,
+            profile=profile,
+            audio_hash=audio_hash,
+            cache=cache,
+            status_callback=status_callback,
+            on_saved=on_saved,
+            email=email
+        )
+
+    def _save_processed_meeting(
+        self,
+        audio_path: str,
+        transcript,
+        duration: float,
+        title: str = None,
+        original_sample_rate: Optional[int] = None,
+        profile: Optional[str] = None,
+        audio_hash: Optional[str] = None,
+        cache: Optional[StageCache] = None,
+        status_callback: Optional[Callable] = None,
+        on_saved: Optional[Callable[[Meeting], None]] = None,
+        email: Optional[str] = None
+    ) -> Meeting:
+        """Store a transcribed recording as a meeting and queue its summary.
+
+        The meeting is saved with its summary pending, so the transcript is
+        available immediately and does not depend on the LLM being up.
+        """
         # Generate meeting ID
         meeting_id = hashlib.md5(
-            f"{filename}{datetime.now().isoformat()}".encode()
+            f"{audio_path}{datetime.now().isoformat()}".encode()
         ).hexdigest()
         
+        # Name recurring speakers before the summary is written
+        speakers = self._cached_speakers(profile, cache)
+        if speakers:
+            embeddings, windows, labels = speakers
+            self._identify_speakers(transcript, embeddings, labels)
+        
         # Create meeting object
         meeting = Meeting(
             id=meeting_id,
             title=title or f"Meeting {datetime.now().strftime('%Y-%m-%d %H:%M')}",
             date=datetime.now(),
             duration=duration,
-            audio_path=str(filename),
-            transcript=transcript
+            audio_path=str(audio_path),
+            transcript=transcript,
+            original_sample_rate=original_sample_rate,
+            profile=profile,
+            audio_hash=audio_hash,
+            embeddings_path=self._persist_speaker_embeddings(meeting_id, *speakers) if speakers else None,
+            summary="",
+            summary_status='pending'
         )
         
-        # Generate summary
-        meeting.summary = self.llm_processor.generate_summary(transcript)
-        
         # Save to database
         if status_callback:
             status_callback("Saving meeting...")
         self.db.save_meeting(meeting)
+        if on_saved:
+            on_saved(meeting)
         
-        # Send email if recipient is provided
         if status_callback:
-            status_callback("Sending email notification...")
+            status_callback("Queueing summary...")
+        self.queue_summary(meeting.id, email)
         
         return meeting
 
+    def queue_summary(self, meeting_id: str, email: Optional[str] = None, attempt: int = 1, delay: float = 0):
+        """Queue summarization of a saved meeting as a background job.
+
+        The current summary text stays visible until the job streams a new one.
+        """
+        self.db.update_meeting_summary_status(meeting_id, 'pending')
+        return self.db.create_job('', {
+            'task': 'summarize',
+            'meeting_id': meeting_id,
+            'email': email,
+            'attempt': attempt
+        }, not_before=datetime.now() + timedelta(seconds=delay) if delay else None)
+
+    def summarize_meeting(self, meeting_id: str, status_callback: Optional[Callable] = None) -> Meeting:
+        """Generate and store a meeting's summary; its summary_status tells whether it succeeded"""
+        meeting = self.db.get_meeting(meeting_id)
+        if not meeting:
+            raise ValueError(f"Meeting {meeting_id} not found")
+        if status_callback:
+            status_callback("Generating summary...")
+        meeting.summary_status = 'streaming'
+        self.db.update_meeting_summary_status(meeting.id, 'streaming')
+        self._summarize(meeting)
+        return meeting
+
+    def _summarize(self, meeting: Meeting):
+        """Generate the meeting's summary, writing partial text to the database as tokens arrive.
+
+        Transcripts summarized before come from the LLM processor's summary cache.
+        The previous summary is replaced once the first tokens arrive. If generation
+        fails, the partial text is kept, or the previous summary if none arrived.
+        """
+        from config.config import SUMMARY_FLUSH_INTERVAL
+        state = {'text': "", 'flushed': 0.0}
+        previous = (meeting.summary or "").split(SUMMARY_INTERRUPTED_NOTE)[0]
+        if previous.startswith(SUMMARY_ERROR_PREFIX):
+            previous = ""
+
+        def on_text(text):
+            state['text'] = text
+            now = time.monotonic()
+            if now - state['flushed'] >= SUMMARY_FLUSH_INTERVAL:
+                self.db.update_meeting_summary(meeting.id, text)
+                state['flushed'] = now
+
+        try:
+            meeting.summary = self.llm_processor.stream_summary(meeting.transcript, on_text)
+            meeting.summary_status = 'complete'
+        except Exception as e:
+            print(f"Error generating summary: {e}")
+            if state['text'] or previous:
+                meeting.summary = f"{state['text'] or previous}{SUMMARY_INTERRUPTED_NOTE}{e}*"
+            elif isinstance(e, requests.Timeout):
+                meeting.summary = f"{SUMMARY_ERROR_PREFIX}: Summary generation timed out"
+            else:
+                meeting.summary = f"{SUMMARY_ERROR_PREFIX} generating summary: {e}"
+            meeting.summary_status = 'failed'
+        self.db.update_meeting_summary(meeting.id, meeting.summary, meeting.summary_status)
+
+    def _cached_speakers(self, profile: Optional[str], cache: Optional[StageCache]):
+        """(embeddings, windows, labels) of the processed recording from the stage cache, or None"""
+        if cache is None:
+            return None
+        stages = get_profile(profile)
+        embeddings = cache.load('embeddings', stages.embedding_key())
+        windows = cache.load('windows', stages.embedding_key())
+        labels = cache.load('labels', stages.clustering_key())
+        if embeddings is None or windows is None or labels is None:
+            return None
+        if not len(embeddings) == len(windows) == len(labels):
+            return None
+        return embeddings, windows_from_array(windows), labels
+
+    def _identify_speakers(self, transcript, embeddings, labels):
+        """Rename clusters that match an enrolled voiceprint, in place"""
+        if not len(labels):
+            return transcript
+        names = self.voiceprints.match(cluster_centroids(embeddings, labels))
+        return rename_speakers(transcript, {
+            speaker_name(label): name for label, name in enumerate(names) if name
+        })
+
+    def _persist_speaker_embeddings(self, meeting_id: str, embeddings, windows, labels) -> Optional[str]:
+        """Write the meeting's window embeddings and cluster labels to a float16 sidecar"""
+        from config.config import EMBEDDINGS_DIR
+        EMBEDDINGS_DIR.mkdir(exist_ok=True, parents=True)
+        path = EMBEDDINGS_DIR / f"{meeting_id}.npz"
+        try:
+            save_speaker_embeddings(path, embeddings, windows, labels)
+        except Exception as e:
+            print(f"Error saving speaker embeddings: {e}")
+            return None
+        return str(path)
+
+    def _load_speakers(self, meeting: Meeting):
+        if not meeting.embeddings_path or not Path(meeting.embeddings_path).exists():
+            raise ValueError("No speaker embeddings stored for this meeting")
+        try:
+            profile = get_profile(meeting.profile)
+        except ValueError:
+            profile = get_profile()
+        embeddings, windows, labels = load_speaker_embeddings(meeting.embeddings_path)
+        return profile, embeddings, windows, labels
+
+    def recluster_meeting(
+        self,
+        meeting_id: str,
+        num_speakers: Optional[int] = None,
+        distance_threshold: Optional[float] = None
+    ) -> Meeting:
+        """Re-cluster a meeting's stored speaker embeddings and update its transcript labels.
+
+        ``num_speakers`` fixes the speaker count; ``distance_threshold`` switches to
+        threshold-based counting. Neither the audio nor any model is loaded.
+        """
+        meeting = self.db.get_meeting(meeting_id)
+        if not meeting:
+            raise ValueError(f"Meeting {meeting_id} not found")
+
+        start = time.perf_counter()
+        profile, embeddings, windows, _ = self._load_speakers(meeting)
+        overrides = {}
+        if num_speakers:
+            overrides.update(speaker_count_method='eigengap', max_speakers=num_speakers, min_speakers=num_speakers)
+        if distance_threshold is not None:
+            overrides.update(speaker_count_method='threshold', distance_threshold=distance_threshold)
+        labels = replace(profile, **overrides).make_clusterer().fit_predict(embeddings)
+        timeline = SpeakerTimeline(windows, labels)
+
+        # Word timings allow splitting segments at speaker changes; otherwise re-label whole segments
+        whisper_segments = None
+        if meeting.audio_hash:
+            whisper_segments = StageCache(self.db, meeting.audio_hash).load_segments(profile.transcription_key())
+        if whisper_segments:
+            meeting.transcript = assign_speakers(whisper_segments, timeline)
+        else:
+            meeting.transcript = relabel_segments(meeting.transcript, timeline)
+        self._identify_speakers(meeting.transcript, embeddings, labels)
+        save_speaker_embeddings(meeting.embeddings_path, embeddings, windows, labels)
+        self.db.update_meeting_transcript(meeting.id, meeting.transcript)
+        print(f"Re-clustered meeting {meeting.id} into {len(set(labels))} speakers "
+              f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return meeting
+
+    def confirm_speaker(self, meeting_id: str, speaker: str, name: str) -> Meeting:
+        """Rename a speaker in a meeting and enroll their voice in the voiceprint index"""
+        name = name.strip()
+        if not name:
+            raise ValueError("Speaker name is required")
+        meeting = self.db.get_meeting(meeting_id)
+        if not meeting:
+            raise ValueError(f"Meeting {meeting_id} not found")
+
+        profile, embeddings, windows, labels = self._load_speakers(meeting)
+        if labels is None:
+            # Sidecars written before labels were stored
+            labels = profile.make_clusterer().fit_predict(embeddings)
+        label = speaker_label(meeting.transcript, SpeakerTimeline(windows, labels), speaker)
+        if label is None:
+            raise ValueError(f"Speaker {speaker} not found in meeting")
+
+        self.voiceprints.enroll(
+            name,
+            cluster_centroids(embeddings, labels)[label],
+            weight=float(np.count_nonzero(labels == label))
+        )
+        rename_speakers(meeting.transcript, {speaker: name})
+        self.db.update_meeting_transcript(meeting.id, meeting.transcript)
+        return meeting
+
     def send_meeting_email(self, meeting_id: str, recipient_email: str) -> bool:
         """Send meeting details to specified email address"""
         meeting = self.db.get_meeting(meeting_id)
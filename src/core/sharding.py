@@ -0,0 +1,161 @@
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from .transcript import TimedSegment, clip_segments
+
+
+def shard_count(duration: float, max_shards: int, min_shard_seconds: float) -> int:
+    """Number of shards for a recording: one per ``min_shard_seconds``, capped by the worker count"""
+    if min_shard_seconds <= 0:
+        return max(1, max_shards)
+    return max(1, min(max_shards, int(duration // min_shard_seconds)))
+
+
+def quietest_point(samples: np.ndarray, lo: int, hi: int, sr: int, frame_seconds: float = 0.02) -> int:
+    """Centre of the lowest-energy frame in samples[lo:hi]"""
+    frame = max(1, int(frame_seconds * sr))
+    region = np.asarray(samples[lo:hi], dtype=np.float32)
+    n_frames = len(region) // frame
+    if n_frames == 0:
+        return (lo + hi) // 2
+    energy = np.square(region[:n_frames * frame].reshape(n_frames, frame)).mean(axis=1)
+    return lo + int(np.argmin(energy)) * frame + frame // 2
+
+
+def plan_shards(samples: np.ndarray, sr: int, n_shards: int, search_seconds: float) -> List[Tuple[int, int]]:
+    """Split into ``n_shards`` similar-sized spans, moving each cut to the quietest
+    point within ``search_seconds`` of the even split"""
+    num_samples = len(samples)
+    half = int(search_seconds * sr / 2)
+    cuts = [0]
+    for i in range(1, n_shards):
+        target = i * num_samples // n_shards
+        lo = max(cuts[-1] + 1, target - half)
+        hi = min(num_samples, target + half)
+        cuts.append(quietest_point(samples, lo, hi, sr) if hi > lo else target)
+    cuts.append(num_samples)
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+# Per-process state for the transcription shard pool
+_shard_models = {}
+_shard_threads = 1
+
+
+def _init_shard_worker(threads_per_worker: int):
+    global _shard_threads
+    _shard_threads = threads_per_worker
+
+
+def _shard_model(profile):
+    from faster_whisper import WhisperModel
+    key = (profile.whisper_model, profile.compute_type)
+    if key not in _shard_models:
+        _shard_models[key] = WhisperModel(
+            profile.whisper_model,
+            device="cpu",
+            compute_type=profile.compute_type,
+            cpu_threads=_shard_threads
+        )
+    return _shard_models[key]
+
+
+def _transcribe_shard(source, offset: float, lo: float, hi: float, profile) -> List[TimedSegment]:
+    """Transcribe one shard in a worker and return its own span in absolute time"""
+    if isinstance(source, tuple):
+        import soundfile as sf
+        path, start, stop = source
+        samples, _ = sf.read(path, start=start, stop=stop, dtype='float32')
+    else:
+        samples = source
+
+    model = _shard_model(profile)
+    if profile.batch_size > 0:
+        from faster_whisper import BatchedInferencePipeline
+        segments, _ = BatchedInferencePipeline(model=model).transcribe(
+            samples,
+            batch_size=profile.batch_size,
+            beam_size=profile.beam_size,
+            word_timestamps=True,
+            **profile.batched_options(len(samples))
+        )
+    else:
+        segments, _ = model.transcribe(
+            samples,
+            beam_size=profile.beam_size,
+            vad_filter=profile.vad_filter,
+            word_timestamps=True
+        )
+    return clip_segments(segments, offset, lo, hi)
+
+
+class ShardedTranscriber:
+    """Pool of worker processes, each with its own Whisper model, that transcribe
+    silence-aligned shards of one long recording in parallel.
+
+    Every shard is decoded with ``overlap_seconds`` of context on either side;
+    words are kept only by the shard whose span contains their midpoint, so the
+    stitched transcript has no duplicates at the seams.
+    """
+
+    def __init__(self, workers: int, threads_per_worker: int):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp.get_context('spawn'),
+            initializer=_init_shard_worker,
+            initargs=(threads_per_worker,)
+        )
+
+    @staticmethod
+    def _readable_source(audio) -> bool:
+        """Whether workers can read shards straight from the buffer's source file"""
+        if not audio.source_path:
+            return False
+        import soundfile as sf
+        try:
+            info = sf.info(str(audio.source_path))
+        except RuntimeError:
+            return False
+        return info.samplerate == audio.sample_rate and info.channels == 1 and info.frames == len(audio.samples)
+
+    def transcribe(
+        self,
+        audio,
+        profile,
+        n_shards: int,
+        overlap_seconds: float = 1.0,
+        search_seconds: float = 10.0,
+        report: Optional[Callable] = None
+    ) -> List[TimedSegment]:
+        sr = audio.sample_rate
+        num_samples = len(audio.samples)
+        overlap = int(overlap_seconds * sr)
+        shards = plan_shards(audio.samples, sr, n_shards, search_seconds)
+        from_file = self._readable_source(audio)
+
+        futures = {}
+        for index, (start, end) in enumerate(shards):
+            chunk_start = max(0, start - overlap)
+            chunk_end = min(num_samples, end + overlap)
+            if from_file:
+                source = (str(audio.source_path), chunk_start, chunk_end)
+            else:
+                source = np.array(audio.samples[chunk_start:chunk_end], dtype=np.float32)
+            hi = end / sr if index < len(shards) - 1 else float('inf')
+            future = self.executor.submit(_transcribe_shard, source, chunk_start / sr, start / sr, hi, profile)
+            futures[future] = index
+
+        results = [None] * len(shards)
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if report:
+                report(f"{done / len(shards):.0%} ({done}/{len(shards)} shards)")
+
+        return [segment for shard in results for segment in shard]
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
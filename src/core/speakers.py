@@ -0,0 +1,302 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .transcript import TranscriptSegment
+
+
+def window_bounds(num_samples: int, sr: int, segment_length: int) -> List[dict]:
+    """Start/end times (seconds) of each fixed-length analysis window"""
+    return [
+        {
+            'start': i / sr,
+            'end': min((i + segment_length) / sr, num_samples / sr)
+        }
+        for i in range(0, num_samples, segment_length)
+    ]
+
+
+class SpeakerClusterer:
+    """Two-stage speaker clustering that scales linearly with meeting length.
+
+    Stage one compresses the window embeddings into at most ``max_centroids``
+    MiniBatchKMeans centroids. Stage two runs agglomerative clustering on the
+    centroids only, with the speaker count estimated from the eigengap of the
+    centroid affinity matrix (or a cosine distance threshold).
+    """
+
+    def __init__(
+        self,
+        max_speakers: int = 3,
+        min_speakers: int = 1,
+        max_centroids: int = 256,
+        method: str = 'eigengap',
+        distance_threshold: float = 0.7,
+        metric: str = 'cosine',
+        linkage: str = 'average'
+    ):
+        if method not in ('eigengap', 'threshold'):
+            raise ValueError(f"Unknown speaker count method: {method}")
+        self.max_speakers = max_speakers
+        self.min_speakers = max(1, min_speakers)
+        self.max_centroids = max_centroids
+        self.method = method
+        self.distance_threshold = distance_threshold
+        self.metric = metric
+        self.linkage = linkage
+
+    @staticmethod
+    def _normalize(x: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(x, axis=1, keepdims=True)
+        return x / np.maximum(norms, 1e-8)
+
+    def _reduce(self, embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Compress embeddings to centroids; returns (centroids, weights, assignment)"""
+        n = embeddings.shape[0]
+        if n <= self.max_centroids:
+            return embeddings, np.ones(n), np.arange(n)
+
+        from sklearn.cluster import MiniBatchKMeans
+        kmeans = MiniBatchKMeans(
+            n_clusters=self.max_centroids,
+            batch_size=1024,
+            n_init=3,
+            random_state=0
+        )
+        assignment = kmeans.fit_predict(embeddings)
+        weights = np.bincount(assignment, minlength=self.max_centroids).astype(float)
+        keep = weights > 0
+        remap = np.cumsum(keep) - 1
+        centroids = self._normalize(kmeans.cluster_centers_[keep])
+        return centroids, weights[keep], remap[assignment]
+
+    def estimate_num_speakers(self, centroids: np.ndarray, weights: np.ndarray) -> int:
+        """Estimate the speaker count from the eigengap of the normalized Laplacian"""
+        n = centroids.shape[0]
+        upper = min(self.max_speakers, n)
+        if upper <= self.min_speakers:
+            return upper
+
+        affinity = np.clip(centroids @ centroids.T, 0.0, 1.0)
+        # Weight by centroid population so sparse outlier centroids don't count as speakers
+        sqrt_w = np.sqrt(weights / weights.sum())
+        affinity = affinity * np.outer(sqrt_w, sqrt_w)
+        degree = affinity.sum(axis=1)
+        d_inv_sqrt = 1.0 / np.sqrt(np.maximum(degree, 1e-12))
+        laplacian = np.eye(len(degree)) - d_inv_sqrt[:, None] * affinity * d_inv_sqrt[None, :]
+        # Search past max_speakers: with more voices than the cap the largest gap lies
+        # beyond it, and cutting the search short would pick a small spurious gap
+        eigvals = np.linalg.eigvalsh(laplacian)[:min(n, 2 * self.max_speakers + 1)]
+        if len(eigvals) == n:
+            # No eigenvalue follows the last; 1 is where unrelated windows sit, so n
+            # separate windows can still come out as n speakers
+            eigvals = np.append(eigvals, 1.0)
+
+        gaps = np.diff(eigvals)
+        k = int(np.argmax(gaps[self.min_speakers - 1:])) + self.min_speakers
+        return min(k, upper)
+
+    def fit_predict(self, embeddings: np.ndarray) -> np.ndarray:
+        """Assign a speaker index to every embedding, numbered by first appearance"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.shape[0] < 2:
+            return np.zeros(embeddings.shape[0], dtype=int)
+
+        embeddings = self._normalize(embeddings)
+        centroids, weights, assignment = self._reduce(embeddings)
+
+        from sklearn.cluster import AgglomerativeClustering
+        if self.method == 'threshold':
+            clustering = AgglomerativeClustering(
+                n_clusters=None,
+                distance_threshold=self.distance_threshold,
+                metric=self.metric,
+                linkage=self.linkage
+            )
+            centroid_labels = clustering.fit_predict(centroids)
+            # Respect the configured upper bound on speakers
+            if centroid_labels.max() + 1 > self.max_speakers:
+                centroid_labels = AgglomerativeClustering(
+                    n_clusters=self.max_speakers,
+                    metric=self.metric,
+                    linkage=self.linkage
+                ).fit_predict(centroids)
+        else:
+            n_speakers = self.estimate_num_speakers(centroids, weights)
+            if n_speakers <= 1:
+                centroid_labels = np.zeros(centroids.shape[0], dtype=int)
+            else:
+                centroid_labels = AgglomerativeClustering(
+                    n_clusters=n_speakers,
+                    metric=self.metric,
+                    linkage=self.linkage
+                ).fit_predict(centroids)
+
+        labels = centroid_labels[assignment]
+        _, first_seen = np.unique(labels, return_index=True)
+        order = np.argsort(np.argsort(first_seen))
+        return order[np.searchsorted(np.unique(labels), labels)]
+
+
+class SpeakerTimeline:
+    """Sorted interval index over diarization windows for vectorized lookups"""
+
+    def __init__(self, segments: List[dict], labels: np.ndarray):
+        self.starts = np.array([seg['start'] for seg in segments], dtype=np.float64)
+        self.ends = np.array([seg['end'] for seg in segments], dtype=np.float64)
+        self.labels = np.asarray(labels, dtype=int)
+
+    def speakers_at(self, times: np.ndarray) -> np.ndarray:
+        """Speaker index for each time point, or -1 outside every window"""
+        times = np.asarray(times, dtype=np.float64)
+        if not len(self.starts):
+            return np.full(times.shape, -1, dtype=int)
+        idx = np.searchsorted(self.starts, times, side='right') - 1
+        valid = (idx >= 0) & (times <= self.ends[np.clip(idx, 0, None)])
+        return np.where(valid, self.labels[np.clip(idx, 0, None)], -1)
+
+
+def speaker_name(label: int) -> str:
+    return f'Speaker_{label + 1}' if label >= 0 else "Unknown"
+
+
+def assign_speakers(whisper_segments, timeline: SpeakerTimeline, min_run_words: int = 2) -> List[TranscriptSegment]:
+    """Assign speakers per word in one vectorized pass and split segments at speaker changes.
+
+    Every word midpoint (or segment midpoint when Whisper returned no words) is
+    looked up against the diarization timeline at once. Runs shorter than
+    ``min_run_words`` are folded into the preceding run so a single
+    misattributed word does not fragment a sentence.
+    """
+    whisper_segments = list(whisper_segments)
+    mids = []
+    for segment in whisper_segments:
+        words = segment.words or []
+        if words:
+            mids.extend((w.start + w.end) / 2 for w in words)
+        else:
+            mids.append((segment.start + segment.end) / 2)
+    labels = timeline.speakers_at(np.array(mids))
+
+    transcript_segments = []
+    pos = 0
+    for segment in whisper_segments:
+        words = segment.words or []
+        if not words:
+            transcript_segments.append(TranscriptSegment(
+                speaker=speaker_name(labels[pos]),
+                text=segment.text.strip(),
+                start_time=segment.start,
+                end_time=segment.end,
+                confidence=segment.avg_logprob
+            ))
+            pos += 1
+            continue
+
+        word_labels = labels[pos:pos + len(words)]
+        pos += len(words)
+
+        # Group consecutive words by speaker: [label, first_word, last_word]
+        runs = []
+        for i, label in enumerate(word_labels):
+            if runs and runs[-1][0] == label:
+                runs[-1][2] = i
+            else:
+                runs.append([label, i, i])
+        merged = []
+        for run in runs:
+            if merged and (run[2] - run[1] + 1 < min_run_words or run[0] == merged[-1][0]):
+                merged[-1][2] = run[2]
+            else:
+                merged.append(run)
+        if len(merged) > 1 and merged[0][2] - merged[0][1] + 1 < min_run_words:
+            merged[1][1] = merged[0][1]
+            merged.pop(0)
+
+        if len(merged) == 1:
+            transcript_segments.append(TranscriptSegment(
+                speaker=speaker_name(merged[0][0]),
+                text=segment.text.strip(),
+                start_time=segment.start,
+                end_time=segment.end,
+                confidence=segment.avg_logprob
+            ))
+            continue
+
+        for label, first, last in merged:
+            run_words = words[first:last + 1]
+            transcript_segments.append(TranscriptSegment(
+                speaker=speaker_name(label),
+                text="".join(w.word for w in run_words).strip(),
+                start_time=run_words[0].start,
+                end_time=run_words[-1].end,
+                confidence=segment.avg_logprob
+            ))
+
+    return transcript_segments
+
+
+def relabel_segments(transcript: List[TranscriptSegment], timeline: SpeakerTimeline) -> List[TranscriptSegment]:
+    """Re-label stored transcript segments by the speaker at their midpoint"""
+    mids = np.array([(seg.start_time + seg.end_time) / 2 for seg in transcript])
+    labels = timeline.speakers_at(mids)
+    return [
+        TranscriptSegment(
+            speaker=speaker_name(label),
+            text=seg.text,
+            start_time=seg.start_time,
+            end_time=seg.end_time,
+            confidence=seg.confidence
+        )
+        for seg, label in zip(transcript, labels)
+    ]
+
+
+def windows_to_array(segments: List[dict]) -> np.ndarray:
+    """[n, 2] start/end seconds of diarization windows"""
+    return np.array([[seg['start'], seg['end']] for seg in segments], dtype=np.float64).reshape(-1, 2)
+
+
+def windows_from_array(windows: np.ndarray) -> List[dict]:
+    return [{'start': float(start), 'end': float(end)} for start, end in windows]
+
+
+def save_speaker_embeddings(path, embeddings: np.ndarray, segments: List[dict], labels: Optional[np.ndarray] = None):
+    """Store window embeddings (float16) with their window bounds and cluster labels in one .npz sidecar"""
+    arrays = {
+        'embeddings': np.asarray(embeddings).astype(np.float16),
+        'windows': windows_to_array(segments).astype(np.float32)
+    }
+    if labels is not None:
+        arrays['labels'] = np.asarray(labels, dtype=np.int32)
+    np.savez(path, **arrays)
+
+
+def load_speaker_embeddings(path) -> Tuple[np.ndarray, List[dict], Optional[np.ndarray]]:
+    with np.load(path) as data:
+        labels = data['labels'].astype(int) if 'labels' in data.files else None
+        return data['embeddings'].astype(np.float32), windows_from_array(data['windows']), labels
+
+
+def cluster_centroids(embeddings: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """[n_speakers, dim] mean embedding of each cluster, indexed by label"""
+    embeddings = SpeakerClusterer._normalize(np.asarray(embeddings, dtype=np.float32))
+    labels = np.asarray(labels, dtype=int)
+    sums = np.zeros((labels.max() + 1 if len(labels) else 0, embeddings.shape[1]), dtype=np.float32)
+    np.add.at(sums, labels, embeddings)
+    return sums / np.maximum(np.bincount(labels, minlength=len(sums)), 1)[:, None]
+
+
+def speaker_label(transcript: List[TranscriptSegment], timeline: SpeakerTimeline, speaker: str) -> Optional[int]:
+    """Cluster label most of ``speaker``'s transcript segments fall in, or None"""
+    mids = np.array([(seg.start_time + seg.end_time) / 2 for seg in transcript if seg.speaker == speaker])
+    labels = timeline.speakers_at(mids)
+    labels = labels[labels >= 0]
+    return int(np.bincount(labels).argmax()) if len(labels) else None
+
+
+def rename_speakers(transcript: List[TranscriptSegment], names: Dict[str, str]) -> List[TranscriptSegment]:
+    """Replace speaker labels in place using a {current label: new name} mapping"""
+    for seg in transcript:
+        seg.speaker = names.get(seg.speaker, seg.speaker)
+    return transcript
@@ -0,0 +1,54 @@
+from dataclasses import dataclass, field
+from typing import List
+
+@dataclass
+class TranscriptSegment:
+    speaker: str
+    text: str
+    start_time: float
+    end_time: float
+    confidence: float
+
+
+@dataclass
+class TimedWord:
+    start: float
+    end: float
+    word: str
+
+
+@dataclass
+class TimedSegment:
+    """Whisper segment shifted to absolute meeting time (same fields assign_speakers reads)"""
+    start: float
+    end: float
+    text: str
+    avg_logprob: float
+    words: List[TimedWord] = field(default_factory=list)
+
+
+def clip_segments(whisper_segments, offset: float, lo: float, hi: float) -> List[TimedSegment]:
+    """Shift chunk-relative Whisper segments by ``offset`` and keep what falls in [lo, hi).
+
+    Words are kept when their midpoint lies inside the span, so audio shared
+    with a neighbouring chunk or shard is transcribed exactly once.
+    """
+    kept = []
+    for segment in whisper_segments:
+        words = [
+            TimedWord(w.start + offset, w.end + offset, w.word)
+            for w in (segment.words or [])
+            if lo <= (w.start + w.end) / 2 + offset < hi
+        ]
+        if segment.words and not words:
+            continue
+        if not segment.words and not lo <= (segment.start + segment.end) / 2 + offset < hi:
+            continue
+        kept.append(TimedSegment(
+            start=words[0].start if words else segment.start + offset,
+            end=words[-1].end if words else segment.end + offset,
+            text="".join(w.word for w in words) if words else segment.text,
+            avg_logprob=segment.avg_logprob,
+            words=words
+        ))
+    return kept
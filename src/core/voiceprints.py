@@ -0,0 +1,130 @@
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+
+class VoiceprintIndex:
+    """Centroid embeddings of enrolled speakers, shared across meetings.
+
+    Centroids are rows of one float32 ``.npy`` matrix that is memory-mapped for
+    lookups; names and sample counts live in the ``voiceprints`` table. Matching
+    a meeting's cluster centroids is a single normalized matrix product. The map
+    is reopened whenever another process has changed the file, so the web and
+    worker roles see each other's enrollments.
+    """
+
+    MATRIX_FILE = "voiceprints.npy"
+
+    def __init__(self, db, directory: Optional[Path] = None, min_similarity: Optional[float] = None):
+        from config.config import VOICEPRINTS_DIR, VOICEPRINT_MIN_SIMILARITY
+        self.db = db
+        self.path = Path(directory or VOICEPRINTS_DIR) / self.MATRIX_FILE
+        self.min_similarity = VOICEPRINT_MIN_SIMILARITY if min_similarity is None else min_similarity
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._matrix = None
+        self._entries: List[dict] = []
+
+    def _refresh(self):
+        """(Re)open the memory map if the matrix file changed since the last lookup"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._stamp, self._matrix, self._entries = None, None, []
+            return
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            self._matrix = np.load(self.path, mmap_mode='r')
+            self._entries = self.db.get_voiceprints()
+            self._stamp = stamp
+
+    def names(self) -> List[str]:
+        with self._lock:
+            self._refresh()
+            return [entry['name'] for entry in self._entries]
+
+    def match(self, centroids: np.ndarray) -> List[Optional[str]]:
+        """Name for each centroid, or None when no enrolled voice is similar enough.
+
+        Each enrolled speaker is given to at most one centroid, best matches first.
+        """
+        centroids = np.asarray(centroids, dtype=np.float32)
+        with self._lock:
+            self._refresh()
+            entries = self._entries
+            if not entries or not len(centroids) or centroids.shape[1] != self._matrix.shape[1]:
+                return [None] * len(centroids)
+            # Rows are allocated contiguously from 0, so entry j is row j
+            centroids = centroids / np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-8)
+            similarity = (self._matrix[:len(entries)] @ centroids.T).T
+
+        # Only the top len(centroids) voices per centroid can win the greedy assignment
+        k = min(len(centroids), similarity.shape[1])
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        candidates = sorted(
+            ((similarity[i, j], i, j) for i in range(len(centroids)) for j in top[i]),
+            reverse=True
+        )
+        names = [None] * len(centroids)
+        taken = set()
+        for score, i, j in candidates:
+            if score < self.min_similarity:
+                break
+            if names[i] is None and j not in taken:
+                names[i] = entries[j]['name']
+                taken.add(j)
+        return names
+
+    def enroll(self, name: str, embedding: np.ndarray, weight: float = 1.0):
+        """Add a confirmed voice sample, folding it into the speaker's running centroid"""
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        embedding = embedding / max(float(np.linalg.norm(embedding)), 1e-8)
+        def write(row: int, samples: float):
+            # Reload under the lock: another process may have grown the matrix
+            self._stamp = None
+            self._refresh()
+            if self._matrix is not None and self._matrix.shape[1] != embedding.shape[0]:
+                raise ValueError(
+                    f"Embedding dimension {embedding.shape[0]} does not match the index ({self._matrix.shape[1]})"
+                )
+            if samples:
+                centroid = np.asarray(self._matrix[row]) * samples + embedding * weight
+                centroid = centroid / max(float(np.linalg.norm(centroid)), 1e-8)
+            else:
+                centroid = embedding
+            matrix = self._writable(row + 1, embedding.shape[0])
+            matrix[row] = centroid
+            matrix.flush()
+            del matrix
+
+        with self._lock:
+            try:
+                self.db.enroll_voiceprint(name, weight, write)
+            finally:
+                # Bump mtime only once the row is committed, so no process caches
+                # the new matrix with the old names; writes through a map don't
+                # reliably bump it anyway
+                if self.path.exists():
+                    os.utime(self.path)
+                self._stamp = None
+
+    def _writable(self, rows: int, dim: int) -> np.memmap:
+        """Read-write map of the matrix with room for ``rows`` rows, doubling capacity when full"""
+        if self._matrix is not None and self._matrix.shape[0] >= rows:
+            self._matrix = None
+            return np.lib.format.open_memmap(self.path, mode='r+')
+
+        capacity = max(64, rows, 2 * (self._matrix.shape[0] if self._matrix is not None else 0))
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        tmp = self.path.with_suffix('.tmp.npy')
+        grown = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=(capacity, dim))
+        if self._matrix is not None:
+            grown[:self._matrix.shape[0]] = self._matrix
+        grown.flush()
+        del grown
+        self._matrix = None
+        os.replace(tmp, self.path)
+        return np.lib.format.open_memmap(self.path, mode='r+')
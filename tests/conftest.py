@@ -0,0 +1,93 @@
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A DatabaseManager on a fresh database under tmp_path"""
+    import config.config
+    from src.core.db import DatabaseManager
+    monkeypatch.setattr(config.config, 'BASE_DIR', tmp_path)
+    (tmp_path / "data").mkdir()
+    manager = DatabaseManager()
+    yield manager
+    manager.close()
+
+
+class FakeOllama:
+    """Ollama's generate API on a local port.
+
+    ``reply(payload)`` returns the response chunks, or an HTTP status code to fail
+    with. A dict chunk is sent as is, and a None chunk drops the connection mid-stream.
+    """
+
+    def __init__(self):
+        fake = self
+        self.payloads = []
+        self.reply = lambda payload: ["Hello", " world"]
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._send(200, json.dumps({'models': []}).encode())
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                fake.payloads.append(payload)
+                chunks = fake.reply(payload)
+                if isinstance(chunks, int):
+                    return self._send(chunks, b'{"error": "unavailable"}')
+                if not payload.get('stream'):
+                    return self._send(200, json.dumps({'response': "".join(chunks), 'done': True}).encode())
+                lines = []
+                for chunk in chunks:
+                    if chunk is None:
+                        # Promise more than is sent, then hang up
+                        self.send_response(200)
+                        self.send_header('Content-Length', str(len(b"".join(lines)) + 1000))
+                        self.end_headers()
+                        self.wfile.write(b"".join(lines))
+                        self.wfile.flush()
+                        self.close_connection = True
+                        return
+                    line = chunk if isinstance(chunk, dict) else {'response': chunk, 'done': False}
+                    lines.append(json.dumps(line).encode() + b"\n")
+                lines.append(json.dumps({'response': '', 'done': True}).encode() + b"\n")
+                self._send(200, b"".join(lines))
+
+            def _send(self, status, body):
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/generate"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def make_ollama():
+    """Start fake Ollama servers, shut down after the test"""
+    servers = []
+
+    def make():
+        servers.append(FakeOllama())
+        return servers[-1]
+
+    yield make
+    for server in servers:
+        server.close()
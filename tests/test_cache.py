@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from src.core.cache import StageCache, config_key
+from src.core.db import Meeting
+
+
+def save_meeting(db, meeting_id, audio_hash):
+    db.save_meeting(Meeting(
+        id=meeting_id, title=meeting_id, date=datetime.now(), duration=1.0,
+        audio_path=f"{meeting_id}.flac", transcript=[], audio_hash=audio_hash
+    ))
+
+
+def set_last_used(db, audio_hash, when):
+    with db._connect() as conn:
+        conn.execute("UPDATE stage_cache SET last_used_at = ? WHERE audio_hash = ?", (when.isoformat(), audio_hash))
+
+
+def test_round_trip(db, tmp_path):
+    cache = StageCache(db, "ab" * 32, tmp_path)
+    cache.store('embeddings', 'k', np.arange(6, dtype=np.float32).reshape(2, 3))
+    cache.store('labels', 'k', [0, 1])
+    assert cache.load('embeddings', 'k').tolist() == [[0, 1, 2], [3, 4, 5]]
+    assert cache.load('labels', 'k') == [0, 1]
+    assert cache.load('labels', 'other') is None
+
+
+def test_config_key_is_stable_and_order_sensitive():
+    assert config_key('a', 1) == config_key('a', 1)
+    assert config_key('a', 1) != config_key(1, 'a')
+
+
+def test_deleting_the_last_meeting_drops_its_cache(db, tmp_path):
+    shared, single = "aa" * 32, "bb" * 32
+    for audio_hash in (shared, single):
+        StageCache(db, audio_hash, tmp_path).store('embeddings', 'k', np.ones(4))
+    save_meeting(db, 'm1', shared)
+    save_meeting(db, 'm2', shared)
+    save_meeting(db, 'm3', single)
+    files = {h: StageCache(db, h, tmp_path).cache_dir / f"{h}_embeddings_k.npy" for h in (shared, single)}
+
+    db.delete_meeting('m3')
+    assert db.get_stage_output(single, 'embeddings', 'k') is None
+    assert not files[single].exists()
+
+    db.delete_meeting('m1')
+    assert db.get_stage_output(shared, 'embeddings', 'k') is not None
+    assert files[shared].exists()
+    db.delete_meeting('m2')
+    assert not files[shared].exists()
+
+
+def test_least_recently_used_outputs_are_evicted_beyond_the_size_cap(db, tmp_path):
+    hashes = [f"{i:02d}" * 32 for i in range(4)]
+    for i, audio_hash in enumerate(hashes):
+        cache = StageCache(db, audio_hash, tmp_path)
+        cache.max_bytes = 10 ** 9
+        cache.store('embeddings', 'k', np.zeros(1000, dtype=np.float32))
+        set_last_used(db, audio_hash, datetime.now() - timedelta(minutes=10 - i))
+    # Reading the oldest entry makes it the most recently used
+    assert StageCache(db, hashes[0], tmp_path).load('embeddings', 'k') is not None
+
+    cache = StageCache(db, "ff" * 32, tmp_path)
+    cache.max_bytes = 3 * 4200
+    cache.store('embeddings', 'k', np.zeros(1000, dtype=np.float32))
+    kept = [h for h in hashes if db.get_stage_output(h, 'embeddings', 'k')]
+    assert kept == [hashes[0], hashes[3]]
+    assert not (StageCache(db, hashes[1], tmp_path).cache_dir / f"{hashes[1]}_embeddings_k.npy").exists()
+
+
+def test_outputs_unused_for_too_long_are_evicted(db, tmp_path):
+    old, fresh = "0a" * 32, "0b" * 32
+    StageCache(db, old, tmp_path).store('labels', 'k', [0, 1])
+    set_last_used(db, old, datetime.now() - timedelta(days=365))
+    StageCache(db, fresh, tmp_path).store('labels', 'k', [0, 1])
+    assert db.get_stage_output(old, 'labels', 'k') is None
+    assert db.get_stage_output(fresh, 'labels', 'k') is not None
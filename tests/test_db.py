@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pytest
+
+from src.core.db import Meeting
+
+
+def save_meeting(db, meeting_id):
+    db.save_meeting(Meeting(
+        id=meeting_id, title=meeting_id, date=datetime.now(), duration=1.0,
+        audio_path=f"{meeting_id}.flac", transcript=[]
+    ))
+
+
+def test_connections_are_reused(db):
+    with db._connect() as conn:
+        first = conn
+    with db._connect() as conn:
+        assert conn is first
+        # Pragmas are set once per pooled connection
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+
+def test_pool_is_capped(db):
+    opened = []
+    threads_in = threading.Barrier(db._pool.maxsize + 2)
+
+    def use():
+        with db._connect() as conn:
+            opened.append(conn)
+            threads_in.wait()
+
+    threads = [threading.Thread(target=use) for _ in range(db._pool.maxsize + 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Every thread had its own connection, but only maxsize stay open for reuse
+    assert len({id(conn) for conn in opened}) == len(threads)
+    assert db._pool.qsize() == db._pool.maxsize
+
+
+def test_error_rolls_back_the_transaction(db):
+    with pytest.raises(RuntimeError):
+        with db._connect() as conn:
+            conn.execute("INSERT INTO tags (name) VALUES ('lost')")
+            raise RuntimeError("boom")
+    assert db.get_all_tags() == []
+    with db._connect() as conn:
+        conn.execute("INSERT INTO tags (name) VALUES ('kept')")
+    assert db.get_all_tags() == ['kept']
+
+
+def test_foreign_keys_are_enforced(db):
+    with pytest.raises(sqlite3.IntegrityError):
+        with db._connect() as conn:
+            conn.execute("INSERT INTO meeting_tags (meeting_id, tag_id) VALUES ('missing', 1)")
+
+
+def test_failed_commit_is_rolled_back(db):
+    # A deferred constraint only fails at COMMIT
+    with pytest.raises(sqlite3.IntegrityError):
+        with db._connect() as conn:
+            failed = conn
+            conn.execute("PRAGMA defer_foreign_keys = ON")
+            conn.execute("INSERT INTO tags (name) VALUES ('dangling')")
+            conn.execute("INSERT INTO meeting_tags (meeting_id, tag_id) VALUES ('missing', 1)")
+    assert not failed.in_transaction
+    assert db.get_all_tags() == []
+    # No write lock is left behind
+    save_meeting(db, 'm1')
+
+
+def test_pool_starts_over_after_a_fork(db):
+    save_meeting(db, 'parent')
+    with db._connect() as conn:
+        parent_conn = conn
+    pid = os.fork()
+    if pid == 0:
+        try:
+            with db._connect() as conn:
+                ok = conn is not parent_conn and db._pool_pid == os.getpid()
+            save_meeting(db, 'child')
+            ok = ok and db.get_meeting('parent') is not None
+        except BaseException:
+            ok = False
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    with db._connect() as conn:
+        assert conn is parent_conn
+    assert db.get_meeting('child') is not None
+
+
+def test_close_closes_idle_connections(db):
+    with db._connect() as conn:
+        pooled = conn
+    db.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        pooled.execute("SELECT 1")
+    # The manager stays usable
+    save_meeting(db, 'm1')
+    assert db.get_meeting('m1') is not None
@@ -0,0 +1,86 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.core.inference import InferenceClient, InferenceServer, parse_address
+from src.core.speakers import SpeakerTimeline
+
+AUTHKEY = b"test-secret"
+
+
+class FakeProcessor:
+    """Stands in for AudioProcessor; a recording of 3 samples blocks until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def warm_up(self):
+        pass
+
+    def diarize_many(self, buffers, profile):
+        return [
+            (SpeakerTimeline([{'start': 0.0, 'end': 1.0}], np.array([0])), np.zeros((1, 4), dtype=np.float32))
+            for _ in buffers
+        ]
+
+    def _transcribe(self, buffer, report, profile):
+        if len(buffer.samples) == 3:
+            assert self.release.wait(10)
+        return [SimpleNamespace(start=0.0, end=0.5, text=f"{len(buffer.samples)} samples", words=None, avg_logprob=-0.1)]
+
+
+@pytest.fixture
+def server(tmp_path):
+    processor = FakeProcessor()
+    server = InferenceServer(str(tmp_path / "inference.sock"), AUTHKEY, batch_window=0.01, processor=processor)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = InferenceClient(str(tmp_path / "inference.sock"), AUTHKEY)
+    deadline = time.monotonic() + 5
+    while not client.ping():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    yield processor, client
+    processor.release.set()
+
+
+def samples(n):
+    return SimpleNamespace(source_path=None, samples=np.zeros(n, dtype=np.float32))
+
+
+def test_long_request_does_not_block_other_clients(server):
+    processor, client = server
+    results = {}
+
+    def run(name, n):
+        results[name] = client.process_audio(samples(n))
+
+    slow = threading.Thread(target=run, args=('slow', 3))
+    slow.start()
+    time.sleep(0.2)
+    fast = threading.Thread(target=run, args=('fast', 5))
+    fast.start()
+    fast.join(5)
+    assert not fast.is_alive()
+    assert results['fast'][0].text == "5 samples"
+    assert 'slow' not in results
+
+    processor.release.set()
+    slow.join(5)
+    assert results['slow'][0].text == "3 samples"
+
+
+def test_wrong_authkey_is_rejected(server, tmp_path):
+    client = InferenceClient(str(tmp_path / "inference.sock"), b"wrong")
+    assert not client.ping()
+
+
+def test_tcp_must_be_loopback():
+    assert parse_address("127.0.0.1:6000") == (("127.0.0.1", 6000), 'AF_INET')
+    assert parse_address("/tmp/x.sock") == ("/tmp/x.sock", 'AF_UNIX')
+    with pytest.raises(ValueError):
+        parse_address("0.0.0.0:6000")
+    with pytest.raises(ValueError):
+        InferenceClient("/tmp/x.sock", b"")
@@ -0,0 +1,112 @@
+import io
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from src.core.jobs import JobQueue, estimate_progress, run_job
+
+
+def age_heartbeat(db, job_id, seconds):
+    with db._connect() as conn:
+        conn.execute(
+            "UPDATE jobs SET heartbeat_at = ? WHERE id = ?",
+            ((datetime.now() - timedelta(seconds=seconds)).isoformat(), job_id)
+        )
+
+
+def test_claims_oldest_queued_job(db):
+    first = db.create_job('a.wav', {}, not_before=datetime.now() - timedelta(seconds=2))
+    second = db.create_job('b.wav', {}, not_before=datetime.now() - timedelta(seconds=1))
+    job = db.claim_next_job('w1')
+    assert job.id == first.id
+    assert job.status == 'running'
+    assert db.claim_next_job('w1').id == second.id
+    assert db.claim_next_job('w1') is None
+
+
+def test_delayed_job_waits(db):
+    db.create_job('', {'task': 'summarize'}, not_before=datetime.now() + timedelta(minutes=5))
+    assert db.claim_next_job('w1') is None
+
+
+def test_concurrent_claims_never_share_a_job(db):
+    for i in range(20):
+        db.create_job(f'{i}.wav', {})
+    claimed, lock = [], threading.Lock()
+
+    def worker(name):
+        while True:
+            job = db.claim_next_job(name)
+            if job is None:
+                return
+            with lock:
+                claimed.append(job.id)
+
+    threads = [threading.Thread(target=worker, args=(f'w{i}',)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(claimed) == len(set(claimed)) == 20
+
+
+def test_heartbeat_only_from_owner(db):
+    db.create_job('a.wav', {})
+    job = db.claim_next_job('w1')
+    assert db.heartbeat_job(job.id, 'w1')
+    assert not db.heartbeat_job(job.id, 'w2')
+
+
+def test_requeue_only_stale_jobs(db):
+    db.create_job('a.wav', {}, not_before=datetime.now() - timedelta(seconds=2))
+    db.create_job('b.wav', {}, not_before=datetime.now() - timedelta(seconds=1))
+    stale = db.claim_next_job('dead')
+    live = db.claim_next_job('alive')
+    age_heartbeat(db, stale.id, 600)
+    assert db.requeue_stale_jobs(120) == 1
+    assert db.get_job(stale.id).status == 'queued'
+    assert db.get_job(live.id).status == 'running'
+    # The requeued job is claimable again, and its old owner can no longer heartbeat it
+    assert not db.heartbeat_job(stale.id, 'dead')
+    assert db.claim_next_job('w2').id == stale.id
+
+
+def test_estimate_progress():
+    assert estimate_progress("Saving meeting...") == 0.95
+    assert estimate_progress("Analyzing speakers: 40% | Transcribing: done") == 0.95 * 0.4
+    assert estimate_progress("Loading models") is None
+
+
+def test_submit_keeps_the_upload_format(db, tmp_path, monkeypatch):
+    import config.config
+    monkeypatch.setattr(config.config, 'UPLOADS_DIR', tmp_path / "uploads")
+    queue = JobQueue(db, workers=0)
+    flac = queue.submit(io.BytesIO(b"fLaC"), {}, filename="Meeting.FLAC")
+    unnamed = queue.submit(io.BytesIO(b"RIFF"), {})
+    odd = queue.submit(io.BytesIO(b"RIFF"), {}, filename="x.tar.gz/../evil")
+    assert flac.audio_path.endswith(".flac")
+    assert unnamed.audio_path.endswith(".wav")
+    assert odd.audio_path.endswith(".wav")
+    assert open(flac.audio_path, 'rb').read() == b"fLaC"
+
+
+def test_run_job_hands_the_stored_file_to_the_recorder(db, tmp_path):
+    upload = tmp_path / "upload.flac"
+    upload.write_bytes(b"audio")
+    db.create_job(str(upload), {'title': 'Standup', 'duration': 3})
+    job = db.claim_next_job('w1')
+    calls = []
+
+    def record_meeting(**kwargs):
+        calls.append(kwargs)
+        kwargs['on_saved'](SimpleNamespace(id='m1'))
+        return SimpleNamespace(id='m1')
+
+    recorder = SimpleNamespace(record_meeting=record_meeting, db=db)
+    run_job(recorder, db, job)
+    assert calls[0]['audio_path'] == str(upload)
+    assert 'audio_data' not in calls[0]
+    finished = db.get_job(job.id)
+    assert finished.status == 'complete'
+    assert finished.meeting_id == 'm1'
+    assert not upload.exists()
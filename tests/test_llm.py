@@ -0,0 +1,157 @@
+import re
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.llm import LLMProcessor, chunk_transcript, compact_transcript, estimate_tokens, split_text
+from src.core.transcript import TranscriptSegment
+
+
+def seg(speaker, text, confidence=-0.2):
+    return TranscriptSegment(speaker=speaker, text=text, start_time=0.0, end_time=1.0, confidence=confidence)
+
+
+class StubClient:
+    """OllamaClient stand-in that answers every prompt with ``answer(prompt)``"""
+
+    model = 'stub'
+    timeout = 10
+    pool = SimpleNamespace(capacity=2)
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, on_text=None, timeout=None, retries=None):
+        with self._lock:
+            self.prompts.append(prompt)
+        text = self.answer(prompt)
+        if on_text:
+            on_text(text)
+        return text
+
+
+def processor(answer, chunk_tokens=600):
+    llm = LLMProcessor(client=StubClient(answer))
+    llm.chunk_tokens = chunk_tokens
+    llm.compaction = False
+    return llm
+
+
+def topics(text):
+    return set(re.findall(r"topic-\d+", text))
+
+
+def test_chunks_respect_budget_and_keep_every_turn():
+    transcript = [seg(f"Speaker_{i % 3}", f"turn {i} " + "words " * (i % 7 * 10)) for i in range(60)]
+    chunks = chunk_transcript(transcript, 200)
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+    text = "\n".join(chunks)
+    assert all(re.search(rf"\bturn {i}\b", text) for i in range(60))
+    # Cuts fall between lines, never inside a speaker's turn
+    assert all(line.startswith("Speaker_") for chunk in chunks for line in chunk.splitlines())
+
+
+def test_long_turn_is_cut_between_sentences():
+    transcript = [seg("Speaker_1", " ".join(f"Sentence number {i} is here." for i in range(100)))]
+    chunks = chunk_transcript(transcript, 100)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    assert all(chunk.endswith("here.") for chunk in chunks)
+
+
+def test_split_text_keeps_everything():
+    text = "\n".join(f"- point {i} " + "detail " * 20 for i in range(30))
+    pieces = split_text(text, 100)
+    assert all(estimate_tokens(piece) <= 100 for piece in pieces)
+    assert " ".join(" ".join(pieces).split()) == " ".join(text.split())
+    assert split_text("short", 100) == ["short"]
+
+
+def test_long_meeting_keeps_the_tail_of_oversized_partials(capsys):
+    def answer(prompt):
+        if prompt.startswith("You are summarizing part"):
+            # Wordy partial summaries with the facts at the very end
+            return "Discussion. " * 150 + "\n" + " ".join(sorted(topics(prompt)))
+        return " ".join(sorted(topics(prompt)))
+
+    llm = processor(answer)
+    transcript = [seg(f"Speaker_{i % 2}", f"We talked about topic-{i}. " + "blah " * 40) for i in range(200)]
+    summary = llm.stream_summary(transcript)
+    assert topics(summary) == {f"topic-{i}" for i in range(200)}
+    assert "truncating" not in capsys.readouterr().out
+
+
+def test_reduce_gives_up_cleanly_when_summaries_never_shrink(monkeypatch, capsys):
+    import config.config
+    monkeypatch.setattr(config.config, 'SUMMARY_REDUCE_MAX_ROUNDS', 3)
+    llm = processor(lambda prompt: "word " * 1600, chunk_tokens=3000)
+    with pytest.raises(RuntimeError):
+        llm._reduce(["word " * 1600] * 40)
+    assert "truncating" in capsys.readouterr().out
+
+
+def test_reduce_terminates_with_verbose_summaries():
+    llm = processor(lambda prompt: "word " * 1600, chunk_tokens=3000)
+    assert llm._reduce(["word " * 1600] * 40)
+    # One round of split pieces, then every round at least halves the summaries
+    assert len(llm.client.prompts) == 40 + 20 + 10 + 5 + 3 + 2 + 1
+
+
+def test_short_transcript_uses_one_prompt():
+    llm = processor(lambda prompt: "summary")
+    assert llm.stream_summary([seg("Speaker_1", "Hello there.")]) == "summary"
+    assert len(llm.client.prompts) == 1
+
+
+FILLERS = ['um', 'uh', 'hmm']
+
+
+def test_compaction_merges_turns_and_strips_fillers():
+    transcript = [
+        seg("Speaker_1", "Um, so the budget is done."),
+        seg("Speaker_1", "Uh - we ship on Friday."),
+        seg("Speaker_2", "Hmm."),
+        seg("Speaker_2", "Great, um, thanks."),
+        seg("Speaker_1", "Umbrella policy next."),
+    ]
+    compacted = compact_transcript(transcript, fillers=FILLERS)
+    assert [(s.speaker, s.text) for s in compacted] == [
+        ("Speaker_1", "so the budget is done. we ship on Friday."),
+        ("Speaker_2", "Great, thanks."),
+        ("Speaker_1", "Umbrella policy next."),
+    ]
+
+
+def test_compaction_drops_low_confidence_and_repeated_lines():
+    transcript = [
+        seg("Speaker_1", "We agreed on the plan.", confidence=-0.3),
+        seg("Speaker_1", "we agreed on the plan", confidence=-0.2),
+        seg("Speaker_1", "Thank you for watching.", confidence=-1.5),
+        seg("Speaker_2", "We agreed on the plan.", confidence=-0.4),
+    ]
+    compacted = compact_transcript(transcript, min_confidence=-1.0)
+    assert [(s.speaker, s.text) for s in compacted] == [
+        ("Speaker_1", "We agreed on the plan."),
+        ("Speaker_2", "We agreed on the plan."),
+    ]
+    # A merged turn keeps its span and its least confident segment's score
+    assert (compacted[0].start_time, compacted[0].end_time, compacted[0].confidence) == (0.0, 1.0, -0.3)
+
+
+def test_compaction_is_deterministic_and_leaves_the_input_alone():
+    transcript = [seg(f"Speaker_{i % 2}", f"Um point {i // 3}.") for i in range(30)]
+    original = [s.text for s in transcript]
+    assert compact_transcript(transcript, -1.0, FILLERS) == compact_transcript(transcript, -1.0, FILLERS)
+    assert [s.text for s in transcript] == original
+
+
+def test_compaction_can_be_turned_off(capsys):
+    transcript = [seg("Speaker_1", "Um, hello."), seg("Speaker_1", "Um, hello.")]
+    llm = processor(lambda prompt: "summary")
+    assert llm.compact(transcript) is transcript
+    llm.compaction, llm.fillers, llm.min_confidence = True, FILLERS, None
+    assert [s.text for s in llm.compact(transcript)] == ["hello."]
+    assert "fewer" in capsys.readouterr().out
@@ -0,0 +1,157 @@
+import asyncio
+import socket
+
+import pytest
+import requests
+
+from src.core.llm_client import AsyncOllamaClient, LLMBackendPool, OllamaClient, is_transient
+
+
+def dead_url():
+    """A generate URL nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/api/generate"
+
+
+def client(*urls, **kwargs):
+    llm = OllamaClient(backends=list(urls), retries=kwargs.pop('retries', 0), backoff=0, **kwargs)
+    # Start every test's round-robin at the first backend
+    llm.pool._turn = 0
+    return llm
+
+
+def test_busy_backend_is_skipped_and_ties_go_round_robin():
+    pool = LLMBackendPool(["http://a/api/generate", "http://b/api/generate"], requests.Session(), 2, 60)
+    pool._turn = 0
+    first = pool.acquire()
+    second = pool.acquire()
+    assert {first.url, second.url} == {"http://a/api/generate", "http://b/api/generate"}
+    pool.release(first, 0.1)
+    pool.release(second, 0.1)
+
+    order = []
+    for _ in range(4):
+        backend = pool.acquire()
+        order.append(backend.url[7])
+        pool.release(backend, 0.1)
+    assert order in (list("abab"), list("baba"))
+
+
+def test_dead_backend_fails_over_without_using_a_retry(make_ollama):
+    ollama = make_ollama()
+    llm = client(dead_url(), ollama.url)
+    assert llm.generate("prompt") == "Hello world"
+    dead, live = llm.stats()
+    assert (dead['healthy'], dead['errors']) == (False, 1)
+    assert (live['healthy'], live['requests']) == (True, 1)
+
+    # Until a health check finds it answering, the dead backend is not tried again
+    llm.generate("prompt")
+    assert llm.stats()[0]['errors'] == 1
+    assert len(ollama.payloads) == 2
+
+
+def test_busy_server_is_retried_with_backoff(make_ollama):
+    ollama = make_ollama()
+    replies = iter([503, 429, ["Done"]])
+    ollama.reply = lambda payload: next(replies)
+    assert client(ollama.url, retries=2).generate("prompt") == "Done"
+    assert len(ollama.payloads) == 3
+
+
+def test_client_errors_are_not_retried(make_ollama):
+    ollama = make_ollama()
+    ollama.reply = lambda payload: 400
+    llm = client(ollama.url, retries=2)
+    with pytest.raises(requests.HTTPError):
+        llm.generate("prompt")
+    assert len(ollama.payloads) == 1
+    # A bad request says nothing about the server's health
+    assert llm.stats()[0]['healthy']
+
+
+def test_dropped_stream_is_retried(make_ollama):
+    ollama = make_ollama()
+    replies = iter([["Hel", None], ["Hello"]])
+    ollama.reply = lambda payload: next(replies)
+    seen = []
+    assert client(ollama.url, retries=1).generate("prompt", seen.append) == "Hello"
+    assert seen[-1] == "Hello"
+    assert is_transient(requests.exceptions.ChunkedEncodingError())
+
+
+def test_warm_up_only_asks_idle_backends(make_ollama):
+    ollama = make_ollama()
+    llm = client(ollama.url)
+    llm.warm_up(idle_after=600)
+    assert [payload['prompt'] for payload in ollama.payloads] == [""]
+    assert ollama.payloads[0]['keep_alive']
+    llm.generate("prompt")
+    llm.warm_up(idle_after=600)
+    assert len(ollama.payloads) == 2
+    # Without a limit every backend is asked
+    llm.warm_up()
+    assert len(ollama.payloads) == 3
+
+
+def test_failed_warm_up_is_tried_again():
+    llm = client(dead_url())
+    llm.warm_up(idle_after=600)
+    assert llm.pool.claim_idle(600) == llm.pool.backends
+
+
+def test_async_client_streams_fails_over_and_retries(make_ollama):
+    ollama = make_ollama()
+    replies = iter([["The ", "summary"], 503, ["Again"]])
+    ollama.reply = lambda payload: next(replies)
+    llm = client(dead_url(), ollama.url, retries=1)
+
+    async def run():
+        async_llm = AsyncOllamaClient(llm)
+        try:
+            seen = []
+            first = await async_llm.generate("prompt", seen.append)
+            second = await async_llm.generate("prompt")
+            return first, seen, second
+        finally:
+            await async_llm.aclose()
+
+    first, seen, second = asyncio.run(run())
+    assert (first, seen, second) == ("The summary", ["The ", "The summary"], "Again")
+    assert [payload['stream'] for payload in ollama.payloads] == [True, False, False]
+    # Sync and async requests share the backend pool and its health
+    dead, live = llm.stats()
+    assert (dead['healthy'], live['requests']) == (False, 2)
+
+
+def test_async_client_raises_the_sync_client_errors():
+    llm = client(dead_url())
+
+    async def run():
+        async_llm = AsyncOllamaClient(llm)
+        try:
+            await async_llm.generate("prompt")
+        finally:
+            await async_llm.aclose()
+
+    with pytest.raises(requests.ConnectionError):
+        asyncio.run(run())
+
+
+def test_async_requests_wait_for_a_free_slot(make_ollama, monkeypatch):
+    import config.config
+    monkeypatch.setattr(config.config, 'LLM_BACKEND_CONCURRENCY', 1)
+    ollama = make_ollama()
+    llm = client(ollama.url)
+
+    async def run():
+        async_llm = AsyncOllamaClient(llm)
+        try:
+            return await asyncio.gather(*(async_llm.generate(f"prompt {i}") for i in range(3)))
+        finally:
+            await async_llm.aclose()
+
+    assert asyncio.run(run()) == ["Hello world"] * 3
+    assert llm.stats()[0]['in_flight'] == 0
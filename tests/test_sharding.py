@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.core.sharding import plan_shards, shard_count
+from src.core.transcript import clip_segments
+
+
+def whisper_segment(start, end, text, words=None):
+    words = [SimpleNamespace(start=s, end=e, word=w) for s, e, w in words or []]
+    return SimpleNamespace(start=start, end=end, text=text, avg_logprob=-0.2, words=words)
+
+
+def test_clip_shifts_and_keeps_words_centred_in_the_span():
+    segments = [
+        whisper_segment(0.0, 2.0, " hello there", [(0.0, 0.8, " hello"), (1.0, 2.0, " there")]),
+        whisper_segment(2.0, 3.0, " gone", [(2.0, 3.0, " gone")]),
+    ]
+    kept = clip_segments(segments, offset=10.0, lo=10.0, hi=11.2)
+    assert len(kept) == 1
+    assert (kept[0].start, kept[0].end, kept[0].text) == (10.0, 10.8, " hello")
+    assert [w.word for w in kept[0].words] == [" hello"]
+
+
+def test_clip_without_word_timestamps_uses_the_segment_midpoint():
+    segments = [whisper_segment(0.0, 2.0, " first"), whisper_segment(2.0, 6.0, " second")]
+    kept = clip_segments(segments, offset=5.0, lo=5.0, hi=8.0)
+    assert [(s.start, s.end, s.text) for s in kept] == [(5.0, 7.0, " first")]
+
+
+def test_overlapping_shards_transcribe_each_word_once():
+    words = [(t, t + 0.4, f" w{t:.1f}") for t in np.arange(0.0, 10.0, 0.5)]
+    segments = [whisper_segment(0.0, 10.0, "", words)]
+    # Two shards each see the whole overlap but keep only their half of it
+    left = clip_segments(segments, 0.0, 0.0, 5.2)
+    right = clip_segments(segments, 0.0, 5.2, 10.0)
+    texts = [w.word for s in left + right for w in s.words]
+    assert texts == [w for _, _, w in words]
+
+
+def test_cuts_move_to_the_quietest_point_near_the_even_split():
+    sr = 100
+    samples = np.ones(10 * sr, dtype=np.float32)
+    samples[430:440] = 0  # silence 0.7s before the even split at 5s
+    spans = plan_shards(samples, sr, 2, search_seconds=2.0)
+    assert spans[0][0] == 0 and spans[-1][1] == len(samples)
+    assert spans[0][1] == spans[1][0]
+    assert 430 <= spans[0][1] < 440
+
+
+def test_shards_cover_the_recording_without_gaps():
+    samples = np.random.default_rng(0).normal(size=16000 * 60).astype(np.float32)
+    spans = plan_shards(samples, 16000, 4, search_seconds=5.0)
+    assert len(spans) == 4
+    assert spans[0][0] == 0 and spans[-1][1] == len(samples)
+    assert all(a[1] == b[0] for a, b in zip(spans, spans[1:]))
+    # Each cut moves at most half the search window from the even split
+    assert all(abs((end - start) / 16000 - 15) <= 5.0 for start, end in spans)
+
+
+def test_shard_count():
+    assert shard_count(3600, 4, 300) == 4
+    assert shard_count(600, 4, 300) == 2
+    assert shard_count(100, 4, 300) == 1
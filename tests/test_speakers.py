@@ -0,0 +1,117 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.speakers import SpeakerClusterer, SpeakerTimeline, assign_speakers
+
+
+def synthetic_embeddings(num_speakers, noise, seed, windows=300, dim=192):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(num_speakers, dim))
+    labels = rng.integers(0, num_speakers, windows)
+    return centers[labels] + rng.normal(size=(windows, dim)) * noise, labels
+
+
+def num_clusters(labels):
+    return len(np.unique(labels))
+
+
+@pytest.mark.parametrize("num_speakers", [1, 2, 3])
+def test_eigengap_finds_speaker_count(num_speakers):
+    for seed in range(5):
+        embeddings, _ = synthetic_embeddings(num_speakers, 1.0, seed)
+        assert num_clusters(SpeakerClusterer(max_speakers=3).fit_predict(embeddings)) == num_speakers
+
+
+@pytest.mark.parametrize("num_speakers,noise", [(4, 1.0), (5, 1.5), (6, 1.0)])
+def test_more_speakers_than_max_are_clipped_not_collapsed(num_speakers, noise):
+    for seed in range(5):
+        embeddings, _ = synthetic_embeddings(num_speakers, noise, seed)
+        assert num_clusters(SpeakerClusterer(max_speakers=3).fit_predict(embeddings)) == 3
+
+
+def test_clusters_match_true_speakers():
+    embeddings, truth = synthetic_embeddings(3, 1.0, 0)
+    labels = SpeakerClusterer(max_speakers=3).fit_predict(embeddings)
+    # Same partition, whatever the numbering
+    pairs = set(zip(truth.tolist(), labels.tolist()))
+    assert len(pairs) == 3
+
+
+def test_labels_numbered_by_first_appearance():
+    embeddings, _ = synthetic_embeddings(3, 1.0, 1)
+    labels = SpeakerClusterer(max_speakers=3).fit_predict(embeddings)
+    _, first_seen = np.unique(labels, return_index=True)
+    assert list(labels[np.sort(first_seen)]) == [0, 1, 2]
+
+
+def test_two_distinct_windows_are_two_speakers():
+    clusterer = SpeakerClusterer(max_speakers=3)
+    assert list(clusterer.fit_predict(np.array([[1.0, 0.0], [0.0, 1.0]]))) == [0, 1]
+    assert list(clusterer.fit_predict(np.array([[1.0, 0.0], [1.0, 0.01]]))) == [0, 0]
+
+
+def test_single_window():
+    assert list(SpeakerClusterer().fit_predict(np.ones((1, 4)))) == [0]
+
+
+def test_centroid_reduction_keeps_speakers():
+    embeddings, _ = synthetic_embeddings(2, 1.0, 2, windows=600)
+    labels = SpeakerClusterer(max_speakers=3, max_centroids=64).fit_predict(embeddings)
+    assert num_clusters(labels) == 2
+
+
+def test_threshold_method_respects_max_speakers():
+    embeddings, _ = synthetic_embeddings(5, 1.0, 3)
+    clusterer = SpeakerClusterer(max_speakers=3, method='threshold', distance_threshold=0.5)
+    assert num_clusters(clusterer.fit_predict(embeddings)) == 3
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        SpeakerClusterer(method='kmeans')
+
+
+def word(text, start, end):
+    return SimpleNamespace(word=text, start=start, end=end)
+
+
+def segment(start, end, text, words=None):
+    return SimpleNamespace(start=start, end=end, text=text, words=words, avg_logprob=-0.3)
+
+
+TIMELINE = SpeakerTimeline(
+    [{'start': 0.0, 'end': 2.0}, {'start': 2.0, 'end': 4.0}, {'start': 4.0, 'end': 6.0}],
+    np.array([0, 1, 0])
+)
+
+
+def test_timeline_lookup():
+    assert list(TIMELINE.speakers_at(np.array([0.5, 2.5, 5.0, 7.0]))) == [0, 1, 0, -1]
+
+
+def test_assign_speakers_splits_at_speaker_change():
+    words = [word(" hello", 0.5, 0.9), word(" there", 1.0, 1.4), word(" how", 2.2, 2.5), word(" are", 2.6, 2.9)]
+    result = assign_speakers([segment(0.5, 2.9, "hello there how are", words)], TIMELINE)
+    assert [(s.speaker, s.text, s.start_time, s.end_time) for s in result] == [
+        ("Speaker_1", "hello there", 0.5, 1.4),
+        ("Speaker_2", "how are", 2.2, 2.9),
+    ]
+
+
+def test_assign_speakers_folds_short_runs():
+    words = [word(" one", 0.2, 0.4), word(" two", 0.6, 0.8), word(" three", 2.1, 2.3), word(" four", 1.0, 1.2)]
+    result = assign_speakers([segment(0.2, 1.2, "one two three four", words)], TIMELINE)
+    assert len(result) == 1
+    assert result[0].speaker == "Speaker_1"
+    assert result[0].text == "one two three four"
+
+
+def test_assign_speakers_without_words_uses_midpoint():
+    result = assign_speakers([segment(2.0, 3.0, " hi "), segment(6.5, 7.5, "late")], TIMELINE)
+    assert [(s.speaker, s.text) for s in result] == [("Speaker_2", "hi"), ("Unknown", "late")]
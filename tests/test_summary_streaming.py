@@ -0,0 +1,99 @@
+from datetime import datetime
+
+import pytest
+import requests
+
+from src.core.db import Meeting
+from src.core.llm_client import OllamaClient
+from src.core.recorder import MeetingRecorder
+from src.core.transcript import TranscriptSegment
+
+
+def client(ollama, **kwargs):
+    return OllamaClient(api_url=ollama.url, retries=0, backoff=0, **kwargs)
+
+
+def test_streamed_text_grows_chunk_by_chunk(make_ollama):
+    ollama = make_ollama()
+    ollama.reply = lambda payload: ["The ", "meeting ", "covered budgets."]
+    seen = []
+    assert client(ollama).generate("prompt", seen.append) == "The meeting covered budgets."
+    assert seen == ["The ", "The meeting ", "The meeting covered budgets."]
+    assert ollama.payloads[0]['stream'] is True
+    assert ollama.payloads[0]['keep_alive']
+
+
+def test_without_callback_the_reply_is_not_streamed(make_ollama):
+    ollama = make_ollama()
+    assert client(ollama).generate("prompt") == "Hello world"
+    assert ollama.payloads[0]['stream'] is False
+
+
+def test_error_in_stream_raises(make_ollama):
+    ollama = make_ollama()
+    ollama.reply = lambda payload: ["Partial", {'error': "model crashed"}]
+    seen = []
+    with pytest.raises(requests.RequestException):
+        client(ollama).generate("prompt", seen.append)
+    assert seen == ["Partial"]
+
+
+class StubLLM:
+    """LLMProcessor stand-in streaming ``chunks``, then failing with ``error`` if given"""
+
+    def __init__(self, chunks, error=None, during=None):
+        self.chunks, self.error, self.during = chunks, error, during
+
+    def stream_summary(self, transcript, on_text):
+        text = ""
+        for chunk in self.chunks:
+            text += chunk
+            on_text(text)
+            if self.during:
+                self.during(text)
+        if self.error:
+            raise self.error
+        return text
+
+
+@pytest.fixture
+def recorder(db, monkeypatch):
+    import config.config
+    monkeypatch.setattr(config.config, 'SUMMARY_FLUSH_INTERVAL', 0)
+    recorder = MeetingRecorder.__new__(MeetingRecorder)
+    recorder.db = db
+    db.save_meeting(Meeting(
+        id='m1', title='Standup', date=datetime.now(), duration=60.0, audio_path='m1.flac',
+        transcript=[TranscriptSegment('Speaker_1', 'Hello.', 0.0, 1.0, -0.1)],
+        summary="", summary_status='pending'
+    ))
+    return recorder
+
+
+def test_partial_summary_is_visible_while_streaming(recorder, db):
+    seen = []
+    recorder.llm_processor = StubLLM(["Key ", "topics"], during=lambda text: seen.append(db.get_meeting_summary('m1')))
+    meeting = recorder.summarize_meeting('m1')
+    assert [tuple(row) for row in seen] == [("Key ", 'streaming'), ("Key topics", 'streaming')]
+    assert meeting.summary_status == 'complete'
+    assert tuple(db.get_meeting_summary('m1')) == ("Key topics", 'complete')
+
+
+def test_failed_stream_keeps_the_partial_text(recorder, db):
+    recorder.llm_processor = StubLLM(["Key ", "topics"], error=RuntimeError("connection lost"))
+    recorder.summarize_meeting('m1')
+    summary, status = db.get_meeting_summary('m1')
+    assert status == 'failed'
+    assert summary.startswith("Key topics")
+    assert "connection lost" in summary
+
+
+def test_retry_shows_the_previous_text_until_new_tokens_arrive(recorder, db):
+    db.update_meeting_summary('m1', "Old partial\n\n*Summary interrupted: timeout*", 'failed')
+    seen = []
+    recorder.llm_processor = StubLLM([], error=RuntimeError("still down"),
+                                     during=lambda text: seen.append(text))
+    recorder.queue_summary('m1')
+    assert tuple(db.get_meeting_summary('m1')) == ("Old partial\n\n*Summary interrupted: timeout*", 'pending')
+    recorder.summarize_meeting('m1')
+    assert tuple(db.get_meeting_summary('m1')) == ("Old partial\n\n*Summary interrupted: still down*", 'failed')
@@ -0,0 +1,80 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src.core.voiceprints import VoiceprintIndex
+
+
+def voices(n, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+@pytest.fixture
+def index(db, tmp_path):
+    return VoiceprintIndex(db, directory=tmp_path / "voiceprints", min_similarity=0.7)
+
+
+def test_empty_index_matches_nothing(index):
+    assert index.match(voices(2)) == [None, None]
+    assert index.names() == []
+
+
+def test_match_enrolled_voices(index):
+    alice, bob, stranger = voices(3)
+    index.enroll("alice", alice)
+    index.enroll("bob", bob)
+    noisy = np.stack([bob, alice, stranger]) + np.random.default_rng(1).normal(size=(3, 16)) * 0.1
+    assert index.match(noisy) == ["bob", "alice", None]
+    assert index.names() == ["alice", "bob"]
+
+
+def test_each_voice_is_given_to_one_centroid(index):
+    alice, = voices(1)
+    index.enroll("alice", alice)
+    assert index.match(np.stack([alice * 0.9 + 0.01, alice])) == [None, "alice"]
+
+
+def test_enrollment_updates_the_running_centroid(index, db):
+    a, b = voices(2)
+    index.enroll("alice", a)
+    index.enroll("alice", b)
+    assert db.get_voiceprints() == [{'name': "alice", 'row': 0, 'samples': 2.0}]
+    both = (a / np.linalg.norm(a) + b / np.linalg.norm(b))
+    assert index.match(both[None]) == ["alice"]
+
+
+def test_dimension_mismatch(index):
+    index.enroll("alice", voices(1)[0])
+    with pytest.raises(ValueError):
+        index.enroll("bob", voices(1, dim=8)[0])
+    assert index.match(voices(1, dim=8)) == [None]
+
+
+def test_other_processes_see_enrollments(index, db, tmp_path):
+    other = VoiceprintIndex(db, directory=tmp_path / "voiceprints", min_similarity=0.7)
+    alice, = voices(1)
+    assert other.match(alice[None]) == [None]
+    index.enroll("alice", alice)
+    assert other.match(alice[None]) == ["alice"]
+
+
+def test_concurrent_enrollments_get_distinct_rows(db, tmp_path):
+    # Separate indexes stand in for separate processes: only the database serializes them
+    people = voices(24, seed=3)
+
+    def enroll(worker):
+        index = VoiceprintIndex(db, directory=tmp_path / "voiceprints", min_similarity=0.7)
+        for i in range(worker, len(people), 4):
+            index.enroll(f"person{i}", people[i])
+
+    threads = [threading.Thread(target=enroll, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    entries = db.get_voiceprints()
+    assert [entry['row'] for entry in entries] == list(range(24))
+    index = VoiceprintIndex(db, directory=tmp_path / "voiceprints", min_similarity=0.7)
+    assert index.match(people) == [f"person{i}" for i in range(24)]
@@ -220,6 +220,11 @@ class AudioRecorder {
         const notes = $('#recordingNotes').val() || '';
         formData.append('notes', notes);
 
+        const profile = $('select[name="profile"]').val();
+        if (profile) {
+            formData.append('profile', profile);
+        }
+
         try {
             // First stop server-side recording
             document.getElementById('processingStatus').textContent = 'Stopping server recording...';
@@ -244,14 +249,42 @@ class AudioRecorder {
                 throw new Error(errorData.error || 'Failed to upload recording');
             }
 
+            const { job_id } = await uploadResponse.json();
+            const job = await this.waitForJob(job_id);
             document.getElementById('processingStatus').textContent = 'Processing complete!';
-            return await uploadResponse.json();
+            return job;
         } catch (error) {
             console.error('Error uploading recording:', error);
             throw error;
         }
     }
 
+    async waitForJob(jobId, intervalMs = 2000) {
+        // Poll the job status API until the background worker finishes
+        const status = document.getElementById('processingStatus');
+        while (true) {
+            const response = await fetch(`/api/jobs/${jobId}`);
+            if (!response.ok) {
+                const errorData = await response.json();
+                throw new Error(errorData.error || 'Failed to get job status');
+            }
+            const job = await response.json();
+            // The meeting exists once its summary starts streaming
+            if (job.status === 'complete' || job.meeting_id) {
+                return job;
+            }
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Processing failed');
+            }
+            let text = `${job.stage || 'Queued'} (${Math.round(job.progress * 100)}%)`;
+            if (job.eta_seconds !== null) {
+                text += ` - about ${Math.ceil(job.eta_seconds / 60)} min remaining`;
+            }
+            status.textContent = text;
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+        }
+    }
+
     getSupportedMimeType() {
         const types = [
             'audio/webm;codecs=opus',